@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+HTTP throughput benchmark for multi-process serving (BOLTZ_HTTP_WORKERS).
+
+Starts the server once with a single process and once with several,
+each time against a stub Boltz that writes a synthetic prediction, so no
+GPU or model weights are needed. It submits one job, waits for it, and
+then has concurrent clients hammer the read path:
+
+- get_prediction_result: reads the CIF, base64-encodes it and serializes
+  a multi-megabyte JSON response (CPU-bound, holds the GIL)
+- check_job_status: small responses (per-request overhead)
+
+Usage:
+    python benchmark_http.py [--workers 4] [--clients 16] [--seconds 10] [--residues 20000]
+
+Client processes run on the same machine, so use a host with spare cores
+(at least workers + client processes) for meaningful numbers.
+"""
+
+import os
+import sys
+import time
+import json
+import signal
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from pathlib import Path
+from typing import Dict, Any, List
+
+import httpx
+
+SERVER_DIR = Path(__file__).resolve().parent
+
+# Stub "boltz" executable: writes one synthetic prediction per sample
+STUB_BOLTZ = """#!{python}
+import sys, json
+from pathlib import Path
+sys.path.insert(0, {server_dir!r})
+from structure_formats import write_benchmark_cif
+
+args = sys.argv
+input_path = Path(args[2])
+out_dir = Path(args[args.index("--out_dir") + 1])
+samples = int(args[args.index("--diffusion_samples") + 1])
+prediction_dir = out_dir / f"boltz_results_{{input_path.stem}}" / "predictions" / input_path.stem
+prediction_dir.mkdir(parents=True, exist_ok=True)
+for k in range(samples):
+    name = f"{{input_path.stem}}_model_{{k}}"
+    write_benchmark_cif(prediction_dir / f"{{name}}.cif", chains={chains}, residues_per_chain={per_chain}, seed=k)
+    (prediction_dir / f"confidence_{{name}}.json").write_text(json.dumps({{"confidence_score": 0.9}}))
+"""
+
+# Benchmarked tools and their arguments ("{job_id}" is filled in)
+WORKLOADS = [
+    ("get_prediction_result", {"format": "cif"}),
+    ("check_job_status", {}),
+]
+
+
+def free_port() -> int:
+    """Pick an unused local TCP port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, home: Path, boltz_bin: Path) -> subprocess.Popen:
+    """
+    Start boltz_mcp_server.py with an isolated home directory.
+
+    Args:
+        workers: BOLTZ_HTTP_WORKERS
+        port: Port to listen on
+        home: HOME for the server (its ~/.boltz_mcp lives here)
+        boltz_bin: Stub Boltz executable
+
+    Returns:
+        Server process (in its own process group)
+    """
+    env = {
+        **os.environ,
+        "HOME": str(home),
+        "BOLTZ_TRANSPORT": "http",
+        "BOLTZ_HOST": "127.0.0.1",
+        "BOLTZ_PORT": str(port),
+        "BOLTZ_HTTP_WORKERS": str(workers),
+        "BOLTZ_BIN": str(boltz_bin),
+        "BOLTZ_PREFETCH_WEIGHTS": "false",
+        "BOLTZ_VERIFY_WEIGHTS": "off",
+        "BOLTZ_WARMUP": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, str(SERVER_DIR / "boltz_mcp_server.py")],
+        cwd=SERVER_DIR, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    """Stop the server and every process it started."""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def wait_until_ready(base_url: str, timeout: float = 120.0) -> None:
+    """Poll /ready until the server answers 200."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready within {timeout:.0f}s")
+
+
+async def call_tool(client, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Call an MCP tool and decode its JSON result."""
+    result = await client.call_tool(name, arguments)
+    return json.loads(result.content[0].text)
+
+
+async def submit_job(url: str) -> str:
+    """Submit one sequence job and wait for it to complete."""
+    from fastmcp import Client
+
+    async with Client(url) as client:
+        job = await call_tool(client, "predict_structure_from_sequence", {"sequence": "MKTAYIAKQRQISFVKSHFSRQLEERLGLIEV"})
+        status = await call_tool(client, "wait_for_job", {"job_id": job["job_id"], "timeout": 120})
+        if status["status"] != "completed":
+            raise RuntimeError(f"Benchmark job did not complete: {status}")
+        return job["job_id"]
+
+
+def client_process(url: str, tool: str, arguments: Dict[str, Any], clients: int,
+                   seconds: float, results: "multiprocessing.Queue") -> None:
+    """
+    Run concurrent clients calling one tool until the time is up.
+
+    Puts (calls, bytes, latencies) on the results queue.
+    """
+    from fastmcp import Client
+
+    async def run() -> None:
+        deadline = time.perf_counter() + seconds
+        latencies: List[float] = []
+        total_bytes = 0
+
+        async def one_client() -> None:
+            nonlocal total_bytes
+            async with Client(url) as client:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    result = await client.call_tool(tool, arguments)
+                    latencies.append(time.perf_counter() - start)
+                    total_bytes += len(result.content[0].text)
+
+        await asyncio.gather(*(one_client() for _ in range(clients)))
+        results.put((len(latencies), total_bytes, latencies))
+
+    asyncio.run(run())
+
+
+def measure(url: str, tool: str, arguments: Dict[str, Any], clients: int,
+            client_processes: int, seconds: float) -> Dict[str, Any]:
+    """
+    Measure throughput of one tool with clients spread over several processes.
+
+    Returns:
+        calls_per_second, mb_per_second, p50_ms and p95_ms
+    """
+    results: multiprocessing.Queue = multiprocessing.Queue()
+    per_process = max(1, clients // client_processes)
+    processes = [
+        multiprocessing.Process(target=client_process, args=(url, tool, arguments, per_process, seconds, results))
+        for _ in range(client_processes)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    calls = sum(c for c, _, _ in collected)
+    total_bytes = sum(b for _, b, _ in collected)
+    latencies = sorted(l for _, _, ls in collected for l in ls)
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {
+        "calls_per_second": round(calls / seconds, 1),
+        "mb_per_second": round(total_bytes / seconds / 1e6, 1),
+        "p50_ms": round(percentile(0.50), 1),
+        "p95_ms": round(percentile(0.95), 1),
+    }
+
+
+def run_benchmark(worker_counts: List[int], clients: int, seconds: float, residues: int) -> List[Dict[str, Any]]:
+    """
+    Benchmark the server with each number of HTTP processes.
+
+    Args:
+        worker_counts: BOLTZ_HTTP_WORKERS values to compare
+        clients: Concurrent clients per measurement
+        seconds: Duration of each measurement
+        residues: Size of the synthetic prediction
+
+    Returns:
+        One row per (processes, tool)
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        per_chain = 500
+        boltz_bin = Path(tmp) / "boltz"
+        boltz_bin.write_text(STUB_BOLTZ.format(
+            python=sys.executable, server_dir=str(SERVER_DIR),
+            chains=max(1, residues // per_chain), per_chain=per_chain,
+        ))
+        boltz_bin.chmod(0o755)
+
+        for workers in worker_counts:
+            home = Path(tmp) / f"home{workers}"
+            home.mkdir()
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(workers, port, home, boltz_bin)
+            try:
+                wait_until_ready(base_url)
+                job_id = asyncio.run(submit_job(f"{base_url}/mcp/"))
+                for tool, arguments in WORKLOADS:
+                    stats = measure(
+                        f"{base_url}/mcp/", tool, {**arguments, "job_id": job_id},
+                        clients, client_processes=max(1, min(clients, os.cpu_count() or 1)),
+                        seconds=seconds,
+                    )
+                    rows.append({"processes": workers, "tool": tool, **stats})
+                    print(f"{workers:>9}  {tool:<22} {stats['calls_per_second']:>9} "
+                          f"{stats['mb_per_second']:>7} {stats['p50_ms']:>8} {stats['p95_ms']:>8}")
+            finally:
+                stop_server(server)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="HTTP processes to compare against 1 (default: 4)")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients (default: 16)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each measurement (default: 10)")
+    parser.add_argument("--residues", type=int, default=20000, help="Residues in the synthetic prediction (default: 20000)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    print(f"{'processes':>9}  {'tool':<22} {'calls/s':>9} {'MB/s':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    rows = run_benchmark([1, args.workers], args.clients, args.seconds, args.residues)
+    if args.json:
+        print(json.dumps(rows, indent=2))
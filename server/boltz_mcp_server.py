@@ -16,18 +16,101 @@ Key Features:
 """
 
 import os
+import re
 import sys
+import time
+import codecs
 import tempfile
 import asyncio
 import hashlib
+import hmac
+import ipaddress
 import json
+import socket
+import shutil
+import threading
+import contextlib
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set
 from datetime import datetime
+from collections import deque
 
 # FastMCP imports
 from fastmcp import FastMCP
 
+# Request headers of the MCP call being handled (used to identify the client)
+from fastmcp.server.dependencies import get_http_headers
+
+# Starlette request/response types for plain HTTP routes (installed with FastMCP)
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+# httpx is used to talk to worker agents in coordinator mode
+import httpx
+
+# Sequence normalization/validation (protein, DNA, RNA; FASTA parsing)
+from sequence_utils import SequenceValidationError, normalize_sequence, parse_fasta
+
+# Incremental diffusion sampling (sample sets shared across jobs)
+from sample_sets import (
+    create_sample_set,
+    load_manifest,
+    merge_run,
+    prepare_topup_run,
+    sample_set_fingerprint,
+)
+
+# Secondary indexes for list_jobs
+from job_index import JobIndex, parse_timestamp
+
+# Shared job table for multi-process HTTP serving
+from job_store import JobStore, try_acquire_leadership
+
+# Per-client tokens, fair-share GPU scheduling, rate limits and usage accounting
+from fair_share import (
+    ANONYMOUS_CLIENT,
+    LOCAL_CLIENT,
+    USAGE_COUNTERS,
+    ClientAuthMiddleware,
+    FairScheduler,
+    RateLimiter,
+    UsageLedger,
+    load_client_registry,
+    parse_bearer,
+)
+
+# Compact confidence/geometry summaries of predicted structures
+from structure_summary import summarize_prediction
+
+# Compact output formats (BinaryCIF, gzip, NumPy) with cached conversion
+from structure_formats import OUTPUT_FORMATS, convert_structure
+
+# Model weight prefetch, verification and page-cache warm-up
+from model_weights import prepare_weights
+
+# Per-job span tracing (handlers, pipeline, Boltz stages) and trace export
+from tracing import (
+    TRACE_FORMATS,
+    BoltzStageTimeline,
+    HandlerTrace,
+    JobTracer,
+    export_traces,
+    job_root_span,
+    summarize_stages,
+)
+
+# Cluster (coordinator/worker) support
+from cluster import (
+    CLUSTER_TOKEN_HEADER,
+    WorkerRegistry,
+    check_cluster_token,
+    fetch_remote_outputs,
+    get_remote_job,
+    resolve_output_path,
+    submit_remote_job,
+)
+
 # File handling for binary data (PDB files, CIF files)
 import base64
 
@@ -44,9 +127,133 @@ UPLOAD_DIR = Path.home() / ".boltz_mcp" / "uploads"
 OUTPUT_DIR = Path.home() / ".boltz_mcp" / "outputs"
 # Directory where Boltz models are cached
 MODEL_CACHE_DIR = Path.home() / ".boltz_mcp" / "models"
+# Directory holding sample sets (all diffusion samples per input + parameters)
+SAMPLE_SET_DIR = OUTPUT_DIR / "samples"
 # Maximum file size for uploads (100MB)
 MAX_UPLOAD_SIZE = 100 * 1024 * 1024
 
+# Boltz executable (override if boltz is not on PATH)
+BOLTZ_BIN = os.getenv("BOLTZ_BIN", "boltz")
+
+# Automatic retry of failed inference runs
+# Total attempts per job, including the first one
+MAX_INFERENCE_ATTEMPTS = int(os.getenv("BOLTZ_MAX_ATTEMPTS", "3"))
+# Backoff before retry N is RETRY_BACKOFF_SECONDS * 2**(N-1), capped
+RETRY_BACKOFF_SECONDS = float(os.getenv("BOLTZ_RETRY_BACKOFF_SECONDS", "5"))
+RETRY_BACKOFF_MAX_SECONDS = 60.0
+# Number of stdout/stderr lines kept per job (full logs can be megabytes)
+OUTPUT_TAIL_LINES = 200
+# Bytes read from Boltz's output at a time
+OUTPUT_READ_BYTES = 64 * 1024
+
+# Output signatures of CUDA out-of-memory failures (matched lowercase)
+# Boltz prints "ran out of memory, skipping batch" and exits 0 on OOM
+OOM_PATTERNS = (
+    "out of memory",
+    "outofmemoryerror",
+    "cublas_status_alloc_failed",
+)
+# Output signatures of failures worth retrying unchanged (matched lowercase)
+TRANSIENT_PATTERNS = (
+    "connectionerror",
+    "connection reset",
+    "max retries exceeded",
+    "temporary failure in name resolution",
+    "read timed out",
+    "502 bad gateway",
+    "503 service unavailable",
+    "cuda-capable device(s) is/are busy or unavailable",
+    "nccl error",
+)
+
+# Cluster mode
+# "standalone": run Boltz on this machine (default)
+# "coordinator": keep the job table here and dispatch work to worker agents
+#                (boltz_worker.py) running on other GPU hosts
+BOLTZ_ROLE = os.getenv("BOLTZ_ROLE", "standalone")
+# Shared secret between coordinator and workers (required in coordinator mode;
+# heartbeats are refused without it)
+CLUSTER_TOKEN = os.getenv("BOLTZ_CLUSTER_TOKEN")
+# Seconds without a heartbeat before a worker is considered dead
+WORKER_HEARTBEAT_TIMEOUT = float(os.getenv("BOLTZ_WORKER_HEARTBEAT_TIMEOUT", "30"))
+# How often the coordinator polls for free workers / remote job status
+CLUSTER_POLL_SECONDS = float(os.getenv("BOLTZ_CLUSTER_POLL_SECONDS", "5"))
+# How many times a job is re-placed after its worker dies or rejects it
+MAX_DISPATCH_ATTEMPTS = 3
+# Seconds a live worker may fail to report a job before the job is re-placed
+REMOTE_JOB_LOST_SECONDS = float(os.getenv("BOLTZ_REMOTE_JOB_LOST_SECONDS", "120"))
+# How many times pulling a finished job's outputs is tried (with backoff)
+FETCH_OUTPUTS_ATTEMPTS = 4
+
+# Long-poll limits for wait_for_job / wait_any
+# Tunnels and proxies may drop idle HTTP requests, so waits are capped
+WAIT_DEFAULT_SECONDS = 60.0
+WAIT_MAX_SECONDS = float(os.getenv("BOLTZ_WAIT_MAX_SECONDS", "300"))
+
+# Completion webhooks
+# If set, webhook bodies are signed with HMAC-SHA256 (X-Boltz-Signature header)
+WEBHOOK_SECRET = os.getenv("BOLTZ_WEBHOOK_SECRET")
+WEBHOOK_TIMEOUT_SECONDS = 10.0
+WEBHOOK_MAX_ATTEMPTS = 3
+# Callback URLs must resolve to public addresses (no loopback, private or
+# link-local hosts such as 169.254.169.254). Hosts listed here are exempt,
+# e.g. "hooks.internal,10.0.0.5" for a receiver on the local network.
+WEBHOOK_ALLOWED_HOSTS = {
+    host.strip().lower()
+    for host in os.getenv("BOLTZ_WEBHOOK_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+}
+
+# Startup preparation (only when run as a server, see __main__)
+# Which Boltz weights to prefetch: "boltz2" (current Boltz) or "boltz1"
+BOLTZ_WEIGHTS = os.getenv("BOLTZ_WEIGHTS", "boltz2")
+# Download missing weights at startup instead of during the first job
+PREFETCH_WEIGHTS = os.getenv("BOLTZ_PREFETCH_WEIGHTS", "true").lower() in ("1", "true", "yes")
+# Checksum verification: "auto" (re-hash changed files), "full" or "off"
+VERIFY_WEIGHTS = os.getenv("BOLTZ_VERIFY_WEIGHTS", "auto")
+# Optional sha256sum-style file pinning weight checksums (e.g. air-gapped hosts)
+WEIGHT_CHECKSUM_FILE = os.getenv("BOLTZ_WEIGHT_CHECKSUMS")
+# Run a tiny prediction on every GPU before reporting ready
+WARMUP_ENABLED = os.getenv("BOLTZ_WARMUP", "false").lower() in ("1", "true", "yes")
+# Diffusion steps of the warm-up prediction (kept small; it only exercises the stack)
+WARMUP_SAMPLING_STEPS = 10
+# Short protein used for warm-up, in single-sequence mode (no MSA server call)
+WARMUP_FASTA = ">A|protein|empty\nMKTAYIAKQRQISFVKSHFSRQLEERLGLIEVQAPILSRVGDGTQDNLSGAEK\n"
+
+# Multi-process HTTP serving
+# Number of HTTP worker processes sharing the port (1 = single process)
+HTTP_WORKERS = int(os.getenv("BOLTZ_HTTP_WORKERS", "1"))
+# Shared job store and leader lock (only used when HTTP_WORKERS > 1)
+JOB_STORE_PATH = OUTPUT_DIR / "jobs.db"
+LEADER_LOCK_PATH = OUTPUT_DIR / "leader.lock"
+# How often the leader picks up new submissions (seconds)
+LEADER_POLL_SECONDS = 0.2
+# How often a follower checks whether the leader has gone away (seconds)
+LEADERSHIP_RETRY_SECONDS = 2.0
+# How often wait_for_job / wait_any re-read the shared store (seconds)
+STORE_WAIT_POLL_SECONDS = 0.25
+
+# Clients (see fair_share.py)
+# Single shared bearer token (becomes the admin client "default")
+AUTH_TOKEN = os.getenv("BOLTZ_AUTH_TOKEN")
+# JSON file with per-client tokens, weights, GPU quotas and rate limits
+CLIENTS_FILE = os.getenv("BOLTZ_CLIENTS_FILE")
+# Jobs allowed on one GPU at the same time
+JOBS_PER_GPU = int(os.getenv("BOLTZ_JOBS_PER_GPU", "1"))
+
+# Per-job tracing (see tracing.py)
+# Record spans for every job (stored as traces/<job_id>.jsonl)
+TRACING_ENABLED = os.getenv("BOLTZ_TRACING", "true").lower() in ("1", "true", "yes")
+TRACE_DIR = OUTPUT_DIR / "traces"
+# Most jobs get_job_trace exports at once
+TRACE_EXPORT_MAX_JOBS = 1000
+# Traces not updated for this many days are deleted (0 = keep forever)
+TRACE_MAX_AGE_DAYS = float(os.getenv("BOLTZ_TRACE_MAX_AGE_DAYS", "30"))
+# Most traces kept; the least recently updated go first (0 = no limit)
+TRACE_MAX_FILES = int(os.getenv("BOLTZ_TRACE_MAX_FILES", "10000"))
+# Minimum seconds between two trace cleanups (run when jobs finish)
+TRACE_PRUNE_INTERVAL_SECONDS = 600.0
+
 # Create directories if they don't exist
 # exist_ok=True prevents errors if directory already exists
 # parents=True creates parent directories as needed
@@ -58,6 +265,66 @@ MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 # Key: job_id (hash), Value: dict with status, progress, output_path
 jobs: Dict[str, Dict[str, Any]] = {}
 
+# Index over the job table (creation order, status, batch, filename, sequence)
+# Kept in sync by register_job() and set_job_status()
+job_index = JobIndex()
+
+# Fields returned by list_jobs when no projection is requested
+LIST_JOBS_DEFAULT_FIELDS = ["job_id", "status", "filename", "created_at"]
+# Largest page list_jobs will return
+LIST_JOBS_MAX_LIMIT = 1000
+
+# Job statuses after which a job never changes again
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Per-job completion events - set once the job reaches a terminal status
+# Key: job_id, Value: asyncio.Event awaited by wait_for_job / wait_any
+job_events: Dict[str, asyncio.Event] = {}
+
+# Fire-and-forget tasks (inference, webhooks). The event loop only keeps weak
+# references to tasks, so they are held here until they finish
+background_tasks: Set[asyncio.Task] = set()
+
+# One lock per sample set, so concurrent requests for the same input never
+# compute the same samples twice
+sample_set_locks: Dict[str, asyncio.Lock] = {}
+
+# Startup readiness, served at /ready and in get_server_info
+# "ready" by default so importing this module (e.g. from boltz_worker.py)
+# does not block inference; start_startup_preparation() resets it
+readiness: Dict[str, Any] = {"state": "ready", "stages": {}}
+# Set once startup preparation has finished; inference waits for it so jobs
+# submitted during startup never race the weight download
+models_ready = threading.Event()
+models_ready.set()
+
+# Registered worker agents (only used in coordinator mode)
+worker_registry = WorkerRegistry(heartbeat_timeout=WORKER_HEARTBEAT_TIMEOUT)
+
+# Client identities and policies (tokens, weights, GPU quotas, rate limits)
+client_registry = load_client_registry(Path(CLIENTS_FILE) if CLIENTS_FILE else None, AUTH_TOKEN)
+# Submission token buckets and usage counters (the shared job store
+# replaces both in multi-process mode)
+rate_limiter = RateLimiter()
+usage_ledger = UsageLedger()
+# Weighted fair queueing of GPUs across clients; in coordinator mode the
+# GPUs are the combined capacity of the live workers
+gpu_scheduler = FairScheduler(
+    slots_per_device=JOBS_PER_GPU,
+    capacity=worker_registry.total_capacity if BOLTZ_ROLE == "coordinator" else None,
+)
+
+# Span recorder shared by tool handlers and the inference pipeline
+job_tracer = JobTracer(TRACE_DIR, enabled=TRACING_ENABLED)
+# When old traces were last deleted (see prune_traces_if_due)
+last_trace_prune = 0.0
+
+# Shared job store, set by create_app() in multi-process mode (None otherwise)
+# With a store, "jobs" only holds the jobs this process runs as leader
+job_store: Optional[JobStore] = None
+# Whether this process runs inference (always true in single-process mode)
+is_leader = True
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
@@ -157,6 +424,705 @@ def load_output_file(file_path: Path) -> str:
     return base64.b64encode(file_data).decode('utf-8')
 
 
+def register_job(job_id: str, record: Dict[str, Any]) -> None:
+    """
+    Add a new job to the job table and its index.
+
+    Args:
+        job_id: Job ID
+        record: Initial job record (must contain "status" and "created_at")
+    """
+    if job_store is not None:
+        # Multi-process mode: the leader loads the record when it claims the job
+        job_store.put_job(job_id, record)
+        return
+    jobs[job_id] = record
+    job_index.add(job_id, record)
+
+
+def persist_job(job_id: str) -> None:
+    """
+    Write a job's in-memory record through to the shared store.
+
+    Does nothing in single-process mode.
+
+    Args:
+        job_id: Job ID
+    """
+    if job_store is not None and job_id in jobs:
+        job_store.put_job(job_id, jobs[job_id])
+
+
+def set_job_status(job_id: str, status: str) -> None:
+    """
+    Change a job's status, keeping the status index (and shared store) in sync.
+
+    Args:
+        job_id: Job ID
+        status: New status ("queued", "running", "retrying", "completed", "failed")
+    """
+    jobs[job_id]["status"] = status
+    job_index.update(job_id, "status", status)
+    persist_job(job_id)
+
+
+def add_job_warning(job_id: str, message: str) -> None:
+    """
+    Record a problem that did not fail the job (shown in status and result).
+
+    Args:
+        job_id: Job ID
+        message: Human-readable warning
+    """
+    jobs[job_id].setdefault("warnings", []).append(message)
+
+
+def lookup_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Current record of a job, wherever it lives.
+
+    The leader's in-memory record is the freshest copy of a job it runs;
+    in multi-process mode every other job is read from the shared store.
+
+    Args:
+        job_id: Job ID
+
+    Returns:
+        Job record, or None if the job does not exist
+    """
+    job = jobs.get(job_id)
+    if job is not None or job_store is None:
+        return job
+    return job_store.get_job(job_id)
+
+
+def job_statuses(job_ids: List[str]) -> Dict[str, str]:
+    """
+    Current status of several jobs; unknown job IDs are left out.
+
+    Args:
+        job_ids: Job IDs
+
+    Returns:
+        {job_id: status}
+    """
+    statuses = {job_id: jobs[job_id]["status"] for job_id in job_ids if job_id in jobs}
+    missing = [job_id for job_id in job_ids if job_id not in statuses]
+    if job_store is not None and missing:
+        statuses.update(job_store.get_statuses(missing))
+    return statuses
+
+
+async def store_io(function, *args):
+    """
+    Call a function that may read the shared store, off the event loop.
+
+    In single-process mode everything is in memory, so the function is
+    simply called.
+
+    Args:
+        function: Function to call (e.g. lookup_job)
+        *args: Its arguments
+
+    Returns:
+        Whatever the function returns
+    """
+    if job_store is None:
+        return function(*args)
+    return await asyncio.to_thread(function, *args)
+
+
+async def flush_store() -> None:
+    """Wait until this process's queued store writes are visible to the others."""
+    if job_store is not None:
+        await asyncio.to_thread(job_store.flush)
+
+
+# ============================================================================
+# CLIENTS - Identity, rate limits and usage accounting
+# ============================================================================
+
+def current_client() -> str:
+    """
+    Client that sent the MCP request being handled.
+
+    Returns:
+        Client name (LOCAL_CLIENT outside HTTP requests, e.g. stdio)
+    """
+    headers = get_http_headers(include={"authorization"})
+    if not headers:
+        return LOCAL_CLIENT
+    # Requests with an invalid token never reach the tools (ClientAuthMiddleware)
+    return client_registry.authenticate(parse_bearer(headers.get("authorization"))) or ANONYMOUS_CLIENT
+
+
+def record_usage(client: str, **amounts: float) -> None:
+    """
+    Add to a client's usage counters (see fair_share.USAGE_COUNTERS).
+
+    Args:
+        client: Client name
+        **amounts: Counter increments, e.g. gpu_seconds=12.5
+    """
+    if job_store is not None:
+        job_store.add_usage(client, amounts)
+    else:
+        usage_ledger.add(client, amounts)
+
+
+def record_http_bytes(client: str, bytes_in: int, bytes_out: int) -> None:
+    """Account one HTTP request's body sizes (called by ClientAuthMiddleware)."""
+    if bytes_in or bytes_out:
+        record_usage(client, bytes_in=bytes_in, bytes_out=bytes_out)
+
+
+async def check_submission_rate(client: str, count: int) -> Optional[Dict[str, Any]]:
+    """
+    Apply a client's submission rate limit to count new jobs.
+
+    Args:
+        client: Client name
+        count: Number of jobs about to be submitted
+
+    Returns:
+        None if the jobs may be submitted (they are counted), else an
+        error response for the tool to return
+    """
+    policy = client_registry.policy(client)
+    if job_store is not None:
+        # Shared bucket: a transaction on the store's writer thread
+        retry_after = await asyncio.to_thread(job_store.take_rate_tokens, client, count, policy)
+    else:
+        retry_after = rate_limiter.take(client, count, policy)
+
+    if retry_after > 0:
+        record_usage(client, rejected_submissions=count)
+        return {
+            "error": (
+                f"Rate limit exceeded for client '{client}' "
+                f"({policy['submissions_per_minute']} submissions per minute). "
+                f"Retry in {retry_after:.0f}s."
+            ),
+            "status": "rate_limited",
+            "retry_after": round(retry_after, 1),
+        }
+
+    record_usage(client, submissions=count)
+    return None
+
+
+def scheduler_summary() -> Dict[str, Dict[str, int]]:
+    """
+    Running GPUs and queued jobs per client.
+
+    The scheduler lives in the process that runs inference; in
+    multi-process mode followers read what the leader published.
+    """
+    if job_store is None or is_leader:
+        return gpu_scheduler.summary()
+    return job_store.get_meta("scheduler", {})
+
+
+def job_queue_position(job_id: str) -> Optional[int]:
+    """
+    Place of a queued job in the fair-share GPU queue.
+
+    Followers read the positions the leader last published, which may be
+    up to LEADER_POLL_SECONDS old.
+
+    Args:
+        job_id: Job ID
+
+    Returns:
+        1-based position, or None if the job is not waiting for GPUs
+    """
+    if job_store is None or is_leader:
+        return gpu_scheduler.queue_position(job_id)
+    return job_store.get_meta("queue_positions", {}).get(job_id)
+
+
+def http_middleware() -> List[Middleware]:
+    """Middleware for the HTTP app: client authentication and byte accounting."""
+    return [Middleware(ClientAuthMiddleware, registry=client_registry, record_bytes=record_http_bytes)]
+
+
+def start_background_task(coro) -> asyncio.Task:
+    """
+    Run a coroutine in the background without awaiting it.
+
+    The task is kept in background_tasks until it is done, so it cannot be
+    garbage-collected halfway through.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The created task
+    """
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+def get_job_event(job_id: str) -> asyncio.Event:
+    """
+    Get (or create) the completion event for a job.
+
+    Args:
+        job_id: Job ID
+
+    Returns:
+        asyncio.Event that is set once the job is completed or failed
+    """
+    event = job_events.get(job_id)
+    if event is None:
+        event = asyncio.Event()
+        job_events[job_id] = event
+        # Jobs that finished before anyone waited on them
+        if jobs.get(job_id, {}).get("status") in TERMINAL_STATUSES:
+            event.set()
+    return event
+
+
+async def wait_until_any_finished(job_ids: List[str], timeout: float) -> bool:
+    """
+    Wait until at least one of several jobs completes or fails.
+
+    Single-process mode awaits the jobs' completion events. In
+    multi-process mode the job may run in another process, so the shared
+    store is polled every STORE_WAIT_POLL_SECONDS instead.
+
+    Args:
+        job_ids: Existing job IDs
+        timeout: Maximum seconds to wait
+
+    Returns:
+        True if a job finished, False if the timeout expired first
+    """
+    if any(status in TERMINAL_STATUSES for status in (await store_io(job_statuses, job_ids)).values()):
+        return True
+
+    if job_store is None:
+        waiters = [asyncio.create_task(get_job_event(job_id).wait()) for job_id in job_ids]
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        return bool(done)
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(STORE_WAIT_POLL_SECONDS, remaining))
+        if any(status in TERMINAL_STATUSES for status in (await store_io(job_statuses, job_ids)).values()):
+            return True
+
+
+async def send_job_webhook(job_id: str, callback_url: str) -> None:
+    """
+    POST a job's final status to its callback URL.
+
+    Delivery is retried with exponential backoff. The outcome is recorded
+    in the job record as "callback_status" (never raises).
+
+    Args:
+        job_id: Job ID
+        callback_url: http(s) URL supplied at submission time
+    """
+    job = jobs[job_id]
+    payload = {
+        "job_id": job_id,
+        "status": job["status"],
+        "created_at": job.get("created_at"),
+        "completed_at": job.get("completed_at"),
+        "error": job.get("error"),
+    }
+    body = json.dumps(payload).encode("utf-8")
+
+    headers = {"Content-Type": "application/json"}
+    if WEBHOOK_SECRET:
+        # Receivers verify with hmac.new(secret, body, sha256)
+        signature = hmac.new(WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        headers["X-Boltz-Signature"] = f"sha256={signature}"
+
+    async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_SECONDS) as client:
+        for attempt in range(1, WEBHOOK_MAX_ATTEMPTS + 1):
+            # DNS can change after submission, so check the target again
+            # before every attempt (getaddrinfo blocks, hence the thread)
+            try:
+                await asyncio.to_thread(validate_callback_url, callback_url)
+            except ValueError as e:
+                job["callback_status"] = f"refused: {e}"
+                persist_job(job_id)
+                return
+            try:
+                response = await client.post(callback_url, content=body, headers=headers)
+                response.raise_for_status()
+                job["callback_status"] = f"delivered (HTTP {response.status_code})"
+                persist_job(job_id)
+                return
+            except httpx.HTTPError as e:
+                job["callback_status"] = f"failed after {attempt} attempt(s): {e}"
+                persist_job(job_id)
+                if attempt < WEBHOOK_MAX_ATTEMPTS:
+                    await asyncio.sleep(2 ** attempt)
+
+
+def notify_job_finished(job_id: str) -> None:
+    """
+    Wake up waiters and fire the webhook once a job reaches a final status.
+
+    Args:
+        job_id: Job ID
+    """
+    get_job_event(job_id).set()
+
+    callback_url = jobs.get(job_id, {}).get("callback_url")
+    if callback_url:
+        start_background_task(send_job_webhook(job_id, callback_url))
+
+    prune_traces_if_due()
+
+
+def prune_traces_if_due() -> None:
+    """
+    Delete old trace files in the background, at most once per
+    TRACE_PRUNE_INTERVAL_SECONDS (see BOLTZ_TRACE_MAX_AGE_DAYS and
+    BOLTZ_TRACE_MAX_FILES).
+    """
+    global last_trace_prune
+    if time.time() - last_trace_prune < TRACE_PRUNE_INTERVAL_SECONDS:
+        return
+    last_trace_prune = time.time()
+    start_background_task(
+        asyncio.to_thread(job_tracer.prune, TRACE_MAX_AGE_DAYS * 86400, TRACE_MAX_FILES)
+    )
+
+
+def validate_callback_url(callback_url: Optional[str]) -> Optional[str]:
+    """
+    Check that a webhook URL is an http(s) URL pointing at a public host.
+
+    The host name is resolved and every address it maps to must be a
+    public one. Otherwise a client could make the server POST to itself,
+    the local network or the cloud metadata service. Hosts listed in
+    BOLTZ_WEBHOOK_ALLOWED_HOSTS skip the address check.
+
+    This resolves DNS (blocking), so async code calls it through
+    asyncio.to_thread().
+
+    Args:
+        callback_url: URL supplied by the client (or None)
+
+    Returns:
+        The URL unchanged, or None if not given
+
+    Raises:
+        ValueError: If the URL is not an http(s) URL, cannot be resolved
+            or points at a non-public address
+    """
+    if not callback_url:
+        return None
+    if not callback_url.startswith(("http://", "https://")):
+        raise ValueError("callback_url must be an http:// or https:// URL")
+
+    try:
+        parsed = httpx.URL(callback_url)
+    except httpx.InvalidURL as e:
+        raise ValueError(f"callback_url is not a valid URL: {e}")
+    host = parsed.host.lower()
+    if not host:
+        raise ValueError("callback_url has no host")
+    if host in WEBHOOK_ALLOWED_HOSTS:
+        return callback_url
+
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        addresses = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError) as e:
+        raise ValueError(f"callback_url host {host!r} cannot be resolved: {e}")
+
+    for address in addresses:
+        # sockaddr[0] is the IP; strip an IPv6 scope such as "%eth0"
+        ip = ipaddress.ip_address(address[4][0].split("%")[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            # "::ffff:127.0.0.1" is loopback too
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(
+                f"callback_url host {host!r} resolves to non-public address {ip} "
+                f"(add it to BOLTZ_WEBHOOK_ALLOWED_HOSTS to allow it)"
+            )
+    return callback_url
+
+
+def query_gpu_free_memory() -> Dict[int, int]:
+    """
+    Query free memory (in MiB) for every GPU visible to nvidia-smi.
+
+    Used by the OOM recovery logic to move a failed job onto the GPU
+    with the most headroom.
+
+    Returns:
+        Dictionary mapping GPU index -> free memory in MiB.
+        Empty if nvidia-smi is unavailable or fails.
+    """
+    import subprocess
+
+    if shutil.which("nvidia-smi") is None:
+        return {}
+
+    try:
+        # --format=csv,noheader,nounits gives lines like "0, 23145"
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=index,memory.free", "--format=csv,noheader,nounits"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return {}
+
+    if result.returncode != 0:
+        return {}
+
+    free_memory = {}
+    for line in result.stdout.splitlines():
+        parts = [p.strip() for p in line.split(",")]
+        if len(parts) != 2:
+            continue
+        try:
+            free_memory[int(parts[0])] = int(parts[1])
+        except ValueError:
+            continue
+    return free_memory
+
+
+def classify_boltz_output_line(line: str) -> Optional[str]:
+    """
+    Classify a single line of Boltz output as a known failure signature.
+
+    Boltz catches CUDA OOM inside its predict step, prints a warning and
+    exits with code 0 without writing a structure, so failures must be
+    detected from the output stream rather than the return code alone.
+
+    Args:
+        line: One line of stdout or stderr
+
+    Returns:
+        "oom", "transient", or None if the line is not a failure signature
+    """
+    lowered = line.lower()
+    if any(pattern in lowered for pattern in OOM_PATTERNS):
+        return "oom"
+    if any(pattern in lowered for pattern in TRANSIENT_PATTERNS):
+        return "transient"
+    return None
+
+
+def build_boltz_command(
+    input_path: Path,
+    job_output_dir: Path,
+    devices: List[int],
+    recycling_steps: int,
+    sampling_steps: int,
+    diffusion_samples: int,
+    max_parallel_samples: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[str]:
+    """
+    Build the Boltz CLI command line for one inference attempt.
+
+    Args:
+        input_path: Path to input PDB or FASTA file
+        job_output_dir: Output directory for this job
+        devices: GPU device IDs to use
+        recycling_steps: Number of recycling iterations
+        sampling_steps: Diffusion sampling steps
+        diffusion_samples: Number of samples to generate
+        max_parallel_samples: Optional cap on samples decoded at once (lower = less GPU memory)
+        seed: Optional random seed (makes samples reproducible)
+
+    Returns:
+        Command as a list of arguments for asyncio.create_subprocess_exec
+    """
+    # This follows the Boltz CLI interface from the GitHub repo
+    cmd = [
+        BOLTZ_BIN,  # Assumes boltz is installed and in PATH (or set BOLTZ_BIN)
+        "predict",  # Subcommand for running predictions
+        str(input_path),  # Input file path
+        "--out_dir", str(job_output_dir),  # Output directory
+        "--devices", str(len(devices)),  # Number of GPU devices to use
+        "--recycling_steps", str(recycling_steps),  # Number of recycling iterations
+        "--sampling_steps", str(sampling_steps),  # Diffusion steps
+        "--diffusion_samples", str(diffusion_samples),  # How many predictions to generate
+        "--cache", str(MODEL_CACHE_DIR),  # Where to cache model weights
+        "--use_msa_server",  # Auto-generate MSA using mmseqs2 server (required for FASTA without pre-computed MSA)
+    ]
+
+    if max_parallel_samples is not None:
+        # Decode fewer diffusion samples at once to reduce peak GPU memory
+        cmd.extend(["--max_parallel_samples", str(max_parallel_samples)])
+
+    if seed is not None:
+        cmd.extend(["--seed", str(seed)])
+
+    return cmd
+
+
+async def _run_boltz_attempt(cmd: List[str], devices: List[int]) -> Dict[str, Any]:
+    """
+    Run one Boltz subprocess, scanning its output for failure signatures
+    and stage boundaries.
+
+    stdout and stderr are read as they are produced instead of buffering
+    everything with communicate(), so only a bounded tail is kept in memory
+    and OOM/transient errors are spotted in the stream. Progress bars
+    redraw with "\\r" instead of "\\n", so both end a line; otherwise the
+    start of the prediction would only be seen once its bar had finished.
+    A redrawn line replaces the previous one in the tail, like a terminal.
+
+    Args:
+        cmd: Command built by build_boltz_command()
+        devices: GPU device IDs exposed to the subprocess
+
+    Returns:
+        Dictionary with returncode, failure ("oom", "transient" or None),
+        stdout/stderr tails, and the run's stages (see BoltzStageTimeline)
+    """
+    # Restrict the subprocess to the selected GPUs
+    env = os.environ.copy()
+    env["CUDA_VISIBLE_DEVICES"] = ",".join(str(d) for d in devices)
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env,
+    )
+
+    failure: Optional[str] = None
+    stdout_tail: deque = deque(maxlen=OUTPUT_TAIL_LINES)
+    stderr_tail: deque = deque(maxlen=OUTPUT_TAIL_LINES)
+    stages = BoltzStageTimeline()
+
+    async def consume(stream: asyncio.StreamReader, tail: deque) -> None:
+        nonlocal failure
+        # Incremental decoding, so a character split across reads stays intact
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        # Whether the last tail line ended with "\r" (is redrawn next)
+        redraw = False
+        while True:
+            chunk = await stream.read(OUTPUT_READ_BYTES)
+            pending += decoder.decode(chunk, final=not chunk)
+            # ["line", "\n", "line", "\r", ..., "unfinished line"]
+            parts = re.split(r"(\r|\n)", pending)
+            pending = parts.pop()
+            if not chunk and pending:
+                parts += [pending, "\n"]
+            for line, end in zip(parts[0::2], parts[1::2]):
+                if not line:
+                    # "\r\n" ends a redrawn line for good
+                    redraw = redraw and end == "\r"
+                    continue
+                if redraw and tail:
+                    tail[-1] = line
+                else:
+                    tail.append(line)
+                redraw = end == "\r"
+
+                stages.feed(line)
+                kind = classify_boltz_output_line(line)
+                # OOM takes precedence over any other signature
+                if kind == "oom" or (kind and failure is None):
+                    failure = kind
+            if not chunk:
+                break
+
+    await asyncio.gather(
+        consume(process.stdout, stdout_tail),
+        consume(process.stderr, stderr_tail),
+    )
+    returncode = await process.wait()
+
+    return {
+        "returncode": returncode,
+        "failure": failure,
+        "stdout": "\n".join(stdout_tail),
+        "stderr": "\n".join(stderr_tail),
+        "stages": stages.finish(),
+    }
+
+
+async def _plan_oom_retry(
+    job_id: str,
+    settings: Dict[str, Any],
+    device_pool: Optional[List[int]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Decide how to retry after an out-of-memory failure.
+
+    Prefers moving to GPUs with more free memory, but only to GPUs this
+    process may hand over: free in the fair-share scheduler and, on a
+    worker agent, taken from its free pool. The job's reservation moves
+    with it. If no better GPU is available, falls back to the next
+    memory-saving setting:
+    1. --max_parallel_samples 1
+    2. diffusion_samples = 1 (the job completes with a warning about the
+       missing samples, see run_boltz_inference)
+
+    Args:
+        job_id: Job ID (holds its GPUs in gpu_scheduler)
+        settings: Settings of the failed attempt (modified copy is returned)
+        device_pool: Free GPU IDs the job may move to; the GPUs it leaves
+                     are added back (None = any GPU of local_gpu_ids())
+
+    Returns:
+        Settings for the next attempt, or None if nothing is left to degrade
+    """
+    devices = settings["devices"]
+    # nvidia-smi blocks for a while; keep it off the event loop
+    free_memory = await asyncio.to_thread(query_gpu_free_memory)
+    if free_memory:
+        if device_pool is not None:
+            allowed = set(device_pool)
+        else:
+            allowed = set(await asyncio.to_thread(local_gpu_ids))
+        current_free = min(free_memory.get(d, 0) for d in devices)
+        candidates = sorted(
+            (
+                d for d in free_memory
+                if d not in devices and d in allowed and gpu_scheduler.can_hand_over(d)
+            ),
+            key=lambda d: free_memory[d],
+            reverse=True,
+        )[:len(devices)]
+        if (
+            len(candidates) == len(devices)
+            and min(free_memory[d] for d in candidates) > current_free
+            and gpu_scheduler.move(job_id, candidates)
+        ):
+            if device_pool is not None:
+                for device in candidates:
+                    device_pool.remove(device)
+                device_pool.extend(devices)
+            jobs[job_id]["devices"] = candidates
+            return {**settings, "devices": candidates, "change": f"moved to GPU(s) {candidates}"}
+
+    if settings.get("max_parallel_samples") != 1 and settings["diffusion_samples"] > 1:
+        return {**settings, "max_parallel_samples": 1, "change": "max_parallel_samples=1"}
+
+    if settings["diffusion_samples"] > 1:
+        return {**settings, "diffusion_samples": 1, "change": "diffusion_samples=1"}
+
+    return None
+
+
 async def run_boltz_inference(
     input_path: Path,
     output_dir: Path,
@@ -164,7 +1130,11 @@ async def run_boltz_inference(
     devices: List[int] = [0],
     recycling_steps: int = 3,
     sampling_steps: int = 200,
-    diffusion_samples: int = 1
+    diffusion_samples: int = 1,
+    seed: Optional[int] = None,
+    job_output_dir: Optional[Path] = None,
+    device_pool: Optional[List[int]] = None,
+    mark_completed: bool = True,
 ) -> Path:
     """
     Run Boltz inference asynchronously.
@@ -172,6 +1142,16 @@ async def run_boltz_inference(
     This is the core function that actually runs protein structure prediction.
     It calls the Boltz command-line tool as a subprocess.
 
+    Failed attempts are retried automatically with a bounded exponential
+    backoff (up to MAX_INFERENCE_ATTEMPTS):
+    - CUDA out of memory: retry on a GPU with more free memory, or with
+      reduced memory settings (see _plan_oom_retry)
+    - Transient errors (MSA server/network hiccups, busy GPU): retry unchanged
+    Every attempt is recorded in jobs[job_id]["attempts"].
+
+    The time spent queued, each attempt (split into the Boltz stages seen
+    in its output) and each retry backoff are recorded as trace spans.
+
     Args:
         input_path: Path to input PDB or FASTA file
         output_dir: Directory to save outputs
@@ -180,92 +1160,1145 @@ async def run_boltz_inference(
         recycling_steps: Number of recycling iterations (improves accuracy)
         sampling_steps: Diffusion sampling steps (more = better quality, slower)
         diffusion_samples: Number of samples to generate
+        seed: Optional random seed passed to Boltz
+        job_output_dir: Boltz output directory (default: output_dir/job_id)
+        device_pool: Free GPUs an OOM retry may move to (a worker's free
+                     list, see _plan_oom_retry); jobs[job_id]["devices"]
+                     holds the GPUs the job ends up on
+        mark_completed: Set the status to "completed" on success; False
+                        when the caller still has work to do first
+
+    Returns:
+        Path to main output CIF file
+
+    Raises:
+        RuntimeError: If Boltz execution fails
+    """
+    # Jobs submitted during startup wait for the weights (status stays "queued")
+    if not models_ready.is_set():
+        await asyncio.to_thread(models_ready.wait)
+
+    # Create output directory for this specific job
+    if job_output_dir is None:
+        job_output_dir = output_dir / job_id
+    job_output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Wait for the GPUs, in fair-share order across clients (status stays "queued")
+    client = jobs[job_id].get("client", LOCAL_CLIENT)
+    await gpu_scheduler.acquire(job_id, client, client_registry.policy(client), devices)
+    job_tracer.record(job_id, "queue", parse_timestamp(jobs[job_id]["created_at"]), devices=devices)
+
+    # Update job status to "running"
+    set_job_status(job_id, "running")
+    jobs[job_id]["started_at"] = datetime.now().isoformat()
+    jobs[job_id]["attempts"] = []
+    # A sample set top-up already recorded the job's total
+    jobs[job_id].setdefault("samples_requested", diffusion_samples)
+
+    # Settings for the current attempt; degraded on OOM
+    settings: Dict[str, Any] = {
+        "devices": list(devices),
+        "diffusion_samples": diffusion_samples,
+        "max_parallel_samples": None,
+    }
+
+    try:
+        for attempt_number in range(1, MAX_INFERENCE_ATTEMPTS + 1):
+            cmd = build_boltz_command(
+                input_path=input_path,
+                job_output_dir=job_output_dir,
+                devices=settings["devices"],
+                recycling_steps=recycling_steps,
+                sampling_steps=sampling_steps,
+                diffusion_samples=settings["diffusion_samples"],
+                max_parallel_samples=settings["max_parallel_samples"],
+                seed=seed,
+            )
+
+            attempt_started = datetime.now().isoformat()
+            with job_tracer.span(
+                job_id, "boltz_attempt", attempt=attempt_number,
+                devices=settings["devices"], diffusion_samples=settings["diffusion_samples"],
+            ) as attempt_span:
+                result = await _run_boltz_attempt(cmd, settings["devices"])
+                attempt_span["attributes"]["returncode"] = result["returncode"]
+            for stage in result["stages"]:
+                job_tracer.record(
+                    job_id, stage["name"], stage["start"], stage["end"],
+                    parent=attempt_span["span_id"], track="boltz",
+                )
+
+            # Store stdout/stderr tails in job info for debugging
+            jobs[job_id]["stdout"] = result["stdout"]
+            jobs[job_id]["stderr"] = result["stderr"]
+
+            # Find the output CIF file
+            # Boltz typically outputs: <job_output_dir>/predictions/<name>.cif
+            # We look for any .cif file in the output directory
+            cif_files = list(job_output_dir.glob("**/*.cif"))
+
+            failure = result["failure"]
+            if failure is None and result["returncode"] != 0:
+                failure = "error"
+            if failure is None and not cif_files:
+                failure = "no_output"
+
+            attempt_record = {
+                "attempt": attempt_number,
+                "started_at": attempt_started,
+                "finished_at": datetime.now().isoformat(),
+                "devices": settings["devices"],
+                "diffusion_samples": settings["diffusion_samples"],
+                "max_parallel_samples": settings["max_parallel_samples"],
+                "returncode": result["returncode"],
+                "outcome": failure or "success",
+            }
+            if "change" in settings:
+                attempt_record["change"] = settings["change"]
+            jobs[job_id]["attempts"].append(attempt_record)
+
+            if failure is None:
+                # Take the first CIF file (or could implement selection logic)
+                output_cif = cif_files[0]
+
+                # The last OOM fallback computes fewer samples than asked for
+                jobs[job_id]["samples_computed"] = settings["diffusion_samples"]
+                if settings["diffusion_samples"] < diffusion_samples:
+                    add_job_warning(
+                        job_id,
+                        f"Out of GPU memory: computed {settings['diffusion_samples']} "
+                        f"of {diffusion_samples} diffusion samples",
+                    )
+
+                # Record the output before the status, so anyone who sees
+                # "completed" also sees where the structure is
+                jobs[job_id]["output_path"] = str(output_cif)
+                jobs[job_id]["completed_at"] = datetime.now().isoformat()
+                if mark_completed:
+                    set_job_status(job_id, "completed")
+
+                return output_cif
+
+            # Decide whether (and how) to retry
+            next_settings = None
+            if failure == "oom":
+                next_settings = await _plan_oom_retry(job_id, settings, device_pool)
+            elif failure == "transient":
+                next_settings = {k: v for k, v in settings.items() if k != "change"}
+
+            if next_settings is None or attempt_number == MAX_INFERENCE_ATTEMPTS:
+                if failure == "no_output":
+                    # List what files were actually created for debugging
+                    all_files = list(job_output_dir.glob("**/*"))
+                    files_list = "\n".join([str(f.relative_to(job_output_dir)) for f in all_files if f.is_file()])
+                    error_msg = f"No CIF output file found after prediction.\nSearched in: {job_output_dir}\nFiles found:\n{files_list}\nSTDOUT: {result['stdout']}\nSTDERR: {result['stderr']}"
+                else:
+                    error_msg = f"Boltz attempt {attempt_number} failed ({failure}, return code {result['returncode']})\nSTDERR: {result['stderr']}\nSTDOUT: {result['stdout']}"
+                raise RuntimeError(error_msg)
+
+            # Bounded exponential backoff before the next attempt
+            delay = min(RETRY_BACKOFF_SECONDS * (2 ** (attempt_number - 1)), RETRY_BACKOFF_MAX_SECONDS)
+            set_job_status(job_id, "retrying")
+            jobs[job_id]["retry_reason"] = failure
+            with job_tracer.span(job_id, "retry_backoff", reason=failure):
+                await asyncio.sleep(delay)
+            set_job_status(job_id, "running")
+            settings = next_settings
+
+        # Unreachable: the loop either returns or raises on its last attempt
+        raise RuntimeError("Boltz retry loop exited unexpectedly")
+
+    except Exception as e:
+        # Update job status to failed on any exception
+        set_job_status(job_id, "failed")
+        jobs[job_id]["error"] = str(e)
+        raise
+
+    finally:
+        release_gpus(job_id, client)
+
+
+def release_gpus(job_id: str, client: str) -> None:
+    """
+    Give a job's GPUs back to the fair-share scheduler and bill the client.
+
+    Args:
+        job_id: Job ID
+        client: Client the job belongs to
+    """
+    gpu_seconds = gpu_scheduler.release(job_id)
+    jobs[job_id]["gpu_seconds"] = round(jobs[job_id].get("gpu_seconds", 0.0) + gpu_seconds, 1)
+    persist_job(job_id)
+    record_usage(client, gpu_seconds=gpu_seconds)
+
+
+async def _wait_for_remote_job(worker: Dict[str, Any], job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Poll a worker until a job it runs completes or fails.
+
+    Short network errors are tolerated. The job is given up on (and
+    re-placed by the caller) when:
+    - the worker stops sending heartbeats
+    - the worker answers 404, e.g. it restarted and lost the job while
+      still sending heartbeats
+    - the worker has not reported the job for REMOTE_JOB_LOST_SECONDS
+
+    Args:
+        worker: Worker record from the registry
+        job_id: Job ID
+
+    Returns:
+        Final worker-side job record, or None if the worker died or lost the job
+    """
+    last_reported = time.monotonic()
+    while True:
+        await asyncio.sleep(CLUSTER_POLL_SECONDS)
+
+        if not worker_registry.is_alive(worker["worker_id"]):
+            return None
+
+        try:
+            remote = await get_remote_job(worker["url"], CLUSTER_TOKEN, job_id)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            if time.monotonic() - last_reported > REMOTE_JOB_LOST_SECONDS:
+                return None
+            continue
+        except httpx.HTTPError:
+            if time.monotonic() - last_reported > REMOTE_JOB_LOST_SECONDS:
+                return None
+            continue
+        last_reported = time.monotonic()
+
+        # Mirror retry progress so check_job_status reflects it
+        set_job_status(job_id, "retrying" if remote.get("status") == "retrying" else "running")
+        jobs[job_id]["attempts"] = remote.get("attempts", [])
+
+        if remote.get("status") in ("completed", "failed"):
+            return remote
+
+
+async def run_remote_inference(
+    input_path: Path,
+    output_dir: Path,
+    job_id: str,
+    devices: List[int] = [0],
+    recycling_steps: int = 3,
+    sampling_steps: int = 200,
+    diffusion_samples: int = 1,
+    seed: Optional[int] = None,
+    mark_completed: bool = True,
+) -> Path:
+    """
+    Run Boltz inference on a worker agent (coordinator mode).
+
+    The job stays "queued" until some live worker has a free slot, is then
+    placed on the least loaded worker, and its outputs are pulled back into
+    output_dir/job_id once it finishes. If the worker stops sending
+    heartbeats mid-job, the job is re-placed on another worker.
+
+    Args:
+        input_path: Path to input PDB or FASTA file
+        output_dir: Directory to save outputs
+        job_id: Unique job identifier
+        devices: Requested GPUs; only the count is used, the worker picks the IDs
+        recycling_steps: Number of recycling iterations
+        sampling_steps: Diffusion sampling steps
+        diffusion_samples: Number of samples to generate
+        seed: Optional random seed passed to Boltz
+
+    Returns:
+        Path to main output CIF file (local copy)
+
+    Raises:
+        RuntimeError: If the job fails on the worker or cannot be placed
+    """
+    content_base64 = base64.b64encode(input_path.read_bytes()).decode("utf-8")
+    params = {
+        "num_devices": len(devices),
+        "recycling_steps": recycling_steps,
+        "sampling_steps": sampling_steps,
+        "diffusion_samples": diffusion_samples,
+        "seed": seed,
+    }
+    jobs[job_id]["dispatch_attempts"] = []
+
+    # Wait for a share of the cluster's GPUs, in fair-share order across
+    # clients; capacity changes as workers come and go, so re-check regularly
+    client = jobs[job_id].get("client", LOCAL_CLIENT)
+    await gpu_scheduler.acquire(
+        job_id, client, client_registry.policy(client), devices=[],
+        units=len(devices), poll_seconds=CLUSTER_POLL_SECONDS,
+    )
+    job_tracer.record(job_id, "queue", parse_timestamp(jobs[job_id]["created_at"]), gpus=len(devices))
+
+    try:
+        while len(jobs[job_id]["dispatch_attempts"]) < MAX_DISPATCH_ATTEMPTS:
+            # Wait until a live worker has a free slot
+            worker = worker_registry.choose()
+            while worker is None:
+                await asyncio.sleep(CLUSTER_POLL_SECONDS)
+                worker = worker_registry.choose()
+
+            worker_id = worker["worker_id"]
+            worker_registry.assign(worker_id, job_id)
+            try:
+                try:
+                    await submit_remote_job(
+                        worker["url"], CLUSTER_TOKEN, job_id, input_path.name, content_base64, params
+                    )
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 409:
+                        # Worker filled up since its last heartbeat; place again
+                        await asyncio.sleep(CLUSTER_POLL_SECONDS)
+                        continue
+                    raise
+
+                dispatch_record = {
+                    "worker_id": worker_id,
+                    "dispatched_at": datetime.now().isoformat(),
+                }
+                jobs[job_id]["dispatch_attempts"].append(dispatch_record)
+                jobs[job_id]["worker_id"] = worker_id
+                set_job_status(job_id, "running")
+                jobs[job_id].setdefault("started_at", datetime.now().isoformat())
+
+                with job_tracer.span(job_id, "remote_run", worker_id=worker_id):
+                    remote = await _wait_for_remote_job(worker, job_id)
+            except httpx.HTTPError as e:
+                jobs[job_id]["dispatch_attempts"].append({
+                    "worker_id": worker_id,
+                    "dispatched_at": datetime.now().isoformat(),
+                    "outcome": f"dispatch error: {e}",
+                })
+                continue
+            finally:
+                worker_registry.release(worker_id, job_id)
+
+            if remote is None:
+                # Worker died or lost the job: put the job back in the queue
+                dispatch_record["outcome"] = "worker lost"
+                set_job_status(job_id, "queued")
+                continue
+
+            dispatch_record["outcome"] = remote["status"]
+            jobs[job_id]["stdout"] = remote.get("stdout", "")
+            jobs[job_id]["stderr"] = remote.get("stderr", "")
+            for key in ("samples_requested", "samples_computed"):
+                if key in remote:
+                    jobs[job_id][key] = remote[key]
+            for warning in remote.get("warnings", []):
+                add_job_warning(job_id, warning)
+            # Spans the worker recorded (its queue, attempts and Boltz stages);
+            # their timestamps come from the worker's clock
+            job_tracer.import_spans(job_id, remote.get("trace", []), worker_id=worker_id)
+
+            if remote["status"] == "failed":
+                raise RuntimeError(f"Job failed on worker {worker_id}: {remote.get('error')}")
+
+            # Pull the outputs back so results are served from this host
+            job_output_dir = output_dir / job_id
+            with job_tracer.span(job_id, "fetch_outputs", worker_id=worker_id):
+                await _fetch_outputs_with_retry(worker, job_id, job_output_dir)
+            # The path comes from the worker: it must stay inside the job directory
+            output_cif = resolve_output_path(job_output_dir, remote.get("output_relpath"))
+
+            jobs[job_id]["output_path"] = str(output_cif)
+            jobs[job_id]["completed_at"] = datetime.now().isoformat()
+            if mark_completed:
+                set_job_status(job_id, "completed")
+            return output_cif
+
+        raise RuntimeError(f"Job could not be completed after {MAX_DISPATCH_ATTEMPTS} dispatch attempts")
+
+    except Exception as e:
+        set_job_status(job_id, "failed")
+        jobs[job_id]["error"] = str(e)
+        raise
+
+    finally:
+        release_gpus(job_id, client)
+
+
+async def _fetch_outputs_with_retry(worker: Dict[str, Any], job_id: str, job_output_dir: Path) -> None:
+    """
+    Pull a finished job's outputs from its worker, retrying transient errors.
+
+    The job already finished on the worker, so a network hiccup or a
+    5xx answer is retried with the same bounded exponential backoff as
+    Boltz attempts before the job is failed.
+
+    Args:
+        worker: Worker record (see WorkerRegistry)
+        job_id: Job ID
+        job_output_dir: Local directory to unpack the outputs into
+
+    Raises:
+        httpx.HTTPError: If the last attempt fails, or on a 4xx answer
+        ValueError: If the archive contains unsafe paths
+    """
+    for attempt_number in range(1, FETCH_OUTPUTS_ATTEMPTS + 1):
+        try:
+            await fetch_remote_outputs(worker["url"], CLUSTER_TOKEN, job_id, job_output_dir)
+            return
+        except httpx.HTTPError as e:
+            if isinstance(e, httpx.HTTPStatusError):
+                transient = e.response.status_code >= 500
+                reason = f"HTTP {e.response.status_code}"
+            else:
+                transient = True
+                reason = str(e) or type(e).__name__
+            if not transient or attempt_number == FETCH_OUTPUTS_ATTEMPTS:
+                raise
+            delay = min(RETRY_BACKOFF_SECONDS * (2 ** (attempt_number - 1)), RETRY_BACKOFF_MAX_SECONDS)
+            print(f"[cluster] Fetching outputs of job {job_id} failed ({reason}); "
+                  f"retrying in {delay:g}s", file=sys.stderr)
+            await asyncio.sleep(delay)
+
+
+async def run_sampled_inference(
+    input_path: Path,
+    output_dir: Path,
+    job_id: str,
+    devices: List[int] = [0],
+    recycling_steps: int = 3,
+    sampling_steps: int = 200,
+    diffusion_samples: int = 1,
+    seed: Optional[int] = None,
+    mark_completed: bool = True,
+) -> Path:
+    """
+    Run Boltz inference through a sample set, computing only missing samples.
+
+    All samples for the same input content and parameters (except the
+    sample count) live in one sample set (see sample_sets.py). A request
+    for N samples:
+    - returns immediately if the set already has N samples
+    - otherwise runs Boltz for just the missing samples, with the seed
+      offset by the number of existing samples, reusing the first run's
+      MSA and processed features, and merges them into the ranked manifest
+
+    Args:
+        input_path: Path to input PDB or FASTA file
+        output_dir: Directory to save outputs (sample sets live below it)
+        job_id: Unique job identifier
+        devices: List of GPU device IDs to use
+        recycling_steps: Number of recycling iterations
+        sampling_steps: Diffusion sampling steps
+        diffusion_samples: Number of samples wanted in total
+        seed: Base random seed of the sample set (default: 0)
+        mark_completed: Set the status to "completed" on success; False
+                        when the caller still has work to do first
+
+    Returns:
+        Path to the best-ranked CIF file of the sample set
+
+    Raises:
+        RuntimeError: If Boltz execution fails
+    """
+    base_seed = seed if seed is not None else 0
+    params = {
+        "recycling_steps": recycling_steps,
+        "sampling_steps": sampling_steps,
+        "seed": base_seed,
+    }
+
+    try:
+        fingerprint = sample_set_fingerprint(input_path, params)
+        sample_dir = output_dir / SAMPLE_SET_DIR.name / fingerprint
+        jobs[job_id]["sample_set"] = fingerprint
+        jobs[job_id]["sample_set_dir"] = str(sample_dir)
+        jobs[job_id]["samples_requested"] = diffusion_samples
+
+        lock = sample_set_locks.setdefault(fingerprint, asyncio.Lock())
+        lock_started = time.time()
+        async with lock:
+            # Time spent behind other jobs computing the same sample set
+            job_tracer.record(job_id, "sample_set_lock", lock_started, sample_set=fingerprint)
+            manifest = load_manifest(sample_dir)
+            if manifest is None:
+                manifest = create_sample_set(sample_dir, input_path, fingerprint, params, base_seed)
+
+            existing = len(manifest["samples"])
+            missing = diffusion_samples - existing
+
+            if missing > 0:
+                run_dir = sample_dir / f"run_{len(manifest['runs'])}"
+                if manifest["runs"]:
+                    # Top-up: start from the first run's MSA and features
+                    jobs[job_id]["reused_intermediates"] = prepare_topup_run(sample_dir, manifest, run_dir)
+
+                run_seed = base_seed + existing
+                await run_boltz_inference(
+                    input_path=sample_dir / manifest["input"],
+                    output_dir=output_dir,
+                    job_id=job_id,
+                    devices=devices,
+                    recycling_steps=recycling_steps,
+                    sampling_steps=sampling_steps,
+                    diffusion_samples=missing,
+                    seed=run_seed,
+                    job_output_dir=run_dir,
+                    # The job is not done until the samples are merged
+                    mark_completed=False,
+                )
+                with job_tracer.span(job_id, "merge_samples", samples=missing):
+                    computed = merge_run(sample_dir, manifest, run_dir, run_seed)
+            else:
+                # Everything requested already exists
+                computed = 0
+                jobs[job_id]["started_at"] = datetime.now().isoformat()
+
+        # Snapshot this job's ranking: later top-ups re-rank the shared
+        # manifest, but this job's rank=1 must keep pointing at the same file
+        jobs[job_id]["samples"] = snapshot_samples(sample_dir, manifest, diffusion_samples)
+        best_cif = Path(jobs[job_id]["samples"][0]["cif"])
+        jobs[job_id]["samples_computed"] = computed
+        jobs[job_id]["samples_available"] = len(manifest["samples"])
+        if len(jobs[job_id]["samples"]) < diffusion_samples:
+            # An OOM fallback computed fewer samples; the set keeps what was
+            # made, so the same request again only computes the rest
+            add_job_warning(
+                job_id,
+                f"Only {len(jobs[job_id]['samples'])} of {diffusion_samples} requested samples "
+                f"are available; submit the same request again to compute the rest",
+            )
+        jobs[job_id]["output_path"] = str(best_cif)
+        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        if mark_completed:
+            set_job_status(job_id, "completed")
+        return best_cif
+
+    except Exception as e:
+        set_job_status(job_id, "failed")
+        jobs[job_id]["error"] = str(e)
+        raise
+
+
+def snapshot_samples(sample_dir: Path, manifest: Dict[str, Any], count: int) -> List[Dict[str, Any]]:
+    """
+    The best `count` samples of a sample set, as stored on a job record.
+
+    Args:
+        sample_dir: Sample set directory
+        manifest: Current manifest (ranked, best first)
+        count: Number of samples the job asked for
+
+    Returns:
+        List of {rank, cif (absolute path), confidence_score, seed}, best first
+    """
+    return [
+        {
+            "rank": rank,
+            "cif": str(sample_dir / sample["cif"]),
+            "confidence_score": sample.get("confidence_score"),
+            "seed": sample.get("seed"),
+        }
+        for rank, sample in enumerate(manifest["samples"][:count], start=1)
+    ]
+
+
+def job_samples(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Ranked samples of a completed job.
+
+    This is the snapshot taken when the job completed, so ranks stay
+    stable when other jobs top up the same sample set.
+
+    Args:
+        job: Job record
+
+    Returns:
+        The job's samples, best first (empty for jobs without a sample set)
+    """
+    if job.get("samples"):
+        return job["samples"]
+    if not job.get("sample_set_dir"):
+        return []
+
+    # Jobs stored before snapshots existed: rank the current manifest,
+    # limited to what the job asked for
+    sample_dir = Path(job["sample_set_dir"])
+    manifest = load_manifest(sample_dir)
+    if manifest is None:
+        return []
+    return snapshot_samples(sample_dir, manifest, job.get("samples_requested", len(manifest["samples"])))
+
+
+def job_sample_path(job: Dict[str, Any], rank: int) -> Path:
+    """
+    CIF file of a completed job's sample at the given rank.
+
+    Args:
+        job: Job record
+        rank: Confidence rank (1 = best)
+
+    Returns:
+        Path to the sample's CIF file
+
+    Raises:
+        ValueError: If the job has no sample at that rank
+    """
+    samples = job_samples(job)
+    if not samples:
+        if rank != 1:
+            raise ValueError("rank must be 1 for this job")
+        return Path(job["output_path"])
+    if not 1 <= rank <= len(samples):
+        raise ValueError(f"rank must be between 1 and {len(samples)}")
+    return Path(samples[rank - 1]["cif"])
+
+
+# ============================================================================
+# PREDICTION SUMMARIES
+# ============================================================================
+
+def reference_structure(job: Dict[str, Any]) -> Optional[Path]:
+    """
+    Reference structure to compare a job's predictions against.
+
+    Only jobs submitted as a PDB file have one (the uploaded structure).
+
+    Args:
+        job: Job record
+
+    Returns:
+        Path to the uploaded PDB, or None
+    """
+    input_path = Path(job.get("input_path", ""))
+    if input_path.suffix.lower() == ".pdb" and input_path.exists():
+        return input_path
+    return None
+
+
+def load_prediction_summary(cif_path: Path, reference_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Get the summary of a predicted structure, computing it at most once.
+
+    Summaries are cached on disk as <name>.summary.json next to the CIF,
+    so every job that shares a sample set also shares its summaries.
+
+    Args:
+        cif_path: Predicted structure
+        reference_path: Optional reference for RMSD/TM-score
+
+    Returns:
+        Summary dictionary (see structure_summary.summarize_prediction)
+    """
+    summary_path = cif_path.with_name(f"{cif_path.stem}.summary.json")
+    if summary_path.exists():
+        with open(summary_path) as f:
+            summary = json.load(f)
+        # A cached summary without a reference section is recomputed once
+        # a job that has a reference asks for it
+        if reference_path is None or "reference" in summary:
+            return summary
+
+    summary = summarize_prediction(cif_path, reference_path)
+
+    # Write atomically so concurrent readers never see a partial file
+    tmp_path = summary_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, summary_path)
+    return summary
+
+
+async def attach_summary(job_id: str, cif_path: Path) -> None:
+    """
+    Summarize a finished job's best structure and store it on the job.
+
+    Runs in a worker thread so the event loop keeps serving requests.
+    A failure here never fails the job; it is recorded as summary_error.
+
+    Args:
+        job_id: Job ID
+        cif_path: Best-ranked predicted structure
+    """
+    try:
+        with job_tracer.span(job_id, "summarize"):
+            jobs[job_id]["summary"] = await asyncio.to_thread(
+                load_prediction_summary, cif_path, reference_structure(jobs[job_id])
+            )
+        # Remember which file the summary belongs to (see get_prediction_summary)
+        jobs[job_id]["summary_cif"] = str(cif_path)
+    except Exception as e:
+        jobs[job_id]["summary_error"] = str(e)
+
+
+async def dispatch_inference(**kwargs) -> Path:
+    """
+    Run a job locally (through its sample set) or on a worker, depending
+    on BOLTZ_ROLE.
+
+    The job only becomes "completed" once its best structure is
+    summarized, so clients that see the status (or are woken by it) can
+    fetch the output and the summary right away.
+
+    Args:
+        **kwargs: Arguments of run_boltz_inference()
+
+    Returns:
+        Path to main output CIF file
+    """
+    try:
+        if BOLTZ_ROLE == "coordinator":
+            output_cif = await run_remote_inference(**kwargs, mark_completed=False)
+        else:
+            output_cif = await run_sampled_inference(**kwargs, mark_completed=False)
+        await attach_summary(kwargs["job_id"], output_cif)
+        set_job_status(kwargs["job_id"], "completed")
+        return output_cif
+    finally:
+        job = jobs[kwargs["job_id"]]
+        outcome = "jobs_completed" if job["status"] == "completed" else "jobs_failed"
+        record_usage(job.get("client", LOCAL_CLIENT), **{outcome: 1})
+        persist_job(kwargs["job_id"])
+        if job_store is not None:
+            job_store.finish(kwargs["job_id"])
+        notify_job_finished(kwargs["job_id"])
+
+
+def start_inference(**kwargs) -> None:
+    """
+    Start a job in the background and return immediately.
+
+    In single-process mode the job runs as a task on this event loop. In
+    multi-process mode it is queued in the shared store and run by the
+    leader process, which may be a different process.
+
+    Args:
+        **kwargs: Arguments of dispatch_inference()
+    """
+    if job_store is None:
+        # Runs the coroutine in the background (see start_background_task)
+        start_background_task(dispatch_inference(**kwargs))
+        return
+    # Paths are stored as strings (see run_claimed_jobs)
+    params = {key: str(value) if isinstance(value, Path) else value for key, value in kwargs.items()}
+    job_store.enqueue(kwargs["job_id"], params)
+
+
+# ============================================================================
+# STARTUP PREPARATION - Weights, warm-up and readiness
+# ============================================================================
+
+def local_gpu_ids() -> List[int]:
+    """
+    GPU IDs this host runs Boltz on.
+
+    Uses CUDA_VISIBLE_DEVICES if set, else every GPU nvidia-smi reports,
+    else GPU 0.
+    """
+    visible = os.getenv("CUDA_VISIBLE_DEVICES")
+    if visible:
+        return [int(g) for g in visible.split(",") if g.strip().isdigit()]
+    return sorted(query_gpu_free_memory()) or [0]
+
+
+async def warm_up_gpus(gpus: List[int]) -> Dict[str, Any]:
+    """
+    Run one tiny prediction per GPU, all GPUs in parallel.
+
+    Each Boltz run starts a fresh process, so this does not keep a model
+    resident; it loads the checkpoint (filling the page cache), builds
+    on-disk kernel caches and proves every GPU can run Boltz before the
+    first real job arrives.
+
+    Args:
+        gpus: GPU IDs to warm up
+
+    Returns:
+        {"gpus": {id: {"ok", "seconds", "error"}}, "ok": all succeeded}
+    """
+    warmup_dir = OUTPUT_DIR / "warmup"
+    warmup_dir.mkdir(parents=True, exist_ok=True)
+    input_path = warmup_dir / "warmup.fasta"
+    input_path.write_text(WARMUP_FASTA)
+
+    async def warm_up(gpu: int) -> Dict[str, Any]:
+        gpu_dir = warmup_dir / f"gpu{gpu}"
+        # Boltz skips inputs it already predicted, so start from scratch
+        shutil.rmtree(gpu_dir, ignore_errors=True)
+        cmd = build_boltz_command(
+            input_path, gpu_dir, [gpu],
+            recycling_steps=0, sampling_steps=WARMUP_SAMPLING_STEPS, diffusion_samples=1,
+        )
+        start = datetime.now()
+        result = await _run_boltz_attempt(cmd, [gpu])
+        seconds = round((datetime.now() - start).total_seconds(), 1)
+
+        produced = any(gpu_dir.rglob("*.cif"))
+        if result["returncode"] == 0 and result["failure"] is None and produced:
+            return {"ok": True, "seconds": seconds}
+        error = result["stderr"].splitlines()[-1] if result["stderr"] else "no structure produced"
+        return {"ok": False, "seconds": seconds, "error": error}
+
+    results = await asyncio.gather(*(warm_up(gpu) for gpu in gpus))
+    by_gpu = {str(gpu): result for gpu, result in zip(gpus, results)}
+    return {"gpus": by_gpu, "ok": all(result["ok"] for result in results)}
+
+
+def run_startup_preparation(gpus: List[int]) -> None:
+    """
+    Prefetch/verify weights, warm the page cache and optionally the GPUs.
+
+    Blocking; runs in a background thread so /ready can answer meanwhile.
+    Progress and results are recorded in the readiness dictionary, and
+    models_ready is set at the end whatever the outcome (a failed stage
+    marks the server not ready, but queued jobs still run and Boltz falls
+    back to its own download).
+
+    Args:
+        gpus: GPU IDs to warm up
+    """
+    def log(message: str) -> None:
+        print(f"[startup] {message}", file=sys.stderr)
+
+    stages = readiness["stages"]
+    try:
+        if BOLTZ_ROLE == "coordinator":
+            # Workers run Boltz; they prepare their own weights
+            stages["weights"] = {"status": "skipped", "reason": "coordinator runs no inference"}
+        else:
+            stages["weights"] = {"status": "running"}
+            report = prepare_weights(
+                MODEL_CACHE_DIR,
+                weight_set=BOLTZ_WEIGHTS,
+                verify=VERIFY_WEIGHTS,
+                download=PREFETCH_WEIGHTS,
+                checksum_file=Path(WEIGHT_CHECKSUM_FILE) if WEIGHT_CHECKSUM_FILE else None,
+                log=log,
+            )
+            stages["weights"] = {"status": "done", **report}
+
+            if WARMUP_ENABLED:
+                stages["warmup"] = {"status": "running", "gpus": gpus}
+                log(f"Warm-up prediction on GPUs {gpus}")
+                warmup = asyncio.run(warm_up_gpus(gpus))
+                stages["warmup"] = {"status": "done" if warmup["ok"] else "failed", **warmup}
+                if not warmup["ok"]:
+                    raise RuntimeError("Warm-up prediction failed on some GPUs")
+
+        readiness["state"] = "ready"
+        log("Ready")
+    except Exception as e:
+        for stage in stages.values():
+            if stage.get("status") == "running":
+                stage["status"] = "failed"
+        readiness["state"] = "failed"
+        readiness["error"] = str(e)
+        log(f"[ERROR] Startup preparation failed: {e}")
+    finally:
+        readiness["finished_at"] = datetime.now().isoformat()
+        models_ready.set()
+
+
+def start_startup_preparation(gpus: List[int]) -> threading.Thread:
+    """
+    Mark the server as starting and run run_startup_preparation() in the background.
+
+    Args:
+        gpus: GPU IDs to warm up
+
+    Returns:
+        The background thread
+    """
+    readiness.clear()
+    readiness.update({"state": "starting", "stages": {}, "started_at": datetime.now().isoformat()})
+    models_ready.clear()
+    thread = threading.Thread(target=run_startup_preparation, args=(gpus,), daemon=True)
+    thread.start()
+    return thread
+
+
+@mcp.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    """
+    Readiness probe: 200 once startup preparation succeeded, else 503.
+
+    No auth; the body only describes startup stages (no job data).
+    """
+    state = await store_io(current_readiness)
+    status_code = 200 if state["state"] == "ready" else 503
+    return JSONResponse(state, status_code=status_code)
+
+
+# ============================================================================
+# MULTI-PROCESS SERVING - Several HTTP processes sharing one job store
+# ============================================================================
+
+def current_readiness() -> Dict[str, Any]:
+    """
+    Startup readiness of the process that runs inference.
+
+    In multi-process mode followers report what the leader last published
+    in the shared store.
+
+    Returns:
+        Readiness dictionary ("state", "stages", ...)
+    """
+    if job_store is None or is_leader:
+        return readiness
+    return job_store.get_meta("readiness") or {
+        "state": "starting",
+        "stages": {},
+        "reason": "waiting for a leader process",
+    }
+
+
+async def run_claimed_jobs(owner: str) -> None:
+    """
+    Leader loop: run jobs queued by any process.
+
+    Every LEADER_POLL_SECONDS the leader claims new submissions and starts
+    them exactly like a single-process server would, so GPU scheduling
+    (and, in coordinator mode, worker dispatch) stays in one place. It also
+    replays cluster heartbeats received by other processes and publishes
+    its readiness, worker list, fair-share queues and queue positions for
+    the followers.
+
+    Args:
+        owner: Identifier of this process, recorded on claimed submissions
+    """
+    published_readiness = None
+    published_scheduler = None
+    published_positions = None
+    heartbeats_seen = 0.0
+
+    while True:
+        for job_id, params in await asyncio.to_thread(job_store.claim, owner):
+            record = await asyncio.to_thread(job_store.get_job, job_id)
+            if record is None or record["status"] in TERMINAL_STATUSES:
+                # Finished before a previous leader could drop the submission
+                job_store.finish(job_id)
+                continue
+            jobs[job_id] = record
+            job_index.add(job_id, record)
+            params["input_path"] = Path(params["input_path"])
+            params["output_dir"] = Path(params["output_dir"])
+            start_background_task(dispatch_inference(**params))
+
+        if BOLTZ_ROLE == "coordinator":
+            for payload, received_at in await asyncio.to_thread(job_store.heartbeats_since, heartbeats_seen):
+                worker_registry.heartbeat(payload, received_at=received_at)
+                heartbeats_seen = received_at
+            job_store.set_meta("workers", worker_registry.summary())
+
+        try:
+            snapshot = json.dumps(readiness, default=str)
+        except RuntimeError:
+            # Startup thread changed it mid-serialization; publish next time
+            snapshot = published_readiness
+        if snapshot != published_readiness:
+            job_store.set_meta("readiness", json.loads(snapshot))
+            published_readiness = snapshot
+
+        queues = gpu_scheduler.summary()
+        if queues != published_scheduler:
+            job_store.set_meta("scheduler", queues)
+            published_scheduler = queues
+
+        positions = gpu_scheduler.queue_positions()
+        if positions != published_positions:
+            job_store.set_meta("queue_positions", positions)
+            published_positions = positions
+
+        await asyncio.sleep(LEADER_POLL_SECONDS)
+
+
+async def lead_when_possible() -> None:
+    """
+    Become the leader as soon as no other process holds the leader lock.
+
+    Every HTTP process runs this. The first one to take the lock re-queues
+    jobs a previous leader left unfinished, starts startup preparation and
+    then runs the submission loop for the rest of its life. The others keep
+    retrying, so one of them takes over if the leader process dies.
+    """
+    global is_leader
+
+    lock = try_acquire_leadership(LEADER_LOCK_PATH)
+    while lock is None:
+        await asyncio.sleep(LEADERSHIP_RETRY_SECONDS)
+        lock = try_acquire_leadership(LEADER_LOCK_PATH)
+
+    is_leader = True
+    requeued = await asyncio.to_thread(job_store.requeue_claimed)
+    print(f"[http] Process {os.getpid()} is now the leader "
+          f"({requeued} unfinished job(s) re-queued)", file=sys.stderr)
+    start_startup_preparation(await asyncio.to_thread(local_gpu_ids))
+    try:
+        await run_claimed_jobs(owner=f"pid-{os.getpid()}")
+    finally:
+        lock.close()
+
+
+def create_app():
+    """
+    Build the ASGI app for one HTTP worker process (multi-process mode).
+
+    uvicorn calls this factory once in every worker process. Each process
+    opens the shared job store and competes for leadership; MCP sessions
+    are stateless, so any process can answer any request.
 
     Returns:
-        Path to main output CIF file
+        Starlette app serving /mcp/ and the custom routes
+    """
+    global job_store, is_leader
+    job_store = JobStore(JOB_STORE_PATH)
+    is_leader = False
 
-    Raises:
-        RuntimeError: If Boltz execution fails
+    app = mcp.http_app(stateless_http=True, json_response=True, middleware=http_middleware())
+    mcp_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with mcp_lifespan(app):
+            leadership = asyncio.create_task(lead_when_possible())
+            try:
+                yield
+            finally:
+                leadership.cancel()
+                # Write what is still queued (e.g. the last usage counters)
+                await asyncio.to_thread(job_store.close)
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+# ============================================================================
+# CLUSTER ROUTES - Plain HTTP endpoints used by worker agents
+# ============================================================================
+
+@mcp.custom_route("/cluster/heartbeat", methods=["POST"])
+async def cluster_heartbeat(request: Request) -> JSONResponse:
     """
-    # Update job status to "running"
-    jobs[job_id]["status"] = "running"
-    jobs[job_id]["started_at"] = datetime.now().isoformat()
+    Register a worker agent or refresh its heartbeat.
 
-    # Create output directory for this specific job
-    job_output_dir = output_dir / job_id
-    job_output_dir.mkdir(parents=True, exist_ok=True)
+    Workers POST their state (worker_id, url, capacity, running, free GPUs,
+    free GPU memory) every few seconds. Only accepted in coordinator mode.
+    """
+    if BOLTZ_ROLE != "coordinator":
+        return JSONResponse({"error": "Server is not running in coordinator mode"}, status_code=409)
 
-    # Build Boltz command
-    # This follows the Boltz CLI interface from the GitHub repo
-    cmd = [
-        "boltz",  # Assumes boltz is installed and in PATH (or use full path)
-        "predict",  # Subcommand for running predictions
-        str(input_path),  # Input file path
-        "--out_dir", str(job_output_dir),  # Output directory
-        "--devices", str(len(devices)),  # Number of GPU devices to use
-        "--recycling_steps", str(recycling_steps),  # Number of recycling iterations
-        "--sampling_steps", str(sampling_steps),  # Diffusion steps
-        "--diffusion_samples", str(diffusion_samples),  # How many predictions to generate
-        "--cache", str(MODEL_CACHE_DIR),  # Where to cache model weights
-        "--use_msa_server",  # Auto-generate MSA using mmseqs2 server (required for FASTA without pre-computed MSA)
-    ]
+    # Without a token anyone could register a worker and receive jobs
+    if not CLUSTER_TOKEN:
+        return JSONResponse({"error": "BOLTZ_CLUSTER_TOKEN is not configured on the coordinator"}, status_code=503)
 
-    try:
-        # Run Boltz as subprocess asynchronously
-        # asyncio.create_subprocess_exec runs command without blocking
-        # stdout/stderr=PIPE captures output for logging
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+    if not check_cluster_token(CLUSTER_TOKEN, request.headers.get(CLUSTER_TOKEN_HEADER)):
+        return JSONResponse({"error": "Invalid cluster token"}, status_code=401)
 
-        # Wait for process to complete and get output
-        stdout, stderr = await process.communicate()
-
-        # Decode output for logging
-        stdout_str = stdout.decode('utf-8')
-        stderr_str = stderr.decode('utf-8')
-
-        # Store stdout/stderr in job info for debugging
-        jobs[job_id]["stdout"] = stdout_str
-        jobs[job_id]["stderr"] = stderr_str
-
-        # Check if command succeeded (return code 0 = success)
-        if process.returncode != 0:
-            # Update job status to failed
-            jobs[job_id]["status"] = "failed"
-            jobs[job_id]["error"] = f"Boltz command failed with return code {process.returncode}\nSTDERR: {stderr_str}\nSTDOUT: {stdout_str}"
-            raise RuntimeError(f"Boltz failed: {stderr_str}")
-
-        # Find the output CIF file
-        # Boltz typically outputs: <job_output_dir>/predictions/<name>.cif
-        # We look for any .cif file in the output directory
-        cif_files = list(job_output_dir.glob("**/*.cif"))
-
-        if not cif_files:
-            # List what files were actually created for debugging
-            all_files = list(job_output_dir.glob("**/*"))
-            files_list = "\n".join([str(f.relative_to(job_output_dir)) for f in all_files if f.is_file()])
-            error_msg = f"No CIF output file found after prediction.\nSearched in: {job_output_dir}\nFiles found:\n{files_list}\nSTDOUT: {stdout_str}\nSTDERR: {stderr_str}"
-            jobs[job_id]["error"] = error_msg
-            raise RuntimeError(error_msg)
-
-        # Take the first CIF file (or could implement selection logic)
-        output_cif = cif_files[0]
-
-        # Update job status to completed
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["output_path"] = str(output_cif)
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+    try:
+        info = await request.json()
+        if job_store is None:
+            worker_id = worker_registry.heartbeat(info)["worker_id"]
+        else:
+            # Multi-process mode: the leader replays it into its registry
+            if not isinstance(info, dict) or not info.get("worker_id") or not info.get("url"):
+                raise ValueError("Heartbeat must include worker_id and url")
+            worker_id = info["worker_id"]
+            job_store.put_heartbeat(worker_id, info)
+    except (ValueError, TypeError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    return JSONResponse({"status": "ok", "worker_id": worker_id})
+
+
+def submit_sequence_job(
+    sequence: str,
+    chain_id: str,
+    molecule_type: str,
+    recycling_steps: int,
+    sampling_steps: int,
+    device_list: List[int],
+    callback_url: Optional[str],
+    batch_id: Optional[str],
+    record_id: Optional[str] = None,
+    diffusion_samples: int = 1,
+    seed: int = 0,
+    client: str = LOCAL_CLIENT,
+    trace: Optional[HandlerTrace] = None,
+) -> str:
+    """
+    Write a FASTA input for one normalized sequence and start its job.
 
-        return output_cif
+    Args:
+        sequence: Normalized sequence (see sequence_utils.normalize_sequence)
+        chain_id: Chain identifier
+        molecule_type: "protein", "dna" or "rna"
+        recycling_steps: Boltz recycling iterations
+        sampling_steps: Diffusion sampling steps
+        device_list: GPU device IDs
+        callback_url: Validated webhook URL (or None)
+        batch_id: Batch label (or None)
+        record_id: FASTA record ID the sequence came from (or None)
+        diffusion_samples: Number of samples wanted
+        seed: Base random seed of the sample set
+        client: Client submitting the job
+        trace: Trace of the calling tool (the input write is recorded under it)
 
-    except Exception as e:
-        # Update job status to failed on any exception
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        raise
+    Returns:
+        New job ID
+    """
+    # Create FASTA format file
+    # FASTA format for Boltz (deprecated but still supported):
+    # >CHAIN_ID|ENTITY_TYPE|MSA_PATH
+    # SEQUENCE
+    # For protein without pre-computed MSA (relying on --use_msa_server flag):
+    # >A|protein
+    # SEQUENCE
+    fasta_content = f">{chain_id}|{molecule_type}\n{sequence}\n"
+
+    # Generate filename based on sequence hash
+    seq_hash = generate_job_id(sequence)
+    filename = f"sequence_{seq_hash}.fasta"
+
+    # Encode FASTA content as base64 for save_uploaded_file()
+    fasta_base64 = base64.b64encode(fasta_content.encode('utf-8')).decode('utf-8')
+
+    # Save FASTA file
+    write_started = time.time()
+    input_path = save_uploaded_file(fasta_base64, filename)
+    write_finished = time.time()
+
+    # Generate job ID
+    job_input_id = f"{filename}_{datetime.now().isoformat()}"
+    job_id = generate_job_id(job_input_id)
+
+    # Initialize job tracking
+    register_job(job_id, {
+        "status": "queued",
+        "input_path": str(input_path),
+        "created_at": datetime.now().isoformat(),
+        "filename": filename,
+        "molecule_type": molecule_type,
+        "sequence_length": len(sequence),
+        "sequence_hash": seq_hash,
+        "record_id": record_id,
+        "callback_url": callback_url,
+        "batch_id": batch_id,
+        "client": client,
+    })
+    job_tracer.record(
+        job_id, "write_input", write_started, write_finished,
+        parent=trace.span_id if trace else None, track="handler",
+    )
+
+    # Start inference
+    start_inference(
+        input_path=input_path,
+        output_dir=OUTPUT_DIR,
+        job_id=job_id,
+        devices=device_list,
+        recycling_steps=recycling_steps,
+        sampling_steps=sampling_steps,
+        diffusion_samples=diffusion_samples,
+        seed=seed,
+    )
+
+    return job_id
 
 
 # ============================================================================
@@ -278,7 +2311,11 @@ async def predict_structure_from_pdb(
     filename: str = "input.pdb",
     recycling_steps: int = 3,
     sampling_steps: int = 200,
-    devices: str = "0"
+    devices: str = "0",
+    callback_url: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    diffusion_samples: int = 1,
+    seed: int = 0
 ) -> Dict[str, Any]:
     """
     Predict protein structure from PDB file using Boltz.
@@ -297,16 +2334,35 @@ async def predict_structure_from_pdb(
         recycling_steps: Boltz recycling iterations (default: 3)
         sampling_steps: Diffusion sampling steps (default: 200)
         devices: Comma-separated GPU device IDs (default: "0")
+        callback_url: Optional http(s) URL that receives a POST with the
+                      final job status when the job completes or fails
+        batch_id: Optional label grouping related jobs (filter with list_jobs)
+        diffusion_samples: Number of structure samples (default: 1). Asking
+                           again with more samples and otherwise identical
+                           inputs only computes the missing ones
+        seed: Base random seed (default: 0)
 
     Returns:
         Dictionary with:
         - job_id: Unique identifier for this prediction job
         - status: Current job status ("queued", "running", "completed", "failed")
         - message: Human-readable status message
+        If the client exceeded its submission rate limit, status is
+        "rate_limited" and retry_after gives the seconds to wait.
     """
+    trace = job_tracer.start_handler("predict_structure_from_pdb", upload_bytes=len(pdb_content))
     try:
+        callback_url = await asyncio.to_thread(validate_callback_url, callback_url)
+
+        # Enforce the client's submission rate limit
+        client = current_client()
+        rejection = await check_submission_rate(client, 1)
+        if rejection:
+            return rejection
+
         # Save the uploaded PDB file to disk
-        input_path = save_uploaded_file(pdb_content, filename)
+        with trace.span("decode_upload"):
+            input_path = save_uploaded_file(pdb_content, filename)
 
         # Generate unique job ID from filename and timestamp
         # This ensures each submission gets a unique ID
@@ -314,37 +2370,42 @@ async def predict_structure_from_pdb(
         job_id = generate_job_id(job_input_id)
 
         # Initialize job tracking entry
-        jobs[job_id] = {
+        register_job(job_id, {
             "status": "queued",  # Initial status
             "input_path": str(input_path),
             "created_at": datetime.now().isoformat(),
             "filename": filename,
-        }
+            "callback_url": callback_url,
+            "batch_id": batch_id,
+            "client": client,
+        })
 
         # Parse devices string to list of ints
         # "0,1" -> [0, 1]
         device_list = [int(d.strip()) for d in devices.split(",")]
 
         # Start inference asynchronously
-        # asyncio.create_task runs the coroutine in the background
         # This allows the tool to return immediately while inference runs
-        asyncio.create_task(
-            run_boltz_inference(
-                input_path=input_path,
-                output_dir=OUTPUT_DIR,
-                job_id=job_id,
-                devices=device_list,
-                recycling_steps=recycling_steps,
-                sampling_steps=sampling_steps,
-            )
+        start_inference(
+            input_path=input_path,
+            output_dir=OUTPUT_DIR,
+            job_id=job_id,
+            devices=device_list,
+            recycling_steps=recycling_steps,
+            sampling_steps=sampling_steps,
+            diffusion_samples=diffusion_samples,
+            seed=seed,
         )
+        trace.finish(job_id)
+        # Other HTTP processes must find the job when the client asks next
+        await flush_store()
 
         # Return job information immediately
         # User can poll check_job_status() to monitor progress
         return {
             "job_id": job_id,
             "status": "queued",
-            "message": f"Prediction job started for {filename}. Use check_job_status() to monitor progress.",
+            "message": f"Prediction job started for {filename}. Use wait_for_job() or check_job_status() to monitor progress.",
         }
 
     except Exception as e:
@@ -361,87 +2422,184 @@ async def predict_structure_from_sequence(
     chain_id: str = "A",
     recycling_steps: int = 3,
     sampling_steps: int = 200,
-    devices: str = "0"
+    devices: str = "0",
+    callback_url: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    molecule_type: str = "protein",
+    diffusion_samples: int = 1,
+    seed: int = 0
 ) -> Dict[str, Any]:
     """
-    Predict protein structure from amino acid sequence using Boltz.
+    Predict structure from a protein, DNA or RNA sequence using Boltz.
 
-    This tool accepts a raw amino acid sequence (e.g., "MKTAYIAKQRQ...")
-    and creates a FASTA file for Boltz to process.
+    This tool accepts a raw sequence (e.g., "MKTAYIAKQRQ...")
+    and creates a FASTA file for Boltz to process. Case, whitespace
+    (spaces, tabs, newlines) and a trailing "*" are normalized.
 
     Args:
-        sequence: Amino acid sequence (single letter codes)
+        sequence: Sequence in single-letter codes. Proteins may use the 20
+                  canonical residues plus X, B, Z, J, U, O; DNA uses ACGTN;
+                  RNA uses ACGUN
         chain_id: Chain identifier for the sequence (default: "A")
         recycling_steps: Boltz recycling iterations (default: 3)
         sampling_steps: Diffusion sampling steps (default: 200)
         devices: Comma-separated GPU device IDs (default: "0")
+        callback_url: Optional webhook URL notified on completion
+        batch_id: Optional label grouping related jobs
+        molecule_type: "protein", "dna" or "rna" (default: "protein")
+        diffusion_samples: Number of structure samples (default: 1). Asking
+                           again with more samples and otherwise identical
+                           inputs only computes the missing ones
+        seed: Base random seed (default: 0)
 
     Returns:
-        Dictionary with job_id and status (same as predict_structure_from_pdb)
+        Dictionary with job_id and status (same as predict_structure_from_pdb).
+        On invalid input, "errors" lists each bad position and character.
     """
+    trace = job_tracer.start_handler("predict_structure_from_sequence", sequence_length=len(sequence))
     try:
-        # Validate sequence - should only contain valid amino acid codes
-        valid_aa = set("ACDEFGHIKLMNPQRSTVWY")
-        sequence_upper = sequence.upper().replace(" ", "").replace("\n", "")
-
-        # Check for invalid characters
-        if not all(aa in valid_aa for aa in sequence_upper):
-            return {
-                "error": "Invalid amino acid sequence. Use single-letter codes only.",
-                "status": "failed",
-            }
+        callback_url = await asyncio.to_thread(validate_callback_url, callback_url)
 
-        # Create FASTA format file
-        # FASTA format for Boltz (deprecated but still supported):
-        # >CHAIN_ID|ENTITY_TYPE|MSA_PATH
-        # SEQUENCE
-        # For protein without pre-computed MSA (relying on --use_msa_server flag):
-        # >A|protein
-        # SEQUENCE
-        fasta_content = f">{chain_id}|protein\n{sequence_upper}\n"
+        # Normalize and validate (byte-level, reports every bad position)
+        with trace.span("validate_sequence"):
+            sequence_clean = normalize_sequence(sequence, molecule_type)
 
-        # Generate filename based on sequence hash
-        seq_hash = generate_job_id(sequence_upper)
-        filename = f"sequence_{seq_hash}.fasta"
+        # Parse devices
+        device_list = [int(d.strip()) for d in devices.split(",")]
 
-        # Encode FASTA content as base64 for save_uploaded_file()
-        fasta_base64 = base64.b64encode(fasta_content.encode('utf-8')).decode('utf-8')
+        client = current_client()
+        rejection = await check_submission_rate(client, 1)
+        if rejection:
+            return rejection
+
+        job_id = submit_sequence_job(
+            sequence=sequence_clean,
+            chain_id=chain_id,
+            molecule_type=molecule_type,
+            recycling_steps=recycling_steps,
+            sampling_steps=sampling_steps,
+            device_list=device_list,
+            callback_url=callback_url,
+            batch_id=batch_id,
+            diffusion_samples=diffusion_samples,
+            seed=seed,
+            client=client,
+            trace=trace,
+        )
+        trace.finish(job_id)
+        await flush_store()
 
-        # Save FASTA file
-        input_path = save_uploaded_file(fasta_base64, filename)
+        return {
+            "job_id": job_id,
+            "status": "queued",
+            "message": f"Prediction job started for sequence (length: {len(sequence_clean)}). Use wait_for_job() or check_job_status() to monitor progress.",
+        }
 
-        # Generate job ID
-        job_input_id = f"{filename}_{datetime.now().isoformat()}"
-        job_id = generate_job_id(job_input_id)
+    except SequenceValidationError as e:
+        return {
+            "error": str(e),
+            "errors": e.errors,
+            "status": "failed",
+        }
 
-        # Initialize job tracking
-        jobs[job_id] = {
-            "status": "queued",
-            "input_path": str(input_path),
-            "created_at": datetime.now().isoformat(),
-            "filename": filename,
-            "sequence_length": len(sequence_upper),
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "failed",
         }
 
-        # Parse devices
+
+@mcp.tool()
+async def predict_structures_from_fasta(
+    fasta_content: str,
+    molecule_type: str = "protein",
+    recycling_steps: int = 3,
+    sampling_steps: int = 200,
+    devices: str = "0",
+    callback_url: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    diffusion_samples: int = 1,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Submit one prediction job per record of a (multi-)FASTA file.
+
+    Intended for batch screens. All records are validated before any job
+    is started: if one record is invalid, nothing is submitted and every
+    problem is reported with its record ID and position. Likewise every
+    record counts against the client's submission rate limit, and a batch
+    that does not fit is rejected as a whole (status "rate_limited").
+
+    Args:
+        fasta_content: FASTA text (not base64), one or more ">id ..." records
+        molecule_type: "protein", "dna" or "rna" for every record (default: "protein")
+        recycling_steps: Boltz recycling iterations (default: 3)
+        sampling_steps: Diffusion sampling steps (default: 200)
+        devices: Comma-separated GPU device IDs (default: "0")
+        callback_url: Optional webhook URL notified as each job completes
+        batch_id: Label for the batch (default: generated); use with
+                  list_jobs(batch_id=...) and wait_any()
+        diffusion_samples: Number of structure samples per record (default: 1)
+        seed: Base random seed (default: 0)
+
+    Returns:
+        Dictionary with:
+        - batch_id: Batch label shared by all submitted jobs
+        - jobs: List of {"record_id", "job_id"} in input order
+        - status: "queued" (or "failed" with "errors")
+    """
+    trace = job_tracer.start_handler("predict_structures_from_fasta", upload_bytes=len(fasta_content))
+    try:
+        callback_url = await asyncio.to_thread(validate_callback_url, callback_url)
+
+        with trace.span("parse_fasta"):
+            records = parse_fasta(fasta_content, molecule_type)
+
         device_list = [int(d.strip()) for d in devices.split(",")]
 
-        # Start inference
-        asyncio.create_task(
-            run_boltz_inference(
-                input_path=input_path,
-                output_dir=OUTPUT_DIR,
-                job_id=job_id,
-                devices=device_list,
+        if not batch_id:
+            batch_id = f"batch_{generate_job_id(datetime.now().isoformat())}"
+
+        # The whole batch counts against the rate limit; all or nothing
+        client = current_client()
+        rejection = await check_submission_rate(client, len(records))
+        if rejection:
+            return rejection
+
+        submitted = []
+        for record in records:
+            job_id = submit_sequence_job(
+                sequence=record["sequence"],
+                chain_id="A",
+                molecule_type=molecule_type,
                 recycling_steps=recycling_steps,
                 sampling_steps=sampling_steps,
+                device_list=device_list,
+                callback_url=callback_url,
+                batch_id=batch_id,
+                record_id=record["id"],
+                diffusion_samples=diffusion_samples,
+                seed=seed,
+                client=client,
+                trace=trace,
             )
-        )
+            submitted.append({"record_id": record["id"], "job_id": job_id})
+        # Every job of the batch gets the call's spans
+        trace.finish(*(job["job_id"] for job in submitted), batch_id=batch_id)
+        await flush_store()
 
         return {
-            "job_id": job_id,
+            "batch_id": batch_id,
+            "jobs": submitted,
             "status": "queued",
-            "message": f"Prediction job started for sequence (length: {len(sequence_upper)}). Use check_job_status() to monitor progress.",
+            "message": f"Started {len(submitted)} prediction jobs. Use wait_any() or list_jobs(batch_id=...) to monitor progress.",
+        }
+
+    except SequenceValidationError as e:
+        return {
+            "error": str(e),
+            "errors": e.errors,
+            "status": "failed",
         }
 
     except Exception as e:
@@ -458,9 +2616,13 @@ async def check_job_status(job_id: str) -> Dict[str, Any]:
 
     Returns current status and progress information for a job.
     Possible statuses:
-    - "queued": Job is waiting to start
+    - "queued": Job is waiting to start (queue_position shows its place in
+      the fair-share GPU queue)
     - "running": Job is currently executing
-    - "completed": Job finished successfully
+    - "retrying": An attempt failed (e.g. CUDA OOM) and a retry is pending;
+      see "attempts" for the history
+    - "completed": Job finished successfully ("warnings" lists problems
+      that did not fail it, e.g. fewer diffusion samples than requested)
     - "failed": Job encountered an error
 
     Args:
@@ -469,20 +2631,101 @@ async def check_job_status(job_id: str) -> Dict[str, Any]:
     Returns:
         Dictionary with status, timestamps, and output info (if completed)
     """
-    # Check if job_id exists in our tracking dictionary
-    if job_id not in jobs:
+    # Check if job_id exists in our tracking dictionary (or the shared store)
+    job = await store_io(lookup_job, job_id)
+    if job is None:
         return {
             "error": f"Job ID {job_id} not found",
             "status": "unknown",
         }
 
+    # Place in the fair-share GPU queue (published by the leader for followers)
+    position = await store_io(job_queue_position, job_id) if job["status"] == "queued" else None
+    if position is not None:
+        return {**job, "queue_position": position}
+
     # Return job information
     # This includes all fields we stored in the jobs dictionary
-    return jobs[job_id]
+    return job
+
+
+@mcp.tool()
+async def wait_for_job(job_id: str, timeout: float = WAIT_DEFAULT_SECONDS) -> Dict[str, Any]:
+    """
+    Wait until a job completes or fails, then return its status.
+
+    Prefer this over calling check_job_status() in a loop: the request is
+    held open on the server and returns as soon as the job finishes, so a
+    long prediction costs a handful of requests instead of hundreds.
+
+    Args:
+        job_id: Job ID returned from predict_structure_from_pdb/sequence
+        timeout: Maximum seconds to wait (default: 60, capped at BOLTZ_WAIT_MAX_SECONDS)
+
+    Returns:
+        Same fields as check_job_status(), plus:
+        - timed_out: True if the job was still running when the timeout expired
+    """
+    if await store_io(lookup_job, job_id) is None:
+        return {
+            "error": f"Job ID {job_id} not found",
+            "status": "unknown",
+        }
+
+    timeout = max(0.0, min(timeout, WAIT_MAX_SECONDS))
+    timed_out = not await wait_until_any_finished([job_id], timeout)
+
+    return {**await store_io(lookup_job, job_id), "timed_out": timed_out}
+
+
+@mcp.tool()
+async def wait_any(job_ids: List[str], timeout: float = WAIT_DEFAULT_SECONDS) -> Dict[str, Any]:
+    """
+    Wait until at least one of several jobs completes or fails.
+
+    Useful for batches: call repeatedly with the still-pending job IDs
+    to process results as they arrive.
+
+    Args:
+        job_ids: Job IDs to wait on
+        timeout: Maximum seconds to wait (default: 60, capped at BOLTZ_WAIT_MAX_SECONDS)
+
+    Returns:
+        Dictionary with:
+        - finished: {job_id: status} for every job that is completed/failed
+        - pending: Job IDs still queued or running
+        - unknown: Job IDs that do not exist
+        - timed_out: True if nothing finished before the timeout
+    """
+    statuses = await store_io(job_statuses, job_ids)
+    known = [job_id for job_id in job_ids if job_id in statuses]
+    unknown = [job_id for job_id in job_ids if job_id not in statuses]
+
+    async def snapshot(timed_out: bool) -> Dict[str, Any]:
+        finished = {
+            job_id: status
+            for job_id, status in (await store_io(job_statuses, known)).items()
+            if status in TERMINAL_STATUSES
+        }
+        return {
+            "finished": finished,
+            "pending": [job_id for job_id in known if job_id not in finished],
+            "unknown": unknown,
+            "timed_out": timed_out,
+        }
+
+    # Return immediately if something already finished (or nothing to wait for)
+    if not known or any(statuses[job_id] in TERMINAL_STATUSES for job_id in known):
+        return await snapshot(timed_out=False)
+
+    timeout = max(0.0, min(timeout, WAIT_MAX_SECONDS))
+    finished = await wait_until_any_finished(known, timeout)
+
+    return await snapshot(timed_out=not finished)
 
 
 @mcp.tool()
-async def get_prediction_result(job_id: str) -> Dict[str, Any]:
+async def get_prediction_result(job_id: str, rank: int = 1, format: str = "cif") -> Dict[str, Any]:
     """
     Retrieve the prediction result file for a completed job.
 
@@ -490,24 +2733,46 @@ async def get_prediction_result(job_id: str) -> Dict[str, Any]:
     CIF (Crystallographic Information File) is a standard format for
     protein structures, similar to PDB but more modern.
 
+    Jobs with several diffusion samples rank them by Boltz confidence
+    score; rank=1 is the best sample.
+
+    Large structures can be requested in a compact format instead:
+    - "bcif": BinaryCIF, same content as the CIF (Mol*, Biotite, Gemmi)
+    - "cif.gz": gzip-compressed CIF
+    - "pdb.gz": gzip-compressed PDB (single-character chain IDs only)
+    - "npz": NumPy archive with coordinates, pLDDT and atom labels
+    Each conversion is done once and cached next to the prediction.
+
     Args:
         job_id: Job ID from predict_structure_from_pdb/sequence
+        rank: Which sample to return, by confidence rank (default: 1)
+        format: "cif" (default), "bcif", "cif.gz", "pdb.gz" or "npz"
 
     Returns:
         Dictionary with:
-        - cif_content: Base64-encoded CIF file
+        - cif_content: Base64-encoded CIF file (format "cif")
+        - content: Base64-encoded file in the requested format (other formats)
+        - format: Format of the returned file
         - filename: Suggested filename for saving
         - job_info: Job metadata (timestamps, input info, etc.)
+        - samples: Ranked sample list (rank, confidence_score, seed)
+        - warnings: Problems that did not fail the job, e.g. fewer samples
+          than requested after running out of GPU memory (only if any)
     """
+    if format not in OUTPUT_FORMATS:
+        return {
+            "error": f"Unsupported format '{format}'. Use one of: {', '.join(OUTPUT_FORMATS)}",
+            "status": "error",
+        }
+
     # Check if job exists
-    if job_id not in jobs:
+    job = await store_io(lookup_job, job_id)
+    if job is None:
         return {
             "error": f"Job ID {job_id} not found",
             "status": "unknown",
         }
 
-    job = jobs[job_id]
-
     # Check if job is completed
     if job["status"] != "completed":
         return {
@@ -515,18 +2780,40 @@ async def get_prediction_result(job_id: str) -> Dict[str, Any]:
             "status": job["status"],
         }
 
+    trace = job_tracer.start_handler("get_prediction_result", format=format, rank=rank)
     try:
-        # Load the output CIF file
-        output_path = Path(job["output_path"])
-        cif_content = load_output_file(output_path)
+        # Pick the requested sample from the job's own ranking
+        try:
+            output_path = job_sample_path(job, rank)
+        except ValueError as e:
+            return {"error": str(e), "status": "error"}
+        samples = job_samples(job)
+
+        # Convert (or reuse the cached conversion) off the event loop
+        if format != "cif":
+            with trace.span("convert", format=format):
+                output_path = await asyncio.to_thread(convert_structure, output_path, format)
+
+        # Load the output file
+        with trace.span("encode") as encode_span:
+            content = load_output_file(output_path)
+            encode_span["attributes"]["bytes"] = len(content)
 
         # Return file content and metadata
-        return {
-            "cif_content": cif_content,
+        response = {
+            "cif_content" if format == "cif" else "content": content,
+            "format": format,
             "filename": output_path.name,
             "job_info": job,
+            "samples": [
+                {key: sample.get(key) for key in ("rank", "confidence_score", "seed")}
+                for sample in samples
+            ],
             "status": "success",
         }
+        if job.get("warnings"):
+            response["warnings"] = job["warnings"]
+        return response
 
     except Exception as e:
         return {
@@ -534,46 +2821,297 @@ async def get_prediction_result(job_id: str) -> Dict[str, Any]:
             "status": "error",
         }
 
+    finally:
+        trace.finish(job_id)
+
+
+@mcp.tool()
+async def get_prediction_summary(job_id: str, rank: int = 1) -> Dict[str, Any]:
+    """
+    Get a compact quality summary of a completed prediction.
+
+    Much smaller than get_prediction_result: instead of the whole CIF
+    file it returns only the numbers most clients look at. Ranks are the
+    same as in get_prediction_result. Each sample's summary is computed
+    once (the best one when the job completes) and cached next to its CIF.
+
+    Args:
+        job_id: Job ID from predict_structure_from_pdb/sequence
+        rank: Which sample to summarize, by confidence rank (default: 1)
+
+    Returns:
+        Dictionary with:
+        - summary: confidence_score, ptm, iptm, mean_plddt (0-100),
+          per-chain residues/mean_plddt/ptm, clashes, and for PDB inputs
+          a reference section with CA rmsd and tm_score vs. the input
+        - rank: Sample rank that was summarized
+    """
+    # Check if job exists
+    job = await store_io(lookup_job, job_id)
+    if job is None:
+        return {
+            "error": f"Job ID {job_id} not found",
+            "status": "unknown",
+        }
+
+    # Check if job is completed
+    if job["status"] != "completed":
+        return {
+            "error": f"Job is not completed yet. Current status: {job['status']}",
+            "status": job["status"],
+        }
+
+    trace = job_tracer.start_handler("get_prediction_summary", rank=rank)
+    try:
+        # Resolve the rank exactly like get_prediction_result does
+        try:
+            output_path = job_sample_path(job, rank)
+        except ValueError as e:
+            return {"error": str(e), "status": "error"}
+
+        # The summary stored on the job is only reused for the file it was
+        # computed from; any other sample uses its own cached summary file
+        if job.get("summary") and job.get("summary_cif") == str(output_path):
+            summary = job["summary"]
+        else:
+            with trace.span("summarize", rank=rank):
+                summary = await asyncio.to_thread(
+                    load_prediction_summary, output_path, reference_structure(job)
+                )
+
+        return {
+            "job_id": job_id,
+            "rank": rank,
+            "summary": summary,
+            "status": "success",
+        }
+
+    except Exception as e:
+        return {
+            "error": f"Failed to summarize prediction: {e}",
+            "status": "error",
+        }
+
+    finally:
+        trace.finish(job_id)
+
 
 @mcp.tool()
-async def list_jobs(limit: int = 10) -> Dict[str, Any]:
+async def list_jobs(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    filename: Optional[str] = None,
+    sequence_hash: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
-    List recent prediction jobs with their statuses.
+    List prediction jobs, newest first, with filters and cursor pagination.
 
     Useful for:
     1. Seeing what jobs have been run
     2. Finding job IDs if you forgot them
     3. Monitoring overall system activity
+    4. Collecting the jobs of one batch or one input
+
+    To page through results, pass the returned next_cursor back as cursor
+    (with the same filters) until next_cursor is null.
 
     Args:
-        limit: Maximum number of jobs to return (default: 10)
+        limit: Maximum number of jobs to return (default: 10, max: 1000)
+        cursor: next_cursor from a previous call
+        status: Only jobs with this status; comma-separated for several
+                (e.g. "queued,running")
+        created_after: Only jobs created at or after this ISO timestamp
+        created_before: Only jobs created before this ISO timestamp
+        filename: Only jobs with this input filename
+        sequence_hash: Only sequence jobs with this sequence hash
+        batch_id: Only jobs submitted with this batch_id
+        fields: Job fields to return (default: job_id, status, filename,
+                created_at); job_id is always included
 
     Returns:
-        Dictionary with list of job summaries
+        Dictionary with:
+        - jobs: List of job summaries
+        - next_cursor: Cursor for the next page, or null on the last page
+        - total: Total number of jobs on the server
     """
-    # Sort jobs by creation time (most recent first)
-    # items() returns (job_id, job_dict) tuples
-    # sorted() with key=lambda sorts by created_at timestamp
-    # [::-1] reverses to get newest first
-    sorted_jobs = sorted(
-        jobs.items(),
-        key=lambda x: x[1].get("created_at", ""),
-        reverse=True
-    )[:limit]
+    # Translate filters into {indexed field: accepted values}
+    filters: Dict[str, List[Any]] = {}
+    if status:
+        filters["status"] = [value.strip() for value in status.split(",") if value.strip()]
+    if filename:
+        filters["filename"] = [filename]
+    if sequence_hash:
+        filters["sequence_hash"] = [sequence_hash]
+    if batch_id:
+        filters["batch_id"] = [batch_id]
+
+    # Multi-process mode: the shared store indexes every process's jobs
+    index = job_index if job_store is None else job_store
+    try:
+        job_ids, next_cursor = await store_io(
+            index.query,
+            filters,
+            max(1, min(limit, LIST_JOBS_MAX_LIMIT)),
+            cursor,
+            parse_timestamp(created_after) if created_after else None,
+            parse_timestamp(created_before) if created_before else None,
+        )
+    except ValueError as e:
+        return {
+            "error": str(e),
+            "status": "failed",
+        }
 
-    # Create summary list with essential info only
+    # Project only the requested fields
+    selected_fields = fields or LIST_JOBS_DEFAULT_FIELDS
+    records = jobs if job_store is None else await asyncio.to_thread(job_store.get_jobs, job_ids)
     job_summaries = []
-    for job_id, job in sorted_jobs:
-        job_summaries.append({
-            "job_id": job_id,
-            "status": job["status"],
-            "filename": job.get("filename", "unknown"),
-            "created_at": job.get("created_at", "unknown"),
-        })
+    for job_id in job_ids:
+        job = records[job_id]
+        summary = {"job_id": job_id}
+        for field in selected_fields:
+            if field != "job_id":
+                summary[field] = job.get(field)
+        job_summaries.append(summary)
 
     return {
         "jobs": job_summaries,
-        "total": len(jobs),
+        "next_cursor": next_cursor,
+        "total": len(jobs) if job_store is None else await asyncio.to_thread(job_store.total),
+    }
+
+
+@mcp.tool()
+async def get_client_usage(client: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Per-client usage, limits and fair-share queue state.
+
+    Admin clients see every client (or only the one named); other clients
+    only see themselves.
+
+    Args:
+        client: Client name to report on (admins only; default: all)
+
+    Returns:
+        Dictionary with:
+        - caller: Client name of the caller
+        - clients: {name: {policy, usage, running_gpus, queued_jobs}} where
+          policy has weight, max_gpus, submissions_per_minute and burst, and
+          usage has submissions, rejected_submissions, jobs_completed,
+          jobs_failed, gpu_seconds, bytes_in and bytes_out
+    """
+    caller = current_client()
+    if not client_registry.policy(caller)["admin"]:
+        if client not in (None, caller):
+            return {
+                "error": "Only admin clients can see other clients' usage",
+                "status": "forbidden",
+            }
+        client = caller
+
+    usage = await asyncio.to_thread(job_store.usage) if job_store is not None else usage_ledger.snapshot()
+    queues = await store_io(scheduler_summary)
+    names = [client] if client else sorted(set(client_registry.names()) | set(usage) | set(queues))
+
+    report = {}
+    for name in names:
+        policy = client_registry.policy(name)
+        counters = usage.get(name, {})
+        queue = queues.get(name, {})
+        report[name] = {
+            "policy": {key: policy[key] for key in ("weight", "max_gpus", "submissions_per_minute", "burst")},
+            "usage": {
+                counter: round(counters.get(counter, 0), 1) if counter == "gpu_seconds" else int(counters.get(counter, 0))
+                for counter in USAGE_COUNTERS
+            },
+            "running_gpus": queue.get("running_gpus", 0),
+            "queued_jobs": queue.get("queued_jobs", 0),
+        }
+
+    return {"caller": caller, "clients": report}
+
+
+@mcp.tool()
+async def get_job_trace(
+    job_id: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    format: str = "chrome",
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """
+    Export the stage timeline of one job, a batch, or the latest jobs.
+
+    Each job's trace covers the submitting tool call (e.g. upload decoding),
+    the GPU queue, every Boltz attempt split into the stages Boltz printed
+    (startup, download, preprocess, msa, model_load, predict, ...), retry
+    backoffs, sample merging, summarizing and each result retrieval.
+
+    Save "trace" as a .json file and open it in https://ui.perfetto.dev or
+    chrome://tracing (format "chrome"), or send it to an OpenTelemetry
+    collector's /v1/traces endpoint (format "otlp").
+
+    Args:
+        job_id: Job to export (default: aggregate over several jobs)
+        batch_id: Export the jobs of this batch (when job_id is not given)
+        format: "chrome" (default) or "otlp"
+        limit: Most jobs in an aggregate export (default: 100, max: 1000);
+               without batch_id, the most recently active jobs
+
+    Returns:
+        Dictionary with:
+        - trace: Trace document in the requested format
+        - format: Format of the trace
+        - job_ids: Jobs included
+        - stages: Per span name {count, total_seconds, mean_seconds,
+          p50_seconds, p95_seconds, max_seconds}, slowest total first
+    """
+    if format not in TRACE_FORMATS:
+        return {
+            "error": f"Unsupported format '{format}'. Use one of: {', '.join(TRACE_FORMATS)}",
+            "status": "error",
+        }
+    if not job_tracer.enabled:
+        return {
+            "error": "Tracing is disabled on this server (BOLTZ_TRACING=false)",
+            "status": "error",
+        }
+
+    limit = max(1, min(limit, TRACE_EXPORT_MAX_JOBS))
+    if job_id:
+        if await store_io(lookup_job, job_id) is None:
+            return {
+                "error": f"Job ID {job_id} not found",
+                "status": "unknown",
+            }
+        job_ids = [job_id]
+    elif batch_id:
+        index = job_index if job_store is None else job_store
+        job_ids, _ = await store_io(index.query, {"batch_id": [batch_id]}, limit)
+    else:
+        job_ids = job_tracer.traced_job_ids(limit)
+
+    # Reading trace files is blocking I/O; keep the event loop free
+    def collect():
+        traces = []
+        for trace_job_id in job_ids:
+            spans = job_tracer.spans(trace_job_id)
+            root = job_root_span(trace_job_id, lookup_job(trace_job_id), spans)
+            traces.append((trace_job_id, [root, *spans]))
+        return traces
+
+    traces = await asyncio.to_thread(collect)
+
+    return {
+        "trace": export_traces(traces, format),
+        "format": format,
+        "job_ids": job_ids,
+        "stages": summarize_stages(traces),
+        "status": "success",
     }
 
 
@@ -593,8 +3131,6 @@ async def get_server_info() -> Dict[str, Any]:
     Returns:
         Dictionary with server information
     """
-    import shutil  # For disk usage stats
-
     # Get disk space for output directory
     disk_usage = shutil.disk_usage(OUTPUT_DIR)
 
@@ -610,6 +3146,20 @@ async def get_server_info() -> Dict[str, Any]:
     except ImportError:
         pass  # PyTorch not installed, can't check GPUs
 
+    cluster_info: Dict[str, Any] = {"role": BOLTZ_ROLE}
+    if BOLTZ_ROLE == "coordinator":
+        if job_store is None or is_leader:
+            cluster_info["workers"] = worker_registry.summary()
+        else:
+            # Only the leader tracks workers; it publishes them in the store
+            cluster_info["workers"] = await asyncio.to_thread(job_store.get_meta, "workers", [])
+
+    if job_store is None:
+        active_jobs, total_jobs = job_index.count("status", "running"), len(jobs)
+    else:
+        active_jobs = await asyncio.to_thread(job_store.count, "status", "running")
+        total_jobs = await asyncio.to_thread(job_store.total)
+
     return {
         "server": "Boltz MCP Server",
         "version": "1.0.0",
@@ -624,8 +3174,22 @@ async def get_server_info() -> Dict[str, Any]:
         },
         "gpu_info": gpu_info,
         "max_upload_size_mb": MAX_UPLOAD_SIZE / (1024**2),
-        "active_jobs": len([j for j in jobs.values() if j["status"] == "running"]),
-        "total_jobs": len(jobs),
+        "active_jobs": active_jobs,
+        "total_jobs": total_jobs,
+        "cluster": cluster_info,
+        "readiness": await store_io(current_readiness),
+        "http_workers": {
+            "processes": HTTP_WORKERS,
+            "pid": os.getpid(),
+            "leader": is_leader,
+        },
+        "clients": {
+            "caller": current_client(),
+            "authentication": client_registry.enabled,
+            "configured": len(client_registry.names()),
+            "jobs_per_gpu": JOBS_PER_GPU,
+        },
+        "tracing": TRACING_ENABLED,
     }
 
 
@@ -649,25 +3213,60 @@ if __name__ == "__main__":
     - BOLTZ_HOST: Host to bind to (default: "0.0.0.0")
     - BOLTZ_PORT: Port to listen on (default: 8000)
     - BOLTZ_AUTH_TOKEN: Optional bearer token for authentication
+    - BOLTZ_CLIENTS_FILE: Optional per-client tokens, weights, GPU quotas
+      and rate limits (see fair_share.py)
+    - BOLTZ_ROLE: "standalone" or "coordinator" (default: "standalone")
+    - BOLTZ_PREFETCH_WEIGHTS / BOLTZ_VERIFY_WEIGHTS / BOLTZ_WARMUP: startup
+      preparation, reported at /ready
+    - BOLTZ_HTTP_WORKERS: HTTP processes sharing the port (default: 1)
+    - BOLTZ_TRACING: Record per-job stage timelines (default: true)
     """
     print("Starting Boltz MCP Server...", file=sys.stderr)
     print(f"Upload directory: {UPLOAD_DIR}", file=sys.stderr)
     print(f"Output directory: {OUTPUT_DIR}", file=sys.stderr)
     print(f"Model cache directory: {MODEL_CACHE_DIR}", file=sys.stderr)
+    print(f"Role: {BOLTZ_ROLE}", file=sys.stderr)
+    if BOLTZ_ROLE == "coordinator" and not CLUSTER_TOKEN:
+        print("[WARNING] BOLTZ_CLUSTER_TOKEN is not set; worker heartbeats will be refused", file=sys.stderr)
 
     # Get configuration from environment
     transport = os.getenv("BOLTZ_TRANSPORT", "http")
     host = os.getenv("BOLTZ_HOST", "0.0.0.0")
     port = int(os.getenv("BOLTZ_PORT", "8000"))
 
+    if transport == "http" and HTTP_WORKERS > 1:
+        import uvicorn
+
+        print(f"\n{'='*60}", file=sys.stderr)
+        print(f"Starting {HTTP_WORKERS} HTTP processes on {host}:{port}", file=sys.stderr)
+        print(f"Server will be accessible at: http://{host}:{port}/mcp/", file=sys.stderr)
+        print(f"Shared job store: {JOB_STORE_PATH}", file=sys.stderr)
+        print(f"{'='*60}\n", file=sys.stderr)
+
+        # Each process builds its app with create_app(); the leader among
+        # them runs startup preparation and inference
+        uvicorn.run(
+            "boltz_mcp_server:create_app",
+            factory=True,
+            host=host,
+            port=port,
+            workers=HTTP_WORKERS,
+            app_dir=str(Path(__file__).resolve().parent),
+        )
+        sys.exit(0)
+
+    # Prefetch/verify weights and warm up in the background; the server
+    # starts accepting requests right away and /ready reports progress
+    start_startup_preparation(local_gpu_ids())
+
     if transport == "http":
         print(f"\n{'='*60}", file=sys.stderr)
         print(f"Starting HTTP server on {host}:{port}", file=sys.stderr)
         print(f"Server will be accessible at: http://{host}:{port}/mcp/", file=sys.stderr)
         print(f"{'='*60}\n", file=sys.stderr)
 
-        # Run with HTTP transport
-        mcp.run(transport="http", host=host, port=port)
+        # Run with HTTP transport (client tokens checked by the middleware)
+        mcp.run(transport="http", host=host, port=port, middleware=http_middleware())
     else:
         print("Running in STDIO mode (local development)", file=sys.stderr)
         # Run with stdio transport (default)
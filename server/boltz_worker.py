@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Boltz Worker Agent
+
+Runs on a GPU host and executes Boltz jobs on behalf of a coordinator
+(boltz_mcp_server.py started with BOLTZ_ROLE=coordinator). This lets one
+MCP front end (and one ngrok URL) serve several GPU machines.
+
+The worker:
+- Sends heartbeats (capacity, busy GPUs, free GPU memory) to the coordinator
+- Accepts jobs over HTTP and runs them with the same inference code as the
+  standalone server (including OOM retries)
+- Serves finished output directories as tar.gz archives for pull-back
+
+Endpoints (all require the X-Boltz-Cluster-Token header; the worker refuses
+to start without BOLTZ_CLUSTER_TOKEN):
+- POST /jobs                 Submit a job
+- GET  /jobs/{job_id}        Job status
+- GET  /jobs/{job_id}/archive  Output directory as tar.gz
+- GET  /health               Worker state (no token needed)
+- GET  /ready                200 once weights are prefetched/verified (no token needed)
+
+Usage:
+    python3 boltz_worker.py --coordinator http://coordinator-host:8000 \\
+        --port 9001 --gpus 0,1
+
+Several workers can run on one machine for testing (use distinct --port and
+--name values, and point BOLTZ_BIN at a stand-in script if there is no GPU).
+"""
+
+import os
+import sys
+import socket
+import asyncio
+import argparse
+import base64
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# Web server stack (installed with FastMCP)
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Reuse the standalone server's inference code and job table
+import boltz_mcp_server as server
+from cluster import CLUSTER_TOKEN_HEADER, build_archive, check_cluster_token, is_valid_job_id
+
+# ============================================================================
+# WORKER STATE
+# ============================================================================
+
+class WorkerState:
+    """
+    Mutable state of this worker agent.
+
+    Tracks which GPUs are free and the background tasks running jobs.
+    """
+
+    def __init__(self, worker_id: str, url: str, gpus: List[int], coordinator_url: Optional[str]):
+        """
+        Initialize worker state.
+
+        Args:
+            worker_id: Name reported to the coordinator
+            url: URL the coordinator uses to reach this worker
+            gpus: GPU device IDs this worker may use
+            coordinator_url: Base URL of the coordinator (None = standalone worker)
+        """
+        self.worker_id = worker_id
+        self.url = url
+        self.gpus = gpus
+        self.free_gpus = list(gpus)
+        self.coordinator_url = coordinator_url.rstrip("/") if coordinator_url else None
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # Set to trigger an immediate heartbeat (e.g. when a job finishes)
+        self.heartbeat_now = asyncio.Event()
+
+    async def heartbeat_payload(self) -> Dict[str, Any]:
+        """Build the heartbeat body sent to the coordinator (also /health)."""
+        # nvidia-smi blocks for a while; keep it off the event loop
+        gpu_free_memory = await asyncio.to_thread(server.query_gpu_free_memory)
+        return {
+            "worker_id": self.worker_id,
+            "url": self.url,
+            "capacity": len(self.gpus),
+            "running": len(self.gpus) - len(self.free_gpus),
+            "free_gpus": self.free_gpus,
+            "gpu_free_memory": gpu_free_memory,
+        }
+
+
+# Set in main() before the app starts
+state: Optional[WorkerState] = None
+
+# Shared secret with the coordinator
+CLUSTER_TOKEN = os.getenv("BOLTZ_CLUSTER_TOKEN")
+
+# Seconds between heartbeats
+HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("BOLTZ_WORKER_HEARTBEAT_INTERVAL", "5"))
+
+# ============================================================================
+# JOB EXECUTION
+# ============================================================================
+
+async def run_job(job_id: str, input_path: Path, devices: List[int], params: Dict[str, Any]) -> None:
+    """
+    Run one job and return its GPUs to the free pool afterwards.
+
+    Args:
+        job_id: Job ID assigned by the coordinator
+        input_path: Saved input file
+        devices: GPUs allocated to this job
+        params: Inference parameters from the coordinator
+    """
+    try:
+        await server.run_boltz_inference(
+            input_path=input_path,
+            output_dir=server.OUTPUT_DIR,
+            job_id=job_id,
+            devices=devices,
+            recycling_steps=int(params.get("recycling_steps", 3)),
+            sampling_steps=int(params.get("sampling_steps", 200)),
+            diffusion_samples=int(params.get("diffusion_samples", 1)),
+            seed=params.get("seed"),
+            # An OOM retry may swap GPUs with the free pool
+            device_pool=state.free_gpus,
+        )
+    except Exception as e:
+        # run_boltz_inference already recorded the failure in the job table
+        print(f"[WARNING] Job {job_id} failed: {e}", file=sys.stderr)
+    finally:
+        # The GPUs the job ended up on (it may have moved after an OOM)
+        state.free_gpus.extend(server.jobs[job_id].get("devices", devices))
+        state.tasks.pop(job_id, None)
+        state.heartbeat_now.set()
+        server.prune_traces_if_due()
+
+
+def _authorized(request: Request) -> bool:
+    """Check the cluster token on an incoming request."""
+    return check_cluster_token(CLUSTER_TOKEN, request.headers.get(CLUSTER_TOKEN_HEADER))
+
+
+async def submit_job(request: Request) -> JSONResponse:
+    """
+    Accept a job from the coordinator.
+
+    Body: {"job_id", "filename", "content" (base64), "params"}
+    Returns 409 if not enough GPUs are free.
+    """
+    if not _authorized(request):
+        return JSONResponse({"error": "Invalid cluster token"}, status_code=401)
+
+    body = await request.json()
+    job_id = body.get("job_id")
+    if not is_valid_job_id(job_id):
+        # The ID becomes part of upload/output paths
+        return JSONResponse({"error": "job_id must be 16 lowercase hex characters"}, status_code=400)
+
+    # Resubmission of a job we already have (e.g. coordinator retried the request)
+    existing = server.jobs.get(job_id)
+    if existing is not None and existing["status"] != "failed":
+        return JSONResponse({"job_id": job_id, "status": existing["status"]})
+
+    params = body.get("params") or {}
+    num_devices = max(1, int(params.get("num_devices", 1)))
+    if len(state.free_gpus) < num_devices:
+        return JSONResponse({"error": "Not enough free GPUs"}, status_code=409)
+
+    # Save the input under a per-job directory so concurrent jobs never collide
+    filename = Path(body.get("filename") or "input.fasta").name
+    job_upload_dir = server.UPLOAD_DIR / "cluster" / job_id
+    job_upload_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        file_data = base64.b64decode(body.get("content", ""))
+    except Exception as e:
+        return JSONResponse({"error": f"Invalid base64 content: {e}"}, status_code=400)
+    input_path = job_upload_dir / filename
+    input_path.write_bytes(file_data)
+
+    # Allocate GPUs
+    devices = state.free_gpus[:num_devices]
+    del state.free_gpus[:num_devices]
+
+    server.register_job(job_id, {
+        "status": "queued",
+        "input_path": str(input_path),
+        "created_at": datetime.now().isoformat(),
+        "filename": filename,
+        "devices": devices,
+    })
+    state.tasks[job_id] = asyncio.create_task(run_job(job_id, input_path, devices, params))
+    state.heartbeat_now.set()
+
+    return JSONResponse({"job_id": job_id, "status": "queued"})
+
+
+async def job_status(request: Request) -> JSONResponse:
+    """Return the worker-side record of a job."""
+    if not _authorized(request):
+        return JSONResponse({"error": "Invalid cluster token"}, status_code=401)
+
+    job_id = request.path_params["job_id"]
+    job = server.jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Job ID {job_id} not found"}, status_code=404)
+
+    record = dict(job)
+    if job.get("output_path"):
+        # Path of the main CIF relative to the archived output directory
+        record["output_relpath"] = str(Path(job["output_path"]).relative_to(server.OUTPUT_DIR / job_id))
+    if job["status"] in server.TERMINAL_STATUSES:
+        # Spans recorded here, merged into the coordinator's trace of the job
+        record["trace"] = server.job_tracer.spans(job_id)
+    return JSONResponse(record)
+
+
+async def job_archive(request: Request) -> Response:
+    """Return a completed job's output directory as a tar.gz archive."""
+    if not _authorized(request):
+        return JSONResponse({"error": "Invalid cluster token"}, status_code=401)
+
+    job_id = request.path_params["job_id"]
+    job = server.jobs.get(job_id)
+    if job is None or job["status"] != "completed":
+        return JSONResponse({"error": f"Job ID {job_id} has no completed output"}, status_code=404)
+
+    # Packing can take a while for large outputs; keep the event loop free
+    archive = await asyncio.to_thread(build_archive, server.OUTPUT_DIR / job_id)
+    return Response(archive, media_type="application/gzip")
+
+
+async def health(request: Request) -> JSONResponse:
+    """Report worker state and startup readiness (no auth, contains no job data)."""
+    return JSONResponse({**(await state.heartbeat_payload()), "readiness": server.readiness})
+
+
+# ============================================================================
+# HEARTBEATS
+# ============================================================================
+
+async def heartbeat_loop() -> None:
+    """
+    Send heartbeats to the coordinator until the worker shuts down.
+
+    Failures are logged and retried on the next interval, so a worker can
+    be started before its coordinator.
+    """
+    headers = {CLUSTER_TOKEN_HEADER: CLUSTER_TOKEN} if CLUSTER_TOKEN else {}
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        while True:
+            try:
+                response = await client.post(
+                    f"{state.coordinator_url}/cluster/heartbeat",
+                    headers=headers,
+                    json=await state.heartbeat_payload(),
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"[WARNING] Heartbeat to {state.coordinator_url} failed: {e}", file=sys.stderr)
+
+            # Wait for the next interval, or wake up early on job start/finish
+            state.heartbeat_now.clear()
+            try:
+                await asyncio.wait_for(state.heartbeat_now.wait(), timeout=HEARTBEAT_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+def build_app() -> Starlette:
+    """
+    Create the worker's Starlette application.
+
+    Returns:
+        App with job routes and a lifespan that runs the heartbeat loop
+    """
+    from contextlib import asynccontextmanager
+
+    @asynccontextmanager
+    async def lifespan(app):
+        heartbeat_task = None
+        if state.coordinator_url:
+            heartbeat_task = asyncio.create_task(heartbeat_loop())
+        yield
+        if heartbeat_task:
+            heartbeat_task.cancel()
+
+    return Starlette(
+        routes=[
+            Route("/jobs", submit_job, methods=["POST"]),
+            Route("/jobs/{job_id}", job_status, methods=["GET"]),
+            Route("/jobs/{job_id}/archive", job_archive, methods=["GET"]),
+            Route("/health", health, methods=["GET"]),
+            Route("/ready", server.ready, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+# ============================================================================
+# SCRIPT ENTRY POINT
+# ============================================================================
+
+def main():
+    """Parse arguments and run the worker agent."""
+    global state
+
+    parser = argparse.ArgumentParser(description="Boltz worker agent")
+    parser.add_argument("--coordinator", default=os.getenv("BOLTZ_COORDINATOR_URL"),
+                        help="Coordinator base URL, e.g. http://coordinator:8000")
+    parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=9001, help="Port to listen on")
+    parser.add_argument("--gpus", default=os.getenv("CUDA_VISIBLE_DEVICES", "0"),
+                        help="Comma-separated GPU IDs this worker may use")
+    parser.add_argument("--name", default=None, help="Worker ID (default: hostname:port)")
+    parser.add_argument("--advertise-url", default=None,
+                        help="URL the coordinator should use to reach this worker "
+                             "(default: http://<hostname>:<port>)")
+    args = parser.parse_args()
+
+    # Without a shared token anyone who can reach the port could submit jobs
+    if not CLUSTER_TOKEN:
+        print("[ERROR] BOLTZ_CLUSTER_TOKEN is not set", file=sys.stderr)
+        print("[ERROR] Set the same secret on the coordinator and every worker", file=sys.stderr)
+        sys.exit(1)
+
+    hostname = socket.gethostname()
+    worker_id = args.name or f"{hostname}:{args.port}"
+    url = args.advertise_url or f"http://{hostname}:{args.port}"
+    gpus = [int(g.strip()) for g in args.gpus.split(",") if g.strip()]
+
+    state = WorkerState(worker_id=worker_id, url=url, gpus=gpus, coordinator_url=args.coordinator)
+
+    print(f"Starting Boltz worker {worker_id} on {args.host}:{args.port}", file=sys.stderr)
+    print(f"GPUs: {gpus}", file=sys.stderr)
+    print(f"Advertised URL: {url}", file=sys.stderr)
+    if args.coordinator:
+        print(f"Coordinator: {args.coordinator}", file=sys.stderr)
+    else:
+        print("[WARNING] No coordinator configured; heartbeats disabled", file=sys.stderr)
+
+    # Prefetch/verify weights (and optionally warm up GPUs) in the background;
+    # jobs that arrive meanwhile wait for it, /ready reports progress
+    server.start_startup_preparation(gpus)
+
+    uvicorn.run(build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
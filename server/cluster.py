@@ -0,0 +1,410 @@
+"""
+Cluster support for the Boltz MCP Server (coordinator side).
+
+In coordinator mode (BOLTZ_ROLE=coordinator) the FastMCP server keeps the
+job table but does not run Boltz itself. Instead, worker agents
+(boltz_worker.py) running on GPU hosts register with the coordinator and
+send periodic heartbeats. The coordinator places each job on the least
+loaded live worker, then pulls the finished outputs back so that
+get_prediction_result works exactly as in standalone mode.
+
+This module contains:
+- WorkerRegistry: tracks workers, heartbeats and load-based placement
+- Small async HTTP helpers used by the coordinator to talk to workers
+
+All cluster traffic is authenticated with a shared token sent in the
+X-Boltz-Cluster-Token header (BOLTZ_CLUSTER_TOKEN). The token is required:
+without it anyone on the network could register a rogue worker or submit
+jobs to a worker.
+"""
+
+import io
+import re
+import asyncio
+import secrets
+import tarfile
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# httpx is installed as a FastMCP dependency
+import httpx
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Header carrying the shared cluster token
+CLUSTER_TOKEN_HEADER = "X-Boltz-Cluster-Token"
+
+# Job IDs are 16 lowercase hex characters (see generate_job_id); anything
+# else is rejected before it is used in a path
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{16}")
+
+# Timeout for control requests (submit, status, heartbeat)
+CONTROL_TIMEOUT_SECONDS = 30.0
+# Timeout for pulling result archives back (can be large)
+ARCHIVE_TIMEOUT_SECONDS = 600.0
+# Result archives are written to disk in chunks of this size
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+
+def check_cluster_token(expected: Optional[str], provided: Optional[str]) -> bool:
+    """
+    Check a cluster token in constant time.
+
+    Args:
+        expected: Configured token (None = cluster not configured)
+        provided: Token sent by the peer
+
+    Returns:
+        True if the request is authorized (never without a configured token)
+    """
+    if not expected:
+        return False
+    if not provided:
+        return False
+    return secrets.compare_digest(expected.encode("utf-8"), provided.encode("utf-8"))
+
+
+def is_valid_job_id(job_id: Any) -> bool:
+    """
+    Check that a job ID has the coordinator's format.
+
+    Workers use job IDs in file paths, so this keeps values like "../.."
+    out of them.
+
+    Args:
+        job_id: Value sent by the peer
+
+    Returns:
+        True if job_id is 16 lowercase hex characters
+    """
+    return isinstance(job_id, str) and JOB_ID_PATTERN.fullmatch(job_id) is not None
+
+
+def resolve_output_path(dest_dir: Path, relpath: Any) -> Path:
+    """
+    Resolve an output path reported by a worker inside the job directory.
+
+    Args:
+        dest_dir: Local job output directory (where the archive was unpacked)
+        relpath: Path relative to dest_dir, as sent by the worker
+
+    Returns:
+        Absolute path of the output file
+
+    Raises:
+        ValueError: If the path is missing, escapes dest_dir or is not a file
+    """
+    if not isinstance(relpath, str) or not relpath:
+        raise ValueError("Worker did not report an output path")
+    dest_root = dest_dir.resolve()
+    target = (dest_root / relpath).resolve()
+    if not target.is_relative_to(dest_root) or not target.is_file():
+        raise ValueError(f"Worker reported an invalid output path: {relpath}")
+    return target
+
+
+# ============================================================================
+# WORKER REGISTRY
+# ============================================================================
+
+class WorkerRegistry:
+    """
+    Tracks registered worker agents and places jobs on them.
+
+    Workers are identified by worker_id and considered alive while their
+    last heartbeat is newer than heartbeat_timeout seconds. Heartbeats
+    report capacity (number of GPUs) and how many are busy; because a
+    heartbeat can lag behind a dispatch, the registry also counts jobs it
+    has assigned itself and uses whichever load figure is higher.
+    """
+
+    def __init__(self, heartbeat_timeout: float):
+        """
+        Initialize an empty registry.
+
+        Args:
+            heartbeat_timeout: Seconds without heartbeat before a worker is dead
+        """
+        self.heartbeat_timeout = heartbeat_timeout
+        # Key: worker_id, Value: last reported worker state
+        self.workers: Dict[str, Dict[str, Any]] = {}
+        # Key: worker_id, Value: set of job_ids placed there and not yet finished
+        self.assigned: Dict[str, set] = {}
+
+    def heartbeat(self, info: Dict[str, Any], received_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Register a worker or refresh its state.
+
+        Args:
+            info: Heartbeat payload with worker_id, url, capacity, running,
+                  free_gpus and gpu_free_memory
+            received_at: When the heartbeat arrived (POSIX time; default now).
+                         Set when replaying heartbeats another server process
+                         received.
+
+        Returns:
+            The stored worker record
+
+        Raises:
+            ValueError: If worker_id or url is missing
+        """
+        worker_id = info.get("worker_id")
+        url = info.get("url")
+        if not worker_id or not url:
+            raise ValueError("Heartbeat must include worker_id and url")
+
+        now = time.time() if received_at is None else received_at
+        record = self.workers.get(worker_id)
+        if record is None:
+            record = {"worker_id": worker_id, "registered_at": now}
+            self.workers[worker_id] = record
+            self.assigned.setdefault(worker_id, set())
+
+        record.update({
+            "url": url.rstrip("/"),
+            "capacity": int(info.get("capacity", 1)),
+            "running": int(info.get("running", 0)),
+            "free_gpus": list(info.get("free_gpus", [])),
+            "gpu_free_memory": {str(k): v for k, v in (info.get("gpu_free_memory") or {}).items()},
+            "last_heartbeat": now,
+        })
+        return record
+
+    def is_alive(self, worker_id: str) -> bool:
+        """
+        Check whether a worker has sent a heartbeat recently.
+
+        Args:
+            worker_id: Worker to check
+
+        Returns:
+            True if the worker is registered and its heartbeat is fresh
+        """
+        record = self.workers.get(worker_id)
+        if record is None:
+            return False
+        return time.time() - record["last_heartbeat"] <= self.heartbeat_timeout
+
+    def load(self, worker_id: str) -> int:
+        """
+        Number of busy slots on a worker as far as the coordinator knows.
+
+        Args:
+            worker_id: Worker to check
+
+        Returns:
+            max(reported running jobs, jobs assigned by this coordinator)
+        """
+        record = self.workers[worker_id]
+        return max(record["running"], len(self.assigned.get(worker_id, ())))
+
+    def choose(self) -> Optional[Dict[str, Any]]:
+        """
+        Pick the live worker with the most free slots.
+
+        Ties are broken by the largest reported free GPU memory, so jobs
+        spread across hosts instead of piling onto the first one.
+
+        Returns:
+            Worker record, or None if every live worker is full
+        """
+        best = None
+        best_key = None
+        for worker_id, record in self.workers.items():
+            if not self.is_alive(worker_id):
+                continue
+            free_slots = record["capacity"] - self.load(worker_id)
+            if free_slots <= 0:
+                continue
+            key = (free_slots, sum(record["gpu_free_memory"].values()))
+            if best_key is None or key > best_key:
+                best, best_key = record, key
+        return best
+
+    def assign(self, worker_id: str, job_id: str) -> None:
+        """Record that job_id was placed on worker_id."""
+        self.assigned.setdefault(worker_id, set()).add(job_id)
+
+    def release(self, worker_id: str, job_id: str) -> None:
+        """Forget a placement once the job finished or was requeued."""
+        self.assigned.get(worker_id, set()).discard(job_id)
+
+    def total_capacity(self) -> int:
+        """Total GPU capacity of all live workers."""
+        return sum(
+            record["capacity"] for worker_id, record in self.workers.items() if self.is_alive(worker_id)
+        )
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Describe all known workers for get_server_info.
+
+        Returns:
+            List of worker summaries (alive flag, load, heartbeat age)
+        """
+        now = time.time()
+        return [
+            {
+                "worker_id": worker_id,
+                "url": record["url"],
+                "alive": self.is_alive(worker_id),
+                "capacity": record["capacity"],
+                "load": self.load(worker_id),
+                "gpu_free_memory": record["gpu_free_memory"],
+                "last_heartbeat_age_s": round(now - record["last_heartbeat"], 1),
+            }
+            for worker_id, record in self.workers.items()
+        ]
+
+
+# ============================================================================
+# COORDINATOR -> WORKER HTTP HELPERS
+# ============================================================================
+
+def _headers(token: Optional[str]) -> Dict[str, str]:
+    """Build request headers carrying the cluster token (if configured)."""
+    return {CLUSTER_TOKEN_HEADER: token} if token else {}
+
+
+async def submit_remote_job(
+    worker_url: str,
+    token: Optional[str],
+    job_id: str,
+    filename: str,
+    content_base64: str,
+    params: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Submit a job to a worker agent.
+
+    Args:
+        worker_url: Base URL of the worker (e.g. "http://gpu2:9001")
+        token: Shared cluster token
+        job_id: Coordinator job ID (reused as the worker-side job ID)
+        filename: Input filename
+        content_base64: Base64-encoded input file
+        params: Inference parameters (num_devices, recycling_steps, ...)
+
+    Returns:
+        Worker response body
+
+    Raises:
+        httpx.HTTPError: On connection errors or non-2xx responses
+    """
+    async with httpx.AsyncClient(timeout=CONTROL_TIMEOUT_SECONDS) as client:
+        response = await client.post(
+            f"{worker_url}/jobs",
+            headers=_headers(token),
+            json={
+                "job_id": job_id,
+                "filename": filename,
+                "content": content_base64,
+                "params": params,
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+async def get_remote_job(worker_url: str, token: Optional[str], job_id: str) -> Dict[str, Any]:
+    """
+    Fetch the status of a job running on a worker.
+
+    Args:
+        worker_url: Base URL of the worker
+        token: Shared cluster token
+        job_id: Job ID
+
+    Returns:
+        Worker-side job record (status, error, attempts, output_relpath, ...)
+
+    Raises:
+        httpx.HTTPError: On connection errors or non-2xx responses
+    """
+    async with httpx.AsyncClient(timeout=CONTROL_TIMEOUT_SECONDS) as client:
+        response = await client.get(f"{worker_url}/jobs/{job_id}", headers=_headers(token))
+        response.raise_for_status()
+        return response.json()
+
+
+async def fetch_remote_outputs(
+    worker_url: str,
+    token: Optional[str],
+    job_id: str,
+    dest_dir: Path,
+) -> None:
+    """
+    Pull a finished job's output directory back from a worker.
+
+    The worker sends its job output directory as a tar.gz archive. It is
+    streamed to a temporary file next to dest_dir (so large results never
+    sit in memory), unpacked in a worker thread (members escaping dest_dir
+    are rejected) and then deleted.
+
+    Args:
+        worker_url: Base URL of the worker
+        token: Shared cluster token
+        job_id: Job ID
+        dest_dir: Local directory to unpack into
+
+    Raises:
+        httpx.HTTPError: On connection errors or non-2xx responses
+        ValueError: If the archive contains unsafe paths
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    archive_path = dest_dir.with_name(f".{dest_dir.name}.tar.gz.partial")
+    try:
+        async with httpx.AsyncClient(timeout=ARCHIVE_TIMEOUT_SECONDS) as client:
+            async with client.stream(
+                "GET", f"{worker_url}/jobs/{job_id}/archive", headers=_headers(token)
+            ) as response:
+                response.raise_for_status()
+                with open(archive_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(ARCHIVE_CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+
+        await asyncio.to_thread(extract_archive, archive_path, dest_dir)
+    finally:
+        archive_path.unlink(missing_ok=True)
+
+
+def build_archive(source_dir: Path) -> bytes:
+    """
+    Pack a directory into an in-memory tar.gz archive.
+
+    Args:
+        source_dir: Directory to pack (paths are stored relative to it)
+
+    Returns:
+        Archive bytes
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for path in sorted(source_dir.rglob("*")):
+            if path.is_file():
+                tar.add(path, arcname=str(path.relative_to(source_dir)))
+    return buffer.getvalue()
+
+
+def extract_archive(archive_path: Path, dest_dir: Path) -> None:
+    """
+    Unpack a tar.gz archive produced by build_archive().
+
+    Args:
+        archive_path: Archive file
+        dest_dir: Directory to unpack into
+
+    Raises:
+        ValueError: If a member is not a regular file/directory or escapes dest_dir
+    """
+    dest_root = dest_dir.resolve()
+    with tarfile.open(archive_path, mode="r:gz") as tar:
+        members = tar.getmembers()
+        for member in members:
+            target = (dest_root / member.name).resolve()
+            if not (member.isfile() or member.isdir()) or not target.is_relative_to(dest_root):
+                raise ValueError(f"Unsafe path in result archive: {member.name}")
+        tar.extractall(dest_root, members=members)
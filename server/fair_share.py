@@ -0,0 +1,603 @@
+"""
+Per-client identities, fair-share GPU scheduling, rate limits and usage
+accounting for the Boltz MCP Server.
+
+With one shared token nobody knows who submitted what, and a single
+2,000-job screen can occupy every GPU for days while interactive users
+wait. This module gives each client its own token and policy:
+
+- weight:                 share of the GPUs when several clients queue jobs
+- max_gpus:               GPUs the client may use at the same time
+- submissions_per_minute: sustained job submission rate (token bucket)
+- burst:                  submissions allowed at once before the rate applies
+- admin:                  may see every client's usage
+
+Clients are defined in a JSON file (BOLTZ_CLIENTS_FILE):
+
+    {
+      "defaults": {"weight": 1, "max_gpus": null,
+                   "submissions_per_minute": null, "burst": null},
+      "clients": {
+        "alice": {"token": "...", "weight": 2, "admin": true},
+        "screening": {"token_sha256": "...", "max_gpus": 2,
+                      "submissions_per_minute": 60, "burst": 500}
+      }
+    }
+
+Queued jobs get GPUs in start-time fair queueing order: each job is
+tagged with a virtual start time max(V, F_client), where F_client
+advances by gpus / weight per job, so over time every backlogged client
+gets GPUs in proportion to its weight, however many jobs it has queued.
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import itertools
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, Set
+
+# Client name of callers when authentication is disabled
+ANONYMOUS_CLIENT = "anonymous"
+# Client name of in-process callers (stdio transport, worker agents)
+LOCAL_CLIENT = "local"
+# Client created from the single BOLTZ_AUTH_TOKEN
+SHARED_TOKEN_CLIENT = "default"
+
+# Policy of clients that do not override a setting
+DEFAULT_POLICY: Dict[str, Any] = {
+    "weight": 1.0,
+    "max_gpus": None,
+    "submissions_per_minute": None,
+    "burst": None,
+    "admin": False,
+}
+
+# Usage counters kept per client
+USAGE_COUNTERS = (
+    "submissions",
+    "rejected_submissions",
+    "jobs_completed",
+    "jobs_failed",
+    "gpu_seconds",
+    "bytes_in",
+    "bytes_out",
+)
+
+
+def hash_token(token: str) -> str:
+    """SHA256 hex digest of a token (tokens are only compared hashed)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+
+class ClientRegistry:
+    """
+    Client tokens and policies.
+
+    Authentication is enabled as soon as at least one token is configured.
+    Without tokens every caller is ANONYMOUS_CLIENT (with admin rights, as
+    before there were clients).
+    """
+
+    def __init__(self, clients: Dict[str, Dict[str, Any]], defaults: Optional[Dict[str, Any]] = None):
+        """
+        Create the registry.
+
+        Args:
+            clients: {name: {"token" or "token_sha256", policy settings...}}
+            defaults: Policy settings for clients that do not set them
+
+        Raises:
+            ValueError: If a client has no token, a token is used twice or a
+                        setting is invalid
+        """
+        self.defaults = {**DEFAULT_POLICY, **(defaults or {})}
+        # Key: client name, Value: full policy
+        self.policies: Dict[str, Dict[str, Any]] = {}
+        # Key: sha256 of the token, Value: client name
+        self.tokens: Dict[str, str] = {}
+
+        for name, settings in clients.items():
+            settings = dict(settings)
+            token_hash = settings.pop("token_sha256", None)
+            token = settings.pop("token", None)
+            if token:
+                token_hash = hash_token(token)
+            if not token_hash:
+                raise ValueError(f"Client '{name}' needs a token or token_sha256")
+            token_hash = token_hash.lower()
+            if token_hash in self.tokens:
+                raise ValueError(f"Client '{name}' reuses the token of '{self.tokens[token_hash]}'")
+
+            unknown = set(settings) - set(DEFAULT_POLICY)
+            if unknown:
+                raise ValueError(f"Client '{name}' has unknown settings: {', '.join(sorted(unknown))}")
+            policy = {**self.defaults, **settings}
+            if float(policy["weight"]) <= 0:
+                raise ValueError(f"Client '{name}' needs a positive weight")
+            policy["weight"] = float(policy["weight"])
+
+            self.tokens[token_hash] = name
+            self.policies[name] = policy
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests must carry a client token."""
+        return bool(self.tokens)
+
+    def authenticate(self, token: Optional[str]) -> Optional[str]:
+        """
+        Resolve a bearer token to a client name.
+
+        Args:
+            token: Token from the Authorization header (or None)
+
+        Returns:
+            Client name, ANONYMOUS_CLIENT if authentication is disabled, or
+            None if the token is missing or unknown
+        """
+        if not self.enabled:
+            return ANONYMOUS_CLIENT
+        if not token:
+            return None
+        return self.tokens.get(hash_token(token))
+
+    def policy(self, name: str) -> Dict[str, Any]:
+        """
+        Policy of a client.
+
+        LOCAL_CLIENT and ANONYMOUS_CLIENT (no tokens configured) are admins
+        with the default limits.
+        """
+        policy = self.policies.get(name)
+        if policy is not None:
+            return policy
+        admin = name == LOCAL_CLIENT or (name == ANONYMOUS_CLIENT and not self.enabled)
+        return {**self.defaults, "admin": admin}
+
+    def names(self) -> List[str]:
+        """Configured client names."""
+        return list(self.policies)
+
+
+def load_client_registry(clients_file: Optional[Path], shared_token: Optional[str]) -> ClientRegistry:
+    """
+    Build the client registry from BOLTZ_CLIENTS_FILE and BOLTZ_AUTH_TOKEN.
+
+    The shared token, if set, becomes an admin client named "default"
+    (unless the file already defines that name).
+
+    Args:
+        clients_file: JSON client definitions (or None)
+        shared_token: Single shared token (or None)
+
+    Returns:
+        ClientRegistry
+
+    Raises:
+        ValueError: If the file is malformed
+    """
+    clients: Dict[str, Dict[str, Any]] = {}
+    defaults: Dict[str, Any] = {}
+    if clients_file is not None:
+        with open(clients_file) as f:
+            config = json.load(f)
+        if not isinstance(config, dict) or not isinstance(config.get("clients", {}), dict):
+            raise ValueError(f"{clients_file}: expected {{\"clients\": {{name: settings}}}}")
+        clients = dict(config.get("clients", {}))
+        defaults = config.get("defaults", {})
+
+    if shared_token and SHARED_TOKEN_CLIENT not in clients:
+        clients[SHARED_TOKEN_CLIENT] = {"token": shared_token, "admin": True}
+
+    return ClientRegistry(clients, defaults)
+
+
+# ============================================================================
+# RATE LIMITS
+# ============================================================================
+
+def refill_bucket(
+    tokens: float, updated: float, now: float, per_minute: float, burst: float
+) -> float:
+    """
+    Token bucket refill: tokens available at time now.
+
+    Args:
+        tokens: Tokens left at time updated
+        updated: Time of the last update (POSIX seconds)
+        now: Current time
+        per_minute: Refill rate
+        burst: Bucket size
+
+    Returns:
+        Tokens available now (at most burst)
+    """
+    return min(burst, tokens + max(0.0, now - updated) * per_minute / 60.0)
+
+
+def bucket_size(policy: Dict[str, Any]) -> float:
+    """Burst size of a policy (defaults to one minute of submissions)."""
+    burst = policy.get("burst")
+    return float(burst if burst is not None else policy["submissions_per_minute"])
+
+
+class RateLimiter:
+    """
+    Per-client token buckets for job submissions (single process).
+
+    The multi-process server keeps the buckets in the shared job store
+    instead (JobStore.take_rate_tokens), using the same refill rule.
+    """
+
+    def __init__(self):
+        """Create empty buckets (a new client starts with a full bucket)."""
+        # Key: client name, Value: (tokens, last update time)
+        self.buckets: Dict[str, tuple] = {}
+
+    def take(self, client: str, cost: int, policy: Dict[str, Any]) -> float:
+        """
+        Take tokens for cost submissions if the client has enough.
+
+        Args:
+            client: Client name
+            cost: Number of jobs being submitted
+            policy: The client's policy
+
+        Returns:
+            0.0 if the submissions are allowed, else seconds until they
+            would be (nothing is taken)
+        """
+        per_minute = policy.get("submissions_per_minute")
+        if not per_minute:
+            return 0.0
+        burst = bucket_size(policy)
+        now = time.time()
+        tokens, updated = self.buckets.get(client, (burst, now))
+        tokens = refill_bucket(tokens, updated, now, per_minute, burst)
+        if tokens >= cost:
+            self.buckets[client] = (tokens - cost, now)
+            return 0.0
+        self.buckets[client] = (tokens, now)
+        # A batch larger than the bucket never fits; report the time to a full bucket
+        return (min(cost, burst) - tokens) * 60.0 / per_minute
+
+
+# ============================================================================
+# USAGE ACCOUNTING
+# ============================================================================
+
+class UsageLedger:
+    """
+    Per-client usage counters (single process).
+
+    The multi-process server keeps them in the shared job store instead
+    (JobStore.add_usage), so every process reports the same totals.
+    """
+
+    def __init__(self):
+        """Create an empty ledger."""
+        # Key: client name, Value: {counter: value}
+        self.counters: Dict[str, Dict[str, float]] = {}
+
+    def add(self, client: str, amounts: Dict[str, float]) -> None:
+        """
+        Add to a client's counters.
+
+        Args:
+            client: Client name
+            amounts: {counter: amount}, counters from USAGE_COUNTERS
+        """
+        counters = self.counters.setdefault(client, dict.fromkeys(USAGE_COUNTERS, 0))
+        for counter, amount in amounts.items():
+            counters[counter] = counters.get(counter, 0) + amount
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Copy of every client's counters."""
+        return {client: dict(counters) for client, counters in self.counters.items()}
+
+
+# ============================================================================
+# FAIR-SHARE GPU SCHEDULER
+# ============================================================================
+
+class FairScheduler:
+    """
+    Weighted fair queueing of GPUs across clients.
+
+    Jobs call acquire() before running and release() afterwards. Waiting
+    jobs are granted in order of their start tag (start-time fair
+    queueing), subject to:
+    - their GPUs being free (at most slots_per_device jobs per GPU)
+    - the client's max_gpus quota (a job larger than the quota may still
+      run when the client has nothing else running)
+    - optionally a total capacity in GPUs (coordinator mode, where the
+      GPUs belong to worker agents and only their number matters)
+
+    A job blocked on busy GPUs reserves them for the rest of the pass, so
+    later jobs cannot keep a multi-GPU job waiting forever. Jobs blocked
+    only by their own client's quota do not hold anyone else up.
+    """
+
+    def __init__(self, slots_per_device: int = 1, capacity: Optional[Callable[[], int]] = None):
+        """
+        Create an idle scheduler.
+
+        Args:
+            slots_per_device: Jobs allowed on one GPU at the same time
+            capacity: Function returning the total number of GPUs (count
+                      mode); None to schedule specific GPU IDs
+        """
+        self.slots_per_device = max(1, slots_per_device)
+        self.capacity = capacity
+        # Virtual time: start tag of the last granted job
+        self.virtual_time = 0.0
+        # Key: client name, Value: finish tag of its last queued job
+        self.finish_tags: Dict[str, float] = {}
+        # Key: job_id, Value: waiting request
+        self.waiting: Dict[str, Dict[str, Any]] = {}
+        # Key: job_id, Value: granted request (with "granted_at")
+        self.running: Dict[str, Dict[str, Any]] = {}
+        # Key: GPU ID, Value: number of jobs using it
+        self.busy: Dict[int, int] = {}
+        # Key: client name, Value: GPUs in use
+        self.client_gpus: Dict[str, int] = {}
+        # Arrival order, breaks ties between equal start tags
+        self.arrivals = itertools.count()
+
+    def _dispatch(self) -> None:
+        """Grant every waiting job that may run now, in start tag order."""
+        reserved: Set[int] = set()
+        in_use = sum(request["units"] for request in self.running.values())
+        capacity = self.capacity() if self.capacity is not None else None
+
+        for request in sorted(self.waiting.values(), key=lambda r: (r["start_tag"], r["seq"])):
+            client = request["client"]
+            running = self.client_gpus.get(client, 0)
+            quota = request["max_gpus"]
+            if quota is not None and running > 0 and running + request["units"] > quota:
+                continue
+
+            devices = request["devices"]
+            if any(self.busy.get(d, 0) >= self.slots_per_device or d in reserved for d in devices):
+                reserved.update(devices)
+                continue
+
+            if capacity is not None and in_use + request["units"] > capacity:
+                # Keep the order: nobody overtakes the first job that does not fit
+                break
+
+            del self.waiting[request["job_id"]]
+            request["granted_at"] = time.time()
+            self.running[request["job_id"]] = request
+            for device in devices:
+                self.busy[device] = self.busy.get(device, 0) + 1
+            self.client_gpus[client] = running + request["units"]
+            in_use += request["units"]
+            self.virtual_time = max(self.virtual_time, request["start_tag"])
+            request["future"].set_result(None)
+
+    async def acquire(
+        self,
+        job_id: str,
+        client: str,
+        policy: Dict[str, Any],
+        devices: List[int],
+        units: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Wait until a job may use its GPUs.
+
+        Args:
+            job_id: Job ID
+            client: Client that submitted the job
+            policy: The client's policy (weight, max_gpus)
+            devices: GPU IDs the job runs on (empty in count mode)
+            units: GPUs the job counts as (default: len(devices))
+            poll_seconds: Re-check this often (count mode, where capacity
+                          changes without a release); None waits for releases
+        """
+        units = max(1, units if units is not None else len(devices))
+        start_tag = max(self.virtual_time, self.finish_tags.get(client, 0.0))
+        self.finish_tags[client] = start_tag + units / policy["weight"]
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[job_id] = {
+            "job_id": job_id,
+            "client": client,
+            "devices": list(devices),
+            "units": units,
+            "max_gpus": policy.get("max_gpus"),
+            "start_tag": start_tag,
+            "seq": next(self.arrivals),
+            "queued_at": time.time(),
+            "future": future,
+        }
+        try:
+            self._dispatch()
+            while not future.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), timeout=poll_seconds)
+                except asyncio.TimeoutError:
+                    self._dispatch()
+        except BaseException:
+            # Cancelled while waiting (or right after being granted)
+            if self.waiting.pop(job_id, None) is None and job_id in self.running:
+                self.release(job_id)
+            raise
+
+    def release(self, job_id: str) -> float:
+        """
+        Free a job's GPUs and let the next jobs in.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            GPU-seconds the job held (0.0 if it held nothing)
+        """
+        request = self.running.pop(job_id, None)
+        if request is None:
+            return 0.0
+        for device in request["devices"]:
+            self.busy[device] -= 1
+            if not self.busy[device]:
+                del self.busy[device]
+        self.client_gpus[request["client"]] -= request["units"]
+        if not self.client_gpus[request["client"]]:
+            del self.client_gpus[request["client"]]
+        self._dispatch()
+        return (time.time() - request["granted_at"]) * request["units"]
+
+    def can_hand_over(self, device: int) -> bool:
+        """Whether a GPU has a free slot that no waiting job is asking for."""
+        if self.busy.get(device, 0) >= self.slots_per_device:
+            return False
+        return not any(device in request["devices"] for request in self.waiting.values())
+
+    def move(self, job_id: str, devices: List[int]) -> bool:
+        """
+        Move a running job's reservation to other GPUs (e.g. after OOM).
+
+        Only GPUs that could be handed over right now are taken: they must
+        have a free slot and no waiting job may be asking for them, so a
+        move never jumps the queue. The client's quota is unchanged since
+        the number of GPUs stays the same.
+
+        Args:
+            job_id: Job ID (must be running)
+            devices: New GPU IDs, as many as the job holds now
+
+        Returns:
+            True if the reservation moved, False if it was left as it was
+        """
+        request = self.running.get(job_id)
+        if request is None or self.capacity is not None or len(devices) != len(request["devices"]):
+            return False
+
+        if not all(d in request["devices"] or self.can_hand_over(d) for d in devices):
+            return False
+
+        for device in request["devices"]:
+            self.busy[device] -= 1
+            if not self.busy[device]:
+                del self.busy[device]
+        request["devices"] = list(devices)
+        for device in devices:
+            self.busy[device] = self.busy.get(device, 0) + 1
+        # The old GPUs may let waiting jobs in
+        self._dispatch()
+        return True
+
+    def queue_positions(self) -> Dict[str, int]:
+        """1-based position of every waiting job in grant order."""
+        order = sorted(self.waiting.values(), key=lambda r: (r["start_tag"], r["seq"]))
+        return {request["job_id"]: position for position, request in enumerate(order, start=1)}
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position of a waiting job in grant order (None if not waiting)."""
+        return self.queue_positions().get(job_id)
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Running GPUs and queued jobs per client."""
+        clients: Dict[str, Dict[str, int]] = {}
+        for request in self.running.values():
+            entry = clients.setdefault(request["client"], {"running_gpus": 0, "queued_jobs": 0})
+            entry["running_gpus"] += request["units"]
+        for request in self.waiting.values():
+            entry = clients.setdefault(request["client"], {"running_gpus": 0, "queued_jobs": 0})
+            entry["queued_jobs"] += 1
+        return clients
+
+
+# ============================================================================
+# HTTP MIDDLEWARE
+# ============================================================================
+
+class ClientAuthMiddleware:
+    """
+    ASGI middleware: authenticate MCP requests and count their bytes.
+
+    Requests below path_prefix must carry "Authorization: Bearer <token>"
+    when client tokens are configured; others get 401. Request and
+    response body sizes are reported per client through record_bytes.
+    Other paths (/ready, /cluster/...) pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app,
+        registry: ClientRegistry,
+        record_bytes: Callable[[str, int, int], None],
+        path_prefix: str = "/mcp",
+    ):
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: Inner ASGI app
+            registry: Client tokens
+            record_bytes: Called as record_bytes(client, bytes_in, bytes_out)
+                          after each request
+            path_prefix: Paths that require a client token
+        """
+        self.app = app
+        self.registry = registry
+        self.record_bytes = record_bytes
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        client = self.registry.authenticate(bearer_token(scope))
+        if client is None:
+            from starlette.responses import JSONResponse
+
+            response = JSONResponse(
+                {"error": "Missing or invalid client token"},
+                status_code=401,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+            await response(scope, receive, send)
+            return
+
+        sizes = {"in": 0, "out": 0}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes["in"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.body":
+                sizes["out"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            self.record_bytes(client, sizes["in"], sizes["out"])
+
+
+def bearer_token(scope: Dict[str, Any]) -> Optional[str]:
+    """Token from an ASGI scope's Authorization header (or None)."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            return parse_bearer(value.decode("latin-1"))
+    return None
+
+
+def parse_bearer(header: Optional[str]) -> Optional[str]:
+    """Extract the token from an "Authorization: Bearer <token>" value."""
+    if header and header[:7].lower() == "bearer ":
+        return header[7:].strip() or None
+    return None
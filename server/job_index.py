@@ -0,0 +1,231 @@
+"""
+Job index for the Boltz MCP Server.
+
+list_jobs used to sort the whole job table by its ISO created_at string on
+every call. On a server that has processed hundreds of thousands of jobs
+that is both slow and wasteful, so this module keeps a small index next to
+the job table:
+
+- An ordered list of (created timestamp, job_id) keys, newest last, so pages
+  can be located with bisect instead of sorting
+- Secondary indexes (status, batch_id, filename, sequence_hash) mapping a
+  value to the set of job IDs that have it
+
+Pagination uses opaque cursors encoding the (timestamp, job_id) key of the
+last returned job, so pages stay stable while new jobs are being added.
+"""
+
+import base64
+import bisect
+import heapq
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+# Job record fields that get a secondary index
+INDEXED_FIELDS = ("status", "batch_id", "filename", "sequence_hash")
+
+
+def parse_timestamp(value: str) -> float:
+    """
+    Convert an ISO 8601 timestamp (as stored in job records) to epoch seconds.
+
+    Args:
+        value: ISO timestamp, e.g. "2024-05-01T12:00:00"
+
+    Returns:
+        POSIX timestamp
+
+    Raises:
+        ValueError: If the string is not a valid ISO timestamp
+    """
+    return datetime.fromisoformat(value).timestamp()
+
+
+def encode_cursor(key: Tuple[float, str]) -> str:
+    """Encode an index key as an opaque, URL-safe cursor string."""
+    raw = f"{key[0]!r}|{key[1]}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, job_id = raw.split("|", 1)
+        return float(timestamp), job_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class JobIndex:
+    """
+    Ordered and secondary indexes over the job table.
+
+    The index stores only keys; job records themselves stay in the jobs
+    dictionary. Call add() when a job is created and update() whenever an
+    indexed field (normally "status") changes.
+    """
+
+    def __init__(self):
+        """Create an empty index."""
+        # Sorted (timestamp, job_id) keys, oldest first
+        self.order: List[Tuple[float, str]] = []
+        # Key: job_id, Value: its (timestamp, job_id) key
+        self.keys: Dict[str, Tuple[float, str]] = {}
+        # Key: field name, Value: {field value: set of job_ids}
+        self.by_field: Dict[str, Dict[Any, set]] = {field: {} for field in INDEXED_FIELDS}
+        # Key: job_id, Value: {field name: indexed value}
+        self.values: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def add(self, job_id: str, record: Dict[str, Any]) -> None:
+        """
+        Index a newly created job.
+
+        Args:
+            job_id: Job ID
+            record: Job record (must contain "created_at")
+        """
+        if job_id in self.keys:
+            self.remove(job_id)
+
+        key = (parse_timestamp(record["created_at"]), job_id)
+        self.keys[job_id] = key
+        # Jobs are created in time order, so this is almost always an append
+        if not self.order or key > self.order[-1]:
+            self.order.append(key)
+        else:
+            bisect.insort(self.order, key)
+
+        self.values[job_id] = {}
+        for field in INDEXED_FIELDS:
+            self.update(job_id, field, record.get(field))
+
+    def update(self, job_id: str, field: str, value: Any) -> None:
+        """
+        Re-index one field of a job (e.g. after a status change).
+
+        Unknown job IDs are ignored, so callers need not check whether a
+        job was indexed.
+
+        Args:
+            job_id: Job ID
+            field: One of INDEXED_FIELDS
+            value: New value (None removes the job from that index)
+        """
+        current = self.values.get(job_id)
+        if current is None:
+            return
+
+        old_value = current.get(field)
+        if old_value == value and field in current:
+            return
+
+        buckets = self.by_field[field]
+        if old_value is not None:
+            bucket = buckets.get(old_value)
+            if bucket is not None:
+                bucket.discard(job_id)
+                if not bucket:
+                    del buckets[old_value]
+        if value is not None:
+            buckets.setdefault(value, set()).add(job_id)
+        current[field] = value
+
+    def remove(self, job_id: str) -> None:
+        """Drop a job from every index."""
+        key = self.keys.pop(job_id, None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self.order, key)
+        if position < len(self.order) and self.order[position] == key:
+            del self.order[position]
+        for field in INDEXED_FIELDS:
+            self.update(job_id, field, None)
+        del self.values[job_id]
+
+    def count(self, field: str, value: Any) -> int:
+        """Number of jobs whose indexed field equals value."""
+        return len(self.by_field[field].get(value, ()))
+
+    def query(
+        self,
+        filters: Dict[str, List[Any]],
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Find job IDs matching the filters, newest first.
+
+        Args:
+            filters: {indexed field: accepted values}; a job matches if, for
+                     every field, its value is one of the accepted values
+            limit: Maximum number of job IDs to return
+            cursor: Cursor from a previous page (continue after that job)
+            created_after: Only jobs created at or after this POSIX timestamp
+            created_before: Only jobs created before this POSIX timestamp
+
+        Returns:
+            (job IDs, cursor for the next page or None if this was the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        # Key range [low, high) of the ordered list that is still eligible
+        high = len(self.order)
+        if cursor is not None:
+            high = bisect.bisect_left(self.order, decode_cursor(cursor))
+        if created_before is not None:
+            high = min(high, bisect.bisect_left(self.order, (created_before, "")))
+        low = 0
+        if created_after is not None:
+            low = bisect.bisect_left(self.order, (created_after, ""))
+        if low >= high or limit <= 0:
+            return [], None
+
+        # Candidate sets: union of the buckets for each filtered field
+        candidate_sets = []
+        for field, accepted in filters.items():
+            buckets = self.by_field[field]
+            if len(accepted) == 1:
+                # Common case: use the bucket itself instead of copying it
+                candidate_sets.append(buckets.get(accepted[0], set()))
+            else:
+                candidate_sets.append(set().union(*(buckets.get(v, set()) for v in accepted)))
+        candidate_sets.sort(key=len)
+
+        # Walking the ordered list visits about (limit * total / matches) keys,
+        # while picking from the candidate set costs about len(candidates)
+        smallest = len(candidate_sets[0]) if candidate_sets else 0
+        if candidate_sets and smallest * smallest <= (limit + 1) * len(self.order):
+            # Selective filter: take the newest matches from the small candidate set
+            matches = candidate_sets[0].intersection(*candidate_sets[1:])
+            low_key = self.order[low]
+            high_key = self.order[high - 1]
+            page = heapq.nlargest(
+                limit + 1,
+                (self.keys[job_id] for job_id in matches
+                 if low_key <= self.keys[job_id] <= high_key),
+            )
+        else:
+            # Broad or no filter: walk the ordered list backwards from the cursor
+            page = []
+            for position in range(high - 1, low - 1, -1):
+                key = self.order[position]
+                if all(key[1] in candidates for candidates in candidate_sets):
+                    page.append(key)
+                    if len(page) > limit:
+                        break
+
+        # One extra match tells us whether there is a next page
+        next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        return [key[1] for key in page[:limit]], next_cursor
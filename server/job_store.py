@@ -0,0 +1,580 @@
+"""
+Shared job store for multi-process HTTP serving.
+
+A single Python process spends most of a large request on JSON and base64
+work while holding the GIL, so one busy client downloading results slows
+every other client down. With BOLTZ_HTTP_WORKERS > 1 the server runs
+several HTTP worker processes behind one port, and this module gives them
+one view of the job table:
+
+- jobs:        one row per job (the full JSON record, plus the fields
+               list_jobs filters on as indexed columns)
+- submissions: queue of accepted jobs waiting for the leader to run them
+- heartbeats:  cluster worker heartbeats received by any process
+- usage:       per-client usage counters (see fair_share.py)
+- rate_limits: per-client submission token buckets
+- meta:        small key/value table (e.g. the leader's readiness)
+
+The database is SQLite in WAL mode, so readers in every process never
+block the writer. Exactly one process (the "leader", elected with a file
+lock) owns the GPUs: it claims submissions and runs inference, while the
+other processes only answer requests from the store.
+
+Writes never run on the caller's thread: each process has one writer
+thread that commits queued writes in batches (one transaction per batch),
+so the event loop never waits for the database lock held by another
+process. Usage counters are summed in memory and written at most every
+USAGE_FLUSH_SECONDS.
+"""
+
+import os
+import json
+import time
+import fcntl
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, IO, Callable
+
+from job_index import INDEXED_FIELDS, parse_timestamp, encode_cursor, decode_cursor
+from fair_share import bucket_size, refill_bucket
+
+# How long a process waits for a database lock before giving up (ms)
+BUSY_TIMEOUT_MS = 10000
+
+# Usage counters change on every HTTP request; they are summed in memory
+# and written at most this often (seconds)
+USAGE_FLUSH_SECONDS = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id        TEXT PRIMARY KEY,
+    created       REAL NOT NULL,
+    status        TEXT,
+    batch_id      TEXT,
+    filename      TEXT,
+    sequence_hash TEXT,
+    record        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created, job_id);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created, job_id);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch_id, created, job_id);
+CREATE INDEX IF NOT EXISTS jobs_filename ON jobs (filename, created, job_id);
+CREATE INDEX IF NOT EXISTS jobs_sequence ON jobs (sequence_hash, created, job_id);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id     TEXT NOT NULL,
+    params     TEXT NOT NULL,
+    claimed_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS heartbeats (
+    worker_id   TEXT PRIMARY KEY,
+    payload     TEXT NOT NULL,
+    received_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS usage (
+    client  TEXT NOT NULL,
+    counter TEXT NOT NULL,
+    value   REAL NOT NULL,
+    PRIMARY KEY (client, counter)
+);
+
+CREATE TABLE IF NOT EXISTS rate_limits (
+    client  TEXT PRIMARY KEY,
+    tokens  REAL NOT NULL,
+    updated REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    SQLite-backed job table shared by the server's HTTP worker processes.
+
+    Each process opens two connections: one for reads (a lock serializes
+    them) and one owned by the writer thread. Write methods only queue the
+    write and return at once; writes are applied in the order they were
+    queued. Call flush() when another process must see them right away.
+
+    claim(), take_rate_tokens() and requeue_claimed() need a result, so
+    they run on the writer thread and block until it is done; async code
+    calls them (and reads) through asyncio.to_thread().
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open (and if needed create) the store.
+
+        Args:
+            path: Database file, e.g. ~/.boltz_mcp/outputs/jobs.db
+        """
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        # isolation_level=None: autocommit, transactions are explicit
+        self.db = self._connect()
+        with self.lock:
+            self.db.executescript(_SCHEMA)
+
+        # Write queue, drained by the writer thread
+        self.writer_db = self._connect()
+        self.write_condition = threading.Condition()
+        # Items: ("sql", statement, params) or ("call", function, future)
+        self.pending: List[Tuple[Any, ...]] = []
+        # Key: job_id, Value: index in pending of its queued record (coalesced)
+        self.pending_jobs: Dict[str, int] = {}
+        # Key: (client, counter), Value: amount not yet written
+        self.pending_usage: Dict[Tuple[str, str], float] = {}
+        # Writes queued / committed so far (flush() waits for them to meet)
+        self.queued = 0
+        self.committed = 0
+        self.closing = False
+        self.writer = threading.Thread(target=self._write_loop, name="job-store-writer", daemon=True)
+        self.writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the store's settings."""
+        # isolation_level=None: autocommit, transactions are explicit
+        db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        db.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("PRAGMA synchronous = NORMAL")
+        return db
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _queue(self, item: Tuple[Any, ...], job_id: Optional[str] = None) -> None:
+        """
+        Queue a write for the writer thread.
+
+        Args:
+            item: ("sql", statement, params) or ("call", function, future)
+            job_id: Set for job records; a newer record for the same job
+                    replaces one that is still queued
+        """
+        with self.write_condition:
+            if job_id is not None and job_id in self.pending_jobs:
+                self.pending[self.pending_jobs[job_id]] = item
+            else:
+                if job_id is not None:
+                    self.pending_jobs[job_id] = len(self.pending)
+                self.pending.append(item)
+            self.queued += 1
+            self.write_condition.notify_all()
+
+    def _call(self, function: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run function(writer connection) on the writer thread and wait for its result."""
+        if self.closing:
+            raise RuntimeError("Job store is closed")
+        future: Future = Future()
+        self._queue(("call", function, future))
+        return future.result()
+
+    def _write_loop(self) -> None:
+        """Writer thread: commit queued writes in batches until close()."""
+        while True:
+            with self.write_condition:
+                self.write_condition.wait_for(
+                    lambda: self.pending or self.committed < self.queued or self.closing,
+                    timeout=USAGE_FLUSH_SECONDS,
+                )
+                batch, self.pending, self.pending_jobs = self.pending, [], {}
+                usage, self.pending_usage = self.pending_usage, {}
+                target, closing = self.queued, self.closing
+
+            self._apply(batch, usage)
+
+            with self.write_condition:
+                self.committed = target
+                self.write_condition.notify_all()
+            if closing:
+                return
+
+    def _apply(self, batch: List[Tuple[Any, ...]], usage: Dict[Tuple[str, str], float]) -> None:
+        """Apply one batch: runs of statements share a transaction, calls run in order."""
+        statements: List[Tuple[str, Any]] = []
+        for item in batch:
+            if item[0] == "sql":
+                statements.append(item[1:])
+                continue
+            self._commit(statements)
+            statements = []
+            _, function, future = item
+            try:
+                future.set_result(function(self.writer_db))
+            except BaseException as e:
+                future.set_exception(e)
+
+        if usage:
+            statements.append((
+                "INSERT INTO usage (client, counter, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (client, counter) DO UPDATE SET value = value + excluded.value",
+                [(client, counter, amount) for (client, counter), amount in usage.items()],
+            ))
+        self._commit(statements)
+
+    def _commit(self, statements: List[Tuple[str, Any]]) -> None:
+        """Execute statements in one transaction (params lists use executemany)."""
+        if not statements:
+            return
+        try:
+            self.writer_db.execute("BEGIN IMMEDIATE")
+            try:
+                for statement, params in statements:
+                    if isinstance(params, list):
+                        self.writer_db.executemany(statement, params)
+                    else:
+                        self.writer_db.execute(statement, params)
+                self.writer_db.execute("COMMIT")
+            except BaseException:
+                self.writer_db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Nobody is waiting for these writes; report and keep going
+            print(f"[WARNING] Job store: {len(statements)} write(s) lost: {e}", file=sys.stderr)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every write queued so far (usage included) is committed.
+
+        Args:
+            timeout: Seconds to wait at most (None = no limit)
+
+        Returns:
+            True if everything was committed in time
+        """
+        with self.write_condition:
+            # Counts as a write so the writer wakes up for pending usage too
+            self.queued += 1
+            target = self.queued
+            self.write_condition.notify_all()
+            return self.write_condition.wait_for(lambda: self.committed >= target, timeout=timeout)
+
+    def close(self) -> None:
+        """Commit what is still queued and stop the writer thread."""
+        with self.write_condition:
+            self.closing = True
+            self.write_condition.notify_all()
+        self.writer.join()
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def put_job(self, job_id: str, record: Dict[str, Any]) -> None:
+        """
+        Insert or replace a job record.
+
+        Args:
+            job_id: Job ID
+            record: Job record (must contain "created_at"; must be JSON-serializable)
+        """
+        row = (
+            job_id,
+            parse_timestamp(record["created_at"]),
+            *(record.get(field) for field in INDEXED_FIELDS),
+            json.dumps(record, default=str),
+        )
+        self._queue((
+            "sql",
+            "INSERT OR REPLACE INTO jobs (job_id, created, status, batch_id, filename, "
+            "sequence_hash, record) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            row,
+        ), job_id=job_id)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load one job record (None if it does not exist)."""
+        with self.lock:
+            row = self.db.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_jobs(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load several job records at once; missing IDs are left out."""
+        if not job_ids:
+            return {}
+        placeholders = ",".join("?" * len(job_ids))
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT job_id, record FROM jobs WHERE job_id IN ({placeholders})", job_ids
+            ).fetchall()
+        return {job_id: json.loads(record) for job_id, record in rows}
+
+    def get_statuses(self, job_ids: List[str]) -> Dict[str, str]:
+        """Current status of several jobs; missing IDs are left out."""
+        if not job_ids:
+            return {}
+        placeholders = ",".join("?" * len(job_ids))
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT job_id, status FROM jobs WHERE job_id IN ({placeholders})", job_ids
+            ).fetchall()
+        return dict(rows)
+
+    def count(self, field: str, value: Any) -> int:
+        """Number of jobs whose indexed field equals value."""
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Field {field} is not indexed")
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM jobs WHERE {field} = ?", (value,)).fetchone()[0]
+
+    def total(self) -> int:
+        """Number of jobs in the store."""
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def query(
+        self,
+        filters: Dict[str, List[Any]],
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Find job IDs matching the filters, newest first.
+
+        Same arguments, ordering and cursors as JobIndex.query(), so
+        list_jobs pages look identical in single- and multi-process mode.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        if limit <= 0:
+            return [], None
+
+        clauses, params = [], []
+        for field, accepted in filters.items():
+            if field not in INDEXED_FIELDS:
+                raise ValueError(f"Field {field} is not indexed")
+            clauses.append(f"{field} IN ({','.join('?' * len(accepted))})")
+            params.extend(accepted)
+        if cursor is not None:
+            timestamp, job_id = decode_cursor(cursor)
+            clauses.append("(created < ? OR (created = ? AND job_id < ?))")
+            params.extend([timestamp, timestamp, job_id])
+        if created_after is not None:
+            clauses.append("created >= ?")
+            params.append(created_after)
+        if created_before is not None:
+            clauses.append("created < ?")
+            params.append(created_before)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            # One extra row tells us whether there is a next page
+            page = self.db.execute(
+                f"SELECT created, job_id FROM jobs {where} ORDER BY created DESC, job_id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        next_cursor = encode_cursor(tuple(page[limit - 1])) if len(page) > limit else None
+        return [job_id for _, job_id in page[:limit]], next_cursor
+
+    # ------------------------------------------------------------------
+    # Submission queue
+    # ------------------------------------------------------------------
+
+    def enqueue(self, job_id: str, params: Dict[str, Any]) -> None:
+        """
+        Queue an accepted job for the leader.
+
+        Args:
+            job_id: Job ID (its record must already be stored)
+            params: Keyword arguments for dispatch_inference (JSON-serializable)
+        """
+        self._queue(("sql", "INSERT INTO submissions (job_id, params) VALUES (?, ?)", (job_id, json.dumps(params))))
+
+    def claim(self, owner: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Take every unclaimed submission, oldest first.
+
+        Args:
+            owner: Identifier of the claiming process
+
+        Returns:
+            List of (job_id, params)
+        """
+        def claim_rows(db: sqlite3.Connection) -> List[Tuple[int, str, str]]:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = db.execute(
+                    "SELECT seq, job_id, params FROM submissions WHERE claimed_by IS NULL ORDER BY seq"
+                ).fetchall()
+                if rows:
+                    db.execute(
+                        f"UPDATE submissions SET claimed_by = ? WHERE seq IN ({','.join('?' * len(rows))})",
+                        (owner, *(seq for seq, _, _ in rows)),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            return rows
+
+        rows = self._call(claim_rows)
+        return [(job_id, json.loads(params)) for _, job_id, params in rows]
+
+    def finish(self, job_id: str) -> None:
+        """Drop a job's submission once it has completed or failed."""
+        self._queue(("sql", "DELETE FROM submissions WHERE job_id = ?", (job_id,)))
+
+    def requeue_claimed(self) -> int:
+        """
+        Release submissions claimed by a previous leader that exited.
+
+        Returns:
+            Number of submissions put back in the queue
+        """
+        return self._call(lambda db: db.execute(
+            "UPDATE submissions SET claimed_by = NULL WHERE claimed_by IS NOT NULL"
+        ).rowcount)
+
+    # ------------------------------------------------------------------
+    # Client usage and rate limits
+    # ------------------------------------------------------------------
+
+    def add_usage(self, client: str, amounts: Dict[str, float]) -> None:
+        """
+        Add to a client's usage counters (same semantics as UsageLedger.add).
+
+        Only sums in memory; the writer thread writes the totals at most
+        every USAGE_FLUSH_SECONDS.
+        """
+        with self.write_condition:
+            for counter, amount in amounts.items():
+                key = (client, counter)
+                self.pending_usage[key] = self.pending_usage.get(key, 0.0) + amount
+
+    def usage(self) -> Dict[str, Dict[str, float]]:
+        """
+        Every client's usage counters.
+
+        Includes this process's unwritten amounts; other processes' amounts
+        may lag by up to USAGE_FLUSH_SECONDS.
+        """
+        with self.lock:
+            rows = self.db.execute("SELECT client, counter, value FROM usage").fetchall()
+        with self.write_condition:
+            pending = list(self.pending_usage.items())
+        counters: Dict[str, Dict[str, float]] = {}
+        for client, counter, value in rows:
+            counters.setdefault(client, {})[counter] = value
+        for (client, counter), amount in pending:
+            entry = counters.setdefault(client, {})
+            entry[counter] = entry.get(counter, 0.0) + amount
+        return counters
+
+    def take_rate_tokens(self, client: str, cost: int, policy: Dict[str, Any]) -> float:
+        """
+        Token bucket check shared by all processes (see RateLimiter.take).
+
+        Returns:
+            0.0 if the submissions are allowed, else seconds until they would be
+        """
+        per_minute = policy.get("submissions_per_minute")
+        if not per_minute:
+            return 0.0
+        burst = bucket_size(policy)
+        now = time.time()
+
+        def take(db: sqlite3.Connection) -> Tuple[float, bool]:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT tokens, updated FROM rate_limits WHERE client = ?", (client,)
+                ).fetchone()
+                tokens = refill_bucket(*(row or (burst, now)), now, per_minute, burst)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                db.execute(
+                    "INSERT OR REPLACE INTO rate_limits (client, tokens, updated) VALUES (?, ?, ?)",
+                    (client, tokens, now),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            return tokens, allowed
+
+        tokens, allowed = self._call(take)
+        if allowed:
+            return 0.0
+        return (min(cost, burst) - tokens) * 60.0 / per_minute
+
+    # ------------------------------------------------------------------
+    # Worker heartbeats and metadata
+    # ------------------------------------------------------------------
+
+    def put_heartbeat(self, worker_id: str, payload: Dict[str, Any]) -> None:
+        """Record a cluster worker heartbeat received by any process."""
+        self._queue((
+            "sql",
+            "INSERT OR REPLACE INTO heartbeats (worker_id, payload, received_at) VALUES (?, ?, ?)",
+            (worker_id, json.dumps(payload), time.time()),
+        ))
+
+    def heartbeats_since(self, since: float) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Heartbeats received after a point in time.
+
+        Returns:
+            List of (payload, received_at), oldest first
+        """
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT payload, received_at FROM heartbeats WHERE received_at > ? ORDER BY received_at",
+                (since,),
+            ).fetchall()
+        return [(json.loads(payload), received_at) for payload, received_at in rows]
+
+    def set_meta(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key."""
+        self._queue(("sql", "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value))))
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Load a value stored with set_meta()."""
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+
+def try_acquire_leadership(lock_path: Path) -> Optional[IO]:
+    """
+    Try to become the leader process (the one that runs inference).
+
+    Uses an exclusive, non-blocking flock. The lock is released by the
+    operating system when the process exits, so another process can take
+    over if the leader dies.
+
+    Args:
+        lock_path: Lock file shared by all processes
+
+    Returns:
+        Open lock file (keep a reference for as long as you lead), or None
+        if another process is the leader
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    handle = open(lock_path, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(f"{os.getpid()}\n")
+    handle.flush()
+    return handle
@@ -0,0 +1,438 @@
+"""
+Boltz model weights: prefetch, integrity check and page-cache warm-up.
+
+Boltz downloads its checkpoints (several GB) and the CCD / molecule library
+into its --cache directory the first time it runs, so on a fresh deploy the
+first user waits minutes for downloads, and after a reboot every job reads
+the checkpoint from a cold disk. The server does this work at startup:
+
+1. Prefetch: download missing files from the URLs Boltz uses, into the
+   layout Boltz expects, hashing while streaming and renaming atomically
+2. Verify: compare SHA256 checksums with pinned values (a sha256sum-style
+   file) or, failing that, the Hugging Face LFS metadata. Verified files
+   are recorded with size and mtime, so later startups only re-hash files
+   that changed (mode "full" always re-hashes). Corrupt files are moved
+   aside and downloaded again
+3. Warm: read the checkpoints once so they sit in the OS page cache
+
+Usage:
+    from model_weights import prepare_weights
+    report = prepare_weights(Path("~/.boltz_mcp/models"), "boltz2")
+"""
+
+import os
+import json
+import shutil
+import tarfile
+import hashlib
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+import httpx
+
+# ============================================================================
+# WEIGHT SETS
+# ============================================================================
+
+# Files Boltz downloads into its cache, per model generation (see boltz/main.py)
+# - urls: tried in order
+# - hf_repo: Hugging Face repository whose LFS metadata has the checksum
+# - extract: directory Boltz expects the archive to be unpacked to
+# - warm: read into the page cache (the checkpoint loaded for every job)
+WEIGHT_SETS: Dict[str, List[Dict[str, Any]]] = {
+    "boltz2": [
+        {
+            "name": "boltz2_conf.ckpt",
+            "urls": [
+                "https://huggingface.co/boltz-community/boltz-2/resolve/main/boltz2_conf.ckpt",
+                "https://model-gateway.boltz.bio/boltz2_conf.ckpt",
+            ],
+            "hf_repo": "boltz-community/boltz-2",
+            "warm": True,
+        },
+        {
+            "name": "boltz2_aff.ckpt",
+            "urls": [
+                "https://huggingface.co/boltz-community/boltz-2/resolve/main/boltz2_aff.ckpt",
+                "https://model-gateway.boltz.bio/boltz2_aff.ckpt",
+            ],
+            "hf_repo": "boltz-community/boltz-2",
+            # Only loaded for affinity predictions
+            "warm": False,
+        },
+        {
+            "name": "mols.tar",
+            "urls": ["https://huggingface.co/boltz-community/boltz-2/resolve/main/mols.tar"],
+            "hf_repo": "boltz-community/boltz-2",
+            "extract": "mols",
+            "warm": False,
+        },
+    ],
+    "boltz1": [
+        {
+            "name": "ccd.pkl",
+            "urls": ["https://huggingface.co/boltz-community/boltz-1/resolve/main/ccd.pkl"],
+            "hf_repo": "boltz-community/boltz-1",
+            "warm": True,
+        },
+        {
+            "name": "boltz1_conf.ckpt",
+            "urls": ["https://huggingface.co/boltz-community/boltz-1/resolve/main/boltz1_conf.ckpt"],
+            "hf_repo": "boltz-community/boltz-1",
+            "warm": True,
+        },
+    ],
+}
+
+# Verification modes: "auto" re-hashes only changed files, "full" always
+# re-hashes, "off" only checks that files exist
+VERIFY_MODES = ("auto", "full", "off")
+
+# Record of verified files inside the cache directory
+VERIFIED_RECORD = ".verified.json"
+
+# Read size for hashing, downloading and page-cache warm-up
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Hugging Face API listing files (with LFS sha256) of a repository
+HF_TREE_URL = "https://huggingface.co/api/models/{repo}/tree/main"
+
+# Timeouts: connecting / between chunks (downloads themselves can take minutes)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=15.0)
+
+
+# ============================================================================
+# CHECKSUMS
+# ============================================================================
+
+def load_pinned_checksums(checksum_file: Optional[Path]) -> Dict[str, str]:
+    """
+    Read pinned checksums in sha256sum format ("<hex>  <file name>").
+
+    Args:
+        checksum_file: File to read (None: no pinned checksums)
+
+    Returns:
+        {file name: lowercase hex SHA256}
+    """
+    if checksum_file is None:
+        return {}
+    checksums = {}
+    with open(checksum_file) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and not line.startswith("#"):
+                # sha256sum marks binary mode with a leading "*"
+                checksums[Path(parts[1].lstrip("*")).name] = parts[0].lower()
+    return checksums
+
+
+def fetch_hf_checksums(repo: str) -> Dict[str, str]:
+    """
+    Look up SHA256 checksums of a Hugging Face repository's LFS files.
+
+    Args:
+        repo: Repository name, e.g. "boltz-community/boltz-2"
+
+    Returns:
+        {file name: lowercase hex SHA256}; empty if the API is unreachable
+    """
+    try:
+        response = httpx.get(HF_TREE_URL.format(repo=repo), timeout=30.0, follow_redirects=True)
+        response.raise_for_status()
+        return {
+            entry["path"]: entry["lfs"]["oid"].lower()
+            for entry in response.json()
+            if entry.get("lfs", {}).get("oid")
+        }
+    except (httpx.HTTPError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def hash_file(path: Path) -> str:
+    """
+    SHA256 of a file, read in large chunks.
+
+    Reading the file also leaves it in the page cache, so hashing doubles
+    as warm-up.
+    """
+    hash_obj = hashlib.sha256()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hash_obj.update(view[:n])
+    return hash_obj.hexdigest()
+
+
+def warm_file(path: Path) -> int:
+    """
+    Read a file once so the OS keeps it in the page cache.
+
+    Returns:
+        Number of bytes read
+    """
+    buffer = bytearray(CHUNK_SIZE)
+    total = 0
+    with open(path, "rb", buffering=0) as f:
+        # Ask the kernel to start readahead for the whole file (Linux)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            total += n
+    return total
+
+
+# ============================================================================
+# DOWNLOAD AND EXTRACT
+# ============================================================================
+
+def download_file(urls: List[str], target: Path, expected_sha256: Optional[str]) -> str:
+    """
+    Download a file, hashing it while streaming, then rename into place.
+
+    Args:
+        urls: URLs to try in order
+        target: Final path
+        expected_sha256: Checksum the download must match (None: not checked)
+
+    Returns:
+        SHA256 of the downloaded file
+
+    Raises:
+        RuntimeError: If every URL fails or the checksum does not match
+    """
+    tmp_path = target.with_name(f".{target.name}.partial")
+    errors = []
+    for url in urls:
+        hash_obj = hashlib.sha256()
+        try:
+            with httpx.stream("GET", url, timeout=HTTP_TIMEOUT, follow_redirects=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        f.write(chunk)
+                        hash_obj.update(chunk)
+        except (httpx.HTTPError, OSError) as e:
+            errors.append(f"{url}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            continue
+
+        digest = hash_obj.hexdigest()
+        if expected_sha256 and digest != expected_sha256:
+            errors.append(f"{url}: checksum mismatch (got {digest}, expected {expected_sha256})")
+            tmp_path.unlink(missing_ok=True)
+            continue
+
+        os.replace(tmp_path, target)
+        return digest
+
+    raise RuntimeError(f"Could not download {target.name}: " + "; ".join(errors))
+
+
+def extract_archive(archive: Path, cache_dir: Path, directory: str) -> None:
+    """
+    Unpack a tar archive that contains one top-level directory.
+
+    The archive is extracted next to the cache first and the directory is
+    renamed into place, so an interrupted extraction never leaves a
+    half-populated directory that Boltz would mistake for a complete one.
+
+    Args:
+        archive: Tar file
+        cache_dir: Cache directory
+        directory: Top-level directory inside the archive (e.g. "mols")
+
+    Raises:
+        RuntimeError: If the archive has unsafe paths or lacks the directory
+    """
+    staging = cache_dir / f".{directory}.extracting"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+    try:
+        with tarfile.open(archive, "r") as tar:
+            for member in tar.getmembers():
+                member_path = Path(member.name)
+                if member_path.is_absolute() or ".." in member_path.parts or member.issym() or member.islnk():
+                    raise RuntimeError(f"Unsafe path in {archive.name}: {member.name}")
+            tar.extractall(staging)
+        if not (staging / directory).is_dir():
+            raise RuntimeError(f"{archive.name} does not contain {directory}/")
+        os.replace(staging / directory, cache_dir / directory)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+# ============================================================================
+# STARTUP PREPARATION
+# ============================================================================
+
+def _load_verified(cache_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Read the record of previously verified files."""
+    record_path = cache_dir / VERIFIED_RECORD
+    if not record_path.exists():
+        return {}
+    try:
+        with open(record_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_verified(cache_dir: Path, verified: Dict[str, Dict[str, Any]]) -> None:
+    """Write the record of verified files atomically."""
+    record_path = cache_dir / VERIFIED_RECORD
+    tmp_path = record_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(verified, f, indent=2)
+    os.replace(tmp_path, record_path)
+
+
+def prepare_weights(
+    cache_dir: Path,
+    weight_set: str = "boltz2",
+    verify: str = "auto",
+    download: bool = True,
+    checksum_file: Optional[Path] = None,
+    log: Callable[[str], None] = lambda message: None,
+) -> Dict[str, Any]:
+    """
+    Make sure Boltz's weights are present, intact and in the page cache.
+
+    Args:
+        cache_dir: Boltz cache directory (--cache)
+        weight_set: Key of WEIGHT_SETS
+        verify: One of VERIFY_MODES
+        download: Download missing or corrupt files (False: only report them)
+        checksum_file: Optional sha256sum-style file with pinned checksums
+        log: Called with one-line progress messages
+
+    Returns:
+        Report with one entry per file (status, verification, size, seconds)
+        and the number of bytes warmed
+
+    Raises:
+        ValueError: If weight_set or verify is unknown
+        RuntimeError: If a file cannot be downloaded or fails verification
+    """
+    if weight_set not in WEIGHT_SETS:
+        raise ValueError(f"Unknown weight set '{weight_set}'. Use one of: {', '.join(WEIGHT_SETS)}")
+    if verify not in VERIFY_MODES:
+        raise ValueError(f"Unknown verify mode '{verify}'. Use one of: {', '.join(VERIFY_MODES)}")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    pinned = load_pinned_checksums(checksum_file)
+    hf_checksums: Dict[str, Dict[str, str]] = {}
+    verified = _load_verified(cache_dir)
+
+    def expected_checksum(spec: Dict[str, Any]) -> Optional[str]:
+        # Pinned values win; the Hugging Face API is only asked when needed
+        if spec["name"] in pinned:
+            return pinned[spec["name"]]
+        if verify == "off":
+            return None
+        repo = spec["hf_repo"]
+        if repo not in hf_checksums:
+            hf_checksums[repo] = fetch_hf_checksums(repo)
+        return hf_checksums[repo].get(spec["name"])
+
+    files = []
+    warmed_bytes = 0
+    for spec in WEIGHT_SETS[weight_set]:
+        path = cache_dir / spec["name"]
+        entry: Dict[str, Any] = {"name": spec["name"]}
+        start = time.perf_counter()
+        in_page_cache = False
+
+        # Boltz only reads the extracted directory; the archive may have
+        # been deleted to save space
+        if not path.exists() and spec.get("extract") and (cache_dir / spec["extract"]).is_dir():
+            entry.update(status="present", verification="extracted directory only")
+            files.append(entry)
+            continue
+
+        if path.exists():
+            entry["status"] = "present"
+            stat = path.stat()
+            record = verified.get(spec["name"], {})
+            unchanged = record.get("size") == stat.st_size and record.get("mtime_ns") == stat.st_mtime_ns
+
+            if verify == "off":
+                entry["verification"] = "skipped"
+            elif (verify == "auto" and unchanged and record.get("sha256")
+                  and pinned.get(spec["name"], record["sha256"]) == record["sha256"]):
+                entry["verification"] = "unchanged since last check"
+            else:
+                expected = expected_checksum(spec)
+                log(f"Verifying {spec['name']} ({stat.st_size / 1024**3:.1f} GB)")
+                digest = hash_file(path)
+                in_page_cache = True
+                if expected and digest != expected:
+                    # Keep the bad file for inspection, fetch a fresh copy
+                    corrupt = path.with_name(path.name + ".corrupt")
+                    os.replace(path, corrupt)
+                    entry["status"] = "corrupt"
+                    entry["moved_to"] = corrupt.name
+                    log(f"{spec['name']} failed verification; moved to {corrupt.name}")
+                else:
+                    entry["verification"] = "checksum" if expected else "no reference checksum"
+                    verified[spec["name"]] = {
+                        "sha256": digest,
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "checked_against": "pinned" if spec["name"] in pinned else ("huggingface" if expected else None),
+                    }
+
+        if not path.exists():
+            if not download:
+                # Boltz downloads missing files itself on the first job
+                entry.setdefault("status", "missing")
+                files.append(entry)
+                continue
+            expected = expected_checksum(spec)
+            log(f"Downloading {spec['name']}")
+            digest = download_file(spec["urls"], path, expected)
+            stat = path.stat()
+            verified[spec["name"]] = {
+                "sha256": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "checked_against": "pinned" if spec["name"] in pinned else ("huggingface" if expected else None),
+            }
+            entry["status"] = "redownloaded" if entry.get("status") == "corrupt" else "downloaded"
+            entry["verification"] = "checksum" if expected else "no reference checksum"
+            # Freshly written files are already in the page cache
+            in_page_cache = True
+
+        _save_verified(cache_dir, verified)
+
+        if spec.get("extract") and not (cache_dir / spec["extract"]).is_dir():
+            log(f"Extracting {spec['name']}")
+            extract_archive(path, cache_dir, spec["extract"])
+            entry["extracted"] = spec["extract"]
+
+        if spec.get("warm"):
+            if not in_page_cache:
+                log(f"Warming page cache with {spec['name']}")
+                warm_file(path)
+            warmed_bytes += path.stat().st_size
+            entry["warmed"] = True
+
+        entry["size_bytes"] = path.stat().st_size
+        entry["seconds"] = round(time.perf_counter() - start, 2)
+        files.append(entry)
+
+    return {
+        "weight_set": weight_set,
+        "cache_dir": str(cache_dir),
+        "verify": verify,
+        "files": files,
+        "warmed_bytes": warmed_bytes,
+    }
@@ -0,0 +1,217 @@
+"""
+Incremental diffusion sampling for the Boltz MCP Server.
+
+A "sample set" collects every diffusion sample ever generated for one input
+with one set of parameters (recycling steps, sampling steps, base seed).
+The diffusion_samples count is deliberately NOT part of the key, so asking
+for 5 samples after an earlier request for 1 only computes the 4 missing
+ones and merges them into the same ranked manifest.
+
+Layout on disk (one directory per sample set):
+
+    samples/<fingerprint>/
+        input.<ext>            Canonical copy of the input (stable file stem)
+        manifest.json          Runs and samples, ranked by confidence
+        run_0/                 First Boltz run (computes MSA + features)
+        run_1/                 Top-up run; processed/ and msa/ are hard-linked
+        ...                    from run_0 so Boltz skips MSA and preprocessing
+
+Top-up runs use seed = base_seed + number of existing samples, so every run
+draws new, reproducible samples.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# Bump when the fingerprint inputs change, so old sample sets are not reused
+FINGERPRINT_VERSION = 1
+
+# Name of the manifest file inside a sample set directory
+MANIFEST_NAME = "manifest.json"
+
+# Boltz intermediate directories that can be shared between runs
+REUSABLE_DIRS = ("processed", "msa")
+
+
+def sample_set_fingerprint(input_path: Path, params: Dict[str, Any]) -> str:
+    """
+    Compute the key of the sample set an input + parameters belong to.
+
+    Args:
+        input_path: Input file (hashed by content, not name)
+        params: Every parameter that affects samples except their count
+
+    Returns:
+        Hexadecimal fingerprint (first 24 chars of SHA256)
+    """
+    hash_obj = hashlib.sha256()
+    hash_obj.update(f"v{FINGERPRINT_VERSION}\n".encode("utf-8"))
+    hash_obj.update(input_path.suffix.lower().encode("utf-8"))
+    with open(input_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hash_obj.update(block)
+    hash_obj.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return hash_obj.hexdigest()[:24]
+
+
+def load_manifest(sample_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read a sample set manifest.
+
+    Args:
+        sample_dir: Sample set directory
+
+    Returns:
+        Manifest dictionary, or None if the set does not exist yet
+    """
+    manifest_path = sample_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(sample_dir: Path, manifest: Dict[str, Any]) -> None:
+    """
+    Write a manifest atomically (write to temp file, then rename).
+
+    Args:
+        sample_dir: Sample set directory
+        manifest: Manifest dictionary
+    """
+    manifest_path = sample_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def create_sample_set(sample_dir: Path, input_path: Path, fingerprint: str,
+                      params: Dict[str, Any], base_seed: int) -> Dict[str, Any]:
+    """
+    Create a new, empty sample set.
+
+    The input is copied to input.<ext> so every run sees the same file stem,
+    which is what Boltz keys its processed records and result folders on.
+
+    Args:
+        sample_dir: Directory to create
+        input_path: Original input file
+        fingerprint: Sample set key
+        params: Parameters included in the fingerprint
+        base_seed: Seed of the first run
+
+    Returns:
+        The new manifest (already saved)
+    """
+    sample_dir.mkdir(parents=True, exist_ok=True)
+    canonical_input = sample_dir / f"input{input_path.suffix}"
+    shutil.copyfile(input_path, canonical_input)
+
+    manifest = {
+        "fingerprint": fingerprint,
+        "input": canonical_input.name,
+        "params": params,
+        "base_seed": base_seed,
+        "runs": [],
+        "samples": [],
+    }
+    save_manifest(sample_dir, manifest)
+    return manifest
+
+
+def results_dir(run_dir: Path, input_stem: str) -> Path:
+    """Boltz writes into <out_dir>/boltz_results_<input stem>."""
+    return run_dir / f"boltz_results_{input_stem}"
+
+
+def prepare_topup_run(sample_dir: Path, manifest: Dict[str, Any], run_dir: Path) -> List[str]:
+    """
+    Seed a new run directory with the first run's MSA and features.
+
+    Files are hard-linked (copied if the filesystem does not support
+    links), so preparing a top-up costs almost no disk space or time.
+
+    Args:
+        sample_dir: Sample set directory
+        manifest: Sample set manifest (must have at least one run)
+        run_dir: New run directory (Boltz --out_dir)
+
+    Returns:
+        Names of the directories that were reused
+    """
+    input_stem = Path(manifest["input"]).stem
+    source = results_dir(sample_dir / manifest["runs"][0]["run_dir"], input_stem)
+    target = results_dir(run_dir, input_stem)
+    target.mkdir(parents=True, exist_ok=True)
+
+    def link_or_copy(src: str, dst: str) -> None:
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    reused = []
+    for name in REUSABLE_DIRS:
+        if (source / name).is_dir() and not (target / name).exists():
+            shutil.copytree(source / name, target / name, copy_function=link_or_copy)
+            reused.append(name)
+    return reused
+
+
+def merge_run(sample_dir: Path, manifest: Dict[str, Any], run_dir: Path, seed: int) -> int:
+    """
+    Add the samples produced by a run to the manifest and re-rank.
+
+    Boltz writes predictions/<stem>/<stem>_model_<k>.cif with a matching
+    confidence_<stem>_model_<k>.json. Samples are ranked across all runs by
+    confidence_score (highest first); samples without confidence go last.
+
+    Args:
+        sample_dir: Sample set directory
+        manifest: Manifest to update (saved on return)
+        run_dir: Finished run directory
+        seed: Seed used for the run
+
+    Returns:
+        Number of samples added
+    """
+    input_stem = Path(manifest["input"]).stem
+    prediction_dir = results_dir(run_dir, input_stem) / "predictions" / input_stem
+
+    added = 0
+    for cif_path in sorted(prediction_dir.glob(f"{input_stem}_model_*.cif")):
+        model_index = cif_path.stem.rsplit("_", 1)[-1]
+        confidence_path = prediction_dir / f"confidence_{input_stem}_model_{model_index}.json"
+
+        confidence: Dict[str, Any] = {}
+        if confidence_path.exists():
+            with open(confidence_path) as f:
+                confidence = json.load(f)
+
+        manifest["samples"].append({
+            "index": len(manifest["samples"]),
+            "run_dir": run_dir.name,
+            "seed": seed,
+            "cif": str(cif_path.relative_to(sample_dir)),
+            "confidence": str(confidence_path.relative_to(sample_dir)) if confidence_path.exists() else None,
+            "confidence_score": confidence.get("confidence_score"),
+        })
+        added += 1
+
+    manifest["runs"].append({"run_dir": run_dir.name, "seed": seed, "samples": added})
+
+    # Rank all samples, best first
+    manifest["samples"].sort(
+        key=lambda sample: (sample["confidence_score"] is not None, sample["confidence_score"] or 0.0),
+        reverse=True,
+    )
+    for rank, sample in enumerate(manifest["samples"], start=1):
+        sample["rank"] = rank
+
+    save_manifest(sample_dir, manifest)
+    return added
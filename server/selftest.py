@@ -0,0 +1,788 @@
+#!/usr/bin/env python3
+"""
+Self-test for the Boltz MCP Server: job index paging, BinaryCIF output,
+fair-share scheduling, sample sets, the cluster mode (coordinator + worker
+agents) and the tunnel health monitor.
+
+Runs real processes on localhost against a stub Boltz, and the tunnel
+checks use the local stand-in tunnel, so no GPU, model weights or ngrok
+account are needed. Each check prints PASS or FAIL; the exit code is 1
+if any check failed.
+
+Checks:
+- archive_paths: extract_archive() rejects result archives whose members
+  escape the destination (../, absolute paths, links)
+- job_index: paging through JobIndex with filters, time windows and
+  cursors returns the same jobs as a brute-force filter
+- binary_cif: BinaryCIF output decodes back to the text mmCIF values
+- fair_scheduler: two clients sharing a GPU are granted in weighted fair
+  order, even when one of them queued first
+- dispatch: the coordinator places a job on a worker and pulls its
+  outputs back
+- worker_lost: a worker killed mid-job stops sending heartbeats, and the
+  job is re-placed on another worker
+- worker_restart: a worker restarted mid-job answers 404 for the job it
+  lost, and the job is re-placed
+- topup_keeps_rank: topping up a sample set re-ranks it, but an earlier
+  job's rank=1 (result and summary) stays the same
+- tunnel_dead: a tunnel that stops answering is re-established and the
+  new URL is saved
+- tunnel_slow: a slow tunnel is only reported by default; with rotation
+  enabled it is replaced once, then the cooldown applies
+
+Usage:
+    python selftest.py [--only dispatch,worker_lost] [--keep]
+"""
+
+import os
+import io
+import sys
+import base64
+import random
+import time
+import shutil
+import signal
+import socket
+import asyncio
+import tarfile
+import argparse
+import tempfile
+import subprocess
+import threading
+import traceback
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+# Helpers shared with the HTTP benchmark
+from benchmark_http import free_port, stop_server, wait_until_ready, call_tool
+from cluster import build_archive, extract_archive
+from fair_share import FairScheduler
+from job_index import JobIndex
+from start_ngrok_tunnel import NgrokTunnelManager, TunnelHealthMonitor
+from structure_formats import decode_binary_cif, encode_binary_cif, write_benchmark_cif
+from structure_io import read_cif_categories
+
+SERVER_DIR = Path(__file__).resolve().parent
+
+# Shared secret used by the coordinator and workers started here
+CLUSTER_TOKEN = "selftest-cluster-token"
+
+# Stub "boltz" executable: sleeps SELFTEST_BOLTZ_SECONDS, then writes one
+# tiny prediction per sample where Boltz would (sample k of a run with
+# seed s is named data_stub_<s+k> and scores 0.5 + 0.01 * (s + k))
+STUB_BOLTZ = """#!{python}
+import os, sys, json, time
+from pathlib import Path
+
+time.sleep(float(os.environ.get("SELFTEST_BOLTZ_SECONDS", "0")))
+args = sys.argv
+input_path = Path(args[2])
+out_dir = Path(args[args.index("--out_dir") + 1])
+samples = int(args[args.index("--diffusion_samples") + 1])
+seed = int(args[args.index("--seed") + 1]) if "--seed" in args else 0
+prediction_dir = out_dir / f"boltz_results_{{input_path.stem}}" / "predictions" / input_path.stem
+prediction_dir.mkdir(parents=True, exist_ok=True)
+atom = "ATOM 1 C CA . ALA A 1 1 ? 0.000 0.000 0.000 1.00 90.00 1 A 1"
+for k in range(samples):
+    name = f"{{input_path.stem}}_model_{{k}}"
+    (prediction_dir / f"{{name}}.cif").write_text(
+        f"data_stub_{{seed + k}}\\nloop_\\n_atom_site.group_PDB\\n_atom_site.id\\n_atom_site.type_symbol\\n"
+        "_atom_site.label_atom_id\\n_atom_site.label_alt_id\\n_atom_site.label_comp_id\\n"
+        "_atom_site.label_asym_id\\n_atom_site.label_entity_id\\n_atom_site.label_seq_id\\n"
+        "_atom_site.pdbx_PDB_ins_code\\n_atom_site.Cartn_x\\n_atom_site.Cartn_y\\n_atom_site.Cartn_z\\n"
+        "_atom_site.occupancy\\n_atom_site.B_iso_or_equiv\\n_atom_site.auth_seq_id\\n"
+        "_atom_site.auth_asym_id\\n_atom_site.pdbx_PDB_model_num\\n" + atom + "\\n"
+    )
+    # Later samples score higher, so a top-up puts new samples on top
+    score = 0.5 + 0.01 * (seed + k)
+    (prediction_dir / f"confidence_{{name}}.json").write_text(json.dumps({{"confidence_score": score}}))
+"""
+
+# Sequence submitted by the cluster checks
+TEST_SEQUENCE = "MKTAYIAKQRQISFVKSHFSRQLEERLGLIEV"
+
+# Seconds the stub runs in the checks that kill a worker mid-job
+SLOW_JOB_SECONDS = 8.0
+
+# Latency the stand-in tunnel adds in tunnel_slow (seconds), and the p95
+# above which the monitor calls the tunnel slow (ms)
+TUNNEL_DELAY_SECONDS = 0.2
+TUNNEL_SLOW_MS = 100.0
+
+# Registered checks, in run order: name -> function(workdir)
+CHECKS: Dict[str, Callable[[Path], None]] = {}
+
+
+def check(function: Callable[[Path], None]) -> Callable[[Path], None]:
+    """Register a self-test check under its function name."""
+    CHECKS[function.__name__] = function
+    return function
+
+
+# ============================================================================
+# CLUSTER PROCESSES
+# ============================================================================
+
+class Cluster:
+    """
+    A coordinator and any number of worker agents on localhost.
+
+    Every process gets its own HOME, so a restarted worker starts with an
+    empty job table, like a worker whose host rebooted.
+    """
+
+    def __init__(self, workdir: Path, boltz_seconds: float = 0.0, heartbeat_timeout: float = 3.0):
+        """
+        Args:
+            workdir: Directory for homes, logs and the stub Boltz
+            boltz_seconds: How long each stub Boltz run takes
+            heartbeat_timeout: Seconds without heartbeats before the
+                               coordinator gives a worker up
+        """
+        self.workdir = workdir
+        self.boltz_seconds = boltz_seconds
+        self.heartbeat_timeout = heartbeat_timeout
+        self.boltz_bin = workdir / "boltz"
+        self.boltz_bin.write_text(STUB_BOLTZ.format(python=sys.executable))
+        self.boltz_bin.chmod(0o755)
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.coordinator: Optional[subprocess.Popen] = None
+        # Key: worker name, Value: (process, port)
+        self.workers: Dict[str, Any] = {}
+        self.starts = 0
+
+    def _env(self, home: Path) -> Dict[str, str]:
+        """Environment shared by the coordinator and the workers."""
+        home.mkdir(parents=True, exist_ok=True)
+        return {
+            **os.environ,
+            "HOME": str(home),
+            "BOLTZ_BIN": str(self.boltz_bin),
+            "BOLTZ_CLUSTER_TOKEN": CLUSTER_TOKEN,
+            "BOLTZ_PREFETCH_WEIGHTS": "false",
+            "BOLTZ_VERIFY_WEIGHTS": "off",
+            "BOLTZ_WARMUP": "false",
+            "SELFTEST_BOLTZ_SECONDS": str(self.boltz_seconds),
+        }
+
+    def _spawn(self, command: List[str], env: Dict[str, str], log_name: str) -> subprocess.Popen:
+        """Start a process in its own process group, logging to workdir."""
+        log = open(self.workdir / log_name, "ab")
+        return subprocess.Popen(
+            command, cwd=SERVER_DIR, env=env, start_new_session=True,
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+
+    def start_coordinator(self, role: str = "coordinator") -> None:
+        """
+        Start the coordinator and wait until it is ready.
+
+        Args:
+            role: BOLTZ_ROLE; "standalone" runs jobs in the server itself
+                  (no workers needed)
+        """
+        env = {
+            **self._env(self.workdir / "coordinator"),
+            "BOLTZ_TRANSPORT": "http",
+            "BOLTZ_HOST": "127.0.0.1",
+            "BOLTZ_PORT": str(self.port),
+            "BOLTZ_ROLE": role,
+            # Short timeouts so failures are noticed within seconds
+            "BOLTZ_CLUSTER_POLL_SECONDS": "0.5",
+            "BOLTZ_WORKER_HEARTBEAT_TIMEOUT": str(self.heartbeat_timeout),
+        }
+        self.coordinator = self._spawn(
+            [sys.executable, str(SERVER_DIR / "boltz_mcp_server.py")], env, f"{role}.log"
+        )
+        wait_until_ready(self.url)
+
+    def start_worker(self, name: str, port: Optional[int] = None) -> None:
+        """
+        Start a worker agent and wait until the coordinator sees it.
+
+        Args:
+            name: Worker ID
+            port: Port to listen on (default: a free one; pass the old port
+                  to restart a worker in place)
+        """
+        port = port or free_port()
+        self.starts += 1
+        env = {
+            **self._env(self.workdir / f"worker-{name}-{self.starts}"),
+            "BOLTZ_WORKER_HEARTBEAT_INTERVAL": "0.5",
+        }
+        process = self._spawn(
+            [
+                sys.executable, str(SERVER_DIR / "boltz_worker.py"),
+                "--coordinator", self.url,
+                "--host", "127.0.0.1", "--port", str(port),
+                "--name", name, "--advertise-url", f"http://127.0.0.1:{port}",
+                "--gpus", "0",
+            ],
+            env, f"worker-{name}.log",
+        )
+        self.workers[name] = (process, port)
+        wait_for(lambda: name in self.live_workers(), timeout=60, what=f"worker {name} to register")
+
+    def kill_worker(self, name: str) -> int:
+        """
+        Kill a worker without letting it clean up (like a crashed host).
+
+        Returns:
+            The port it listened on
+        """
+        process, port = self.workers.pop(name)
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        return port
+
+    def live_workers(self) -> List[str]:
+        """Worker IDs the coordinator currently considers alive."""
+        info = self.call("get_server_info", {})
+        return [
+            worker["worker_id"] for worker in info.get("cluster", {}).get("workers", [])
+            if worker["alive"]
+        ]
+
+    def call(self, tool: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Call an MCP tool on the coordinator."""
+        from fastmcp import Client
+
+        async def run() -> Dict[str, Any]:
+            async with Client(f"{self.url}/mcp/") as client:
+                return await call_tool(client, tool, arguments)
+
+        return asyncio.run(run())
+
+    def submit(self, **arguments: Any) -> str:
+        """Submit one sequence job (extra tool arguments optional); returns its job ID."""
+        job = self.call("predict_structure_from_sequence", {"sequence": TEST_SEQUENCE, **arguments})
+        if "job_id" not in job:
+            raise AssertionError(f"Submission failed: {job}")
+        return job["job_id"]
+
+    def wait(self, job_id: str, timeout: float = 120.0) -> Dict[str, Any]:
+        """Wait for a job to finish and return its record."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = self.call("wait_for_job", {"job_id": job_id, "timeout": min(30.0, deadline - time.time())})
+            if job["status"] in ("completed", "failed"):
+                return job
+        raise AssertionError(f"Job {job_id} did not finish within {timeout:.0f}s")
+
+    def stop(self) -> None:
+        """Stop every process."""
+        for process, _ in self.workers.values():
+            stop_server(process)
+        self.workers.clear()
+        if self.coordinator is not None:
+            stop_server(self.coordinator)
+            self.coordinator = None
+
+
+def wait_for(condition: Callable[[], bool], timeout: float, what: str) -> None:
+    """Poll condition until it holds, or fail after timeout seconds."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.3)
+    raise AssertionError(f"Timed out waiting for {what}")
+
+
+def expect(condition: bool, message: str) -> None:
+    """Fail the current check with message unless condition holds."""
+    if not condition:
+        raise AssertionError(message)
+
+
+# ============================================================================
+# CHECKS
+# ============================================================================
+
+@check
+def archive_paths(workdir: Path) -> None:
+    """Result archives may only create regular files below the destination."""
+    # A well-formed archive round-trips
+    source = workdir / "source"
+    (source / "predictions").mkdir(parents=True)
+    (source / "predictions" / "model.cif").write_text("data_ok\n")
+    safe_archive = workdir / "ok.tar.gz"
+    safe_archive.write_bytes(build_archive(source))
+    extract_archive(safe_archive, workdir / "ok")
+    expect((workdir / "ok" / "predictions" / "model.cif").read_text() == "data_ok\n", "safe archive not extracted")
+
+    def archive_with(member: tarfile.TarInfo, data: bytes = b"x") -> Path:
+        path = workdir / "member.tar.gz"
+        with tarfile.open(path, mode="w:gz") as tar:
+            member.size = len(data) if member.isfile() else 0
+            tar.addfile(member, io.BytesIO(data) if member.isfile() else None)
+        return path
+
+    symlink = tarfile.TarInfo("predictions/link")
+    symlink.type, symlink.linkname = tarfile.SYMTYPE, "/etc/passwd"
+    hardlink = tarfile.TarInfo("predictions/hard")
+    hardlink.type, hardlink.linkname = tarfile.LNKTYPE, "../../outside"
+    unsafe = {
+        "parent directory": tarfile.TarInfo("../escaped.txt"),
+        "nested parent directory": tarfile.TarInfo("predictions/../../escaped.txt"),
+        "absolute path": tarfile.TarInfo(str(workdir / "absolute.txt")),
+        "symlink": symlink,
+        "hard link": hardlink,
+    }
+    for label, member in unsafe.items():
+        dest = workdir / f"unsafe-{label.replace(' ', '-')}"
+        dest.mkdir()
+        try:
+            extract_archive(archive_with(member), dest)
+        except ValueError:
+            continue
+        raise AssertionError(f"Archive member with {label} was extracted: {member.name}")
+    expect(not (workdir / "escaped.txt").exists(), "a member escaped the destination")
+    expect(not (workdir / "absolute.txt").exists(), "an absolute member was written")
+
+
+@check
+def job_index(workdir: Path) -> None:
+    """list_jobs paging through JobIndex matches a brute-force filter."""
+    rng = random.Random(7)
+    statuses = ["queued", "running", "completed", "failed"]
+    index = JobIndex()
+    records: Dict[str, Dict[str, Any]] = {}
+    for n in range(600):
+        job_id = f"{n:016x}"
+        # Few distinct timestamps, so ties are broken by job ID
+        records[job_id] = {
+            "created_at": f"2026-01-01T00:{rng.randrange(60):02d}:00",
+            "status": rng.choice(statuses),
+            "batch_id": rng.choice([None, "batch-a", "batch-b"]),
+        }
+        index.add(job_id, records[job_id])
+    # Status changes after creation, as jobs run
+    for job_id in rng.sample(sorted(records), 200):
+        records[job_id]["status"] = rng.choice(statuses)
+        index.update(job_id, "status", records[job_id]["status"])
+
+    def key(job_id: str) -> Any:
+        return (datetime.fromisoformat(records[job_id]["created_at"]).timestamp(), job_id)
+
+    queries = [
+        ({}, None, None),
+        ({"status": ["completed"]}, None, None),
+        ({"status": ["queued", "failed"]}, None, None),
+        ({"status": ["running"], "batch_id": ["batch-b"]}, None, None),
+        ({"batch_id": ["missing"]}, None, None),
+        ({}, "2026-01-01T00:10:00", "2026-01-01T00:20:00"),
+        ({"status": ["completed"]}, "2026-01-01T00:30:00", None),
+    ]
+    for filters, after, before in queries:
+        expected = sorted(
+            (
+                job_id for job_id, record in records.items()
+                if all(record.get(field) in accepted for field, accepted in filters.items())
+                and (after is None or record["created_at"] >= after)
+                and (before is None or record["created_at"] < before)
+            ),
+            key=key, reverse=True,
+        )
+        for limit in (1, 7, 50, 1000):
+            seen: List[str] = []
+            cursor = None
+            while True:
+                page, cursor = index.query(
+                    filters, limit, cursor,
+                    created_after=datetime.fromisoformat(after).timestamp() if after else None,
+                    created_before=datetime.fromisoformat(before).timestamp() if before else None,
+                )
+                expect(len(page) <= limit, f"page larger than limit {limit}")
+                seen += page
+                if cursor is None:
+                    break
+            expect(seen == expected, f"paging {filters} after={after} before={before} "
+                                     f"limit={limit}: {len(seen)} jobs, expected {len(expected)}")
+
+
+@check
+def binary_cif(workdir: Path) -> None:
+    """BinaryCIF decodes back to the text mmCIF it was made from."""
+    cif_paths = [workdir / "benchmark.cif", workdir / "edge_cases.cif"]
+    write_benchmark_cif(cif_paths[0], chains=3, residues_per_chain=40)
+    # Masked values, negative decimals and integers beyond int32 (which must
+    # fall back to strings instead of wrapping around)
+    cif_paths[1].write_text(
+        "data_edge\nloop_\n_demo.id\n_demo.big\n_demo.x\n_demo.label\n"
+        "1 2147483648 -1.250 A\n2 ? 0.5 .\n3 -2147483649 . 'B C'\n4 7 12.000 ?\n"
+    )
+    for cif_path in cif_paths:
+        _, categories = read_cif_categories(cif_path)
+        decoded = decode_binary_cif(encode_binary_cif(cif_path))
+        expect(list(decoded) == list(categories), f"{cif_path.name}: categories differ")
+        for category, fields in categories.items():
+            for field, values in fields.items():
+                column = decoded[category][field]
+                present = [i for i, value in enumerate(values) if value not in (".", "?")]
+                if column.dtype.kind in "iuf":
+                    ok = all(abs(float(column[i]) - float(values[i])) < 1e-9 for i in present)
+                else:
+                    ok = all(str(column[i]) == values[i] for i in present)
+                expect(ok, f"{cif_path.name}: _{category}.{field} does not round-trip")
+
+
+@check
+def fair_scheduler(workdir: Path) -> None:
+    """Two clients sharing one GPU are served in weighted fair order."""
+
+    async def grant_order(weights: Dict[str, float], jobs: List[str]) -> List[str]:
+        scheduler = FairScheduler()
+        granted: List[str] = []
+
+        async def run(job_id: str) -> None:
+            client = job_id[0]
+            await scheduler.acquire(job_id, client, {"weight": weights[client]}, [0])
+            granted.append(job_id)
+
+        tasks = []
+        for job_id in jobs:
+            tasks.append(asyncio.create_task(run(job_id)))
+            # Let the job queue before the next one is submitted
+            await asyncio.sleep(0.01)
+        for position in range(len(jobs)):
+            expect(len(granted) == position + 1, f"{len(granted)} job(s) granted, expected {position + 1}")
+            scheduler.release(granted[position])
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+        return granted
+
+    # Client A queues four jobs before B submits; B is not starved behind them
+    jobs = ["a1", "a2", "a3", "a4", "b1", "b2"]
+    order = asyncio.run(grant_order({"a": 1.0, "b": 1.0}, jobs))
+    expect(order == ["a1", "b1", "a2", "b2", "a3", "a4"], f"equal weights: {order}")
+    # With twice the weight, B gets two turns per turn of A
+    order = asyncio.run(grant_order({"a": 1.0, "b": 2.0}, jobs + ["b3", "b4"]))
+    expect(order == ["a1", "b1", "b2", "a2", "b3", "b4", "a3", "a4"], f"weight 2 for b: {order}")
+
+
+@check
+def dispatch(workdir: Path) -> None:
+    """A job runs on a worker and its outputs end up on the coordinator."""
+    cluster = Cluster(workdir)
+    try:
+        cluster.start_coordinator()
+        cluster.start_worker("w1")
+        job = cluster.wait(cluster.submit())
+        expect(job["status"] == "completed", f"job did not complete: {job.get('error')}")
+        expect(job.get("worker_id") == "w1", f"job ran on {job.get('worker_id')}, expected w1")
+        expect(Path(job["output_path"]).exists(), "output was not copied to the coordinator")
+    finally:
+        cluster.stop()
+
+
+@check
+def worker_lost(workdir: Path) -> None:
+    """A job whose worker dies is re-placed on a live worker."""
+    cluster = Cluster(workdir, boltz_seconds=SLOW_JOB_SECONDS)
+    try:
+        cluster.start_coordinator()
+        cluster.start_worker("w1")
+        job_id = cluster.submit()
+        wait_for(
+            lambda: cluster.call("check_job_status", {"job_id": job_id}).get("worker_id") == "w1",
+            timeout=60, what="the job to start on w1",
+        )
+        cluster.start_worker("w2")
+        cluster.kill_worker("w1")
+
+        job = cluster.wait(job_id)
+        expect(job["status"] == "completed", f"job did not complete: {job.get('error')}")
+        expect(job.get("worker_id") == "w2", f"job finished on {job.get('worker_id')}, expected w2")
+        outcomes = [attempt.get("outcome") for attempt in job["dispatch_attempts"]]
+        expect(outcomes[0] == "worker lost", f"first dispatch was not marked lost: {outcomes}")
+    finally:
+        cluster.stop()
+
+
+@check
+def worker_restart(workdir: Path) -> None:
+    """A worker that restarts mid-job (and answers 404 for it) gets the job again."""
+    # The worker never counts as dead here, so only the 404 can re-place the job
+    cluster = Cluster(workdir, boltz_seconds=SLOW_JOB_SECONDS, heartbeat_timeout=300)
+    try:
+        cluster.start_coordinator()
+        cluster.start_worker("w1")
+        job_id = cluster.submit()
+        wait_for(
+            lambda: cluster.call("check_job_status", {"job_id": job_id}).get("status") == "running",
+            timeout=60, what="the job to start on w1",
+        )
+        # Back on the same port before the heartbeat timeout, without the job
+        port = cluster.kill_worker("w1")
+        cluster.start_worker("w1", port=port)
+
+        job = cluster.wait(job_id)
+        expect(job["status"] == "completed", f"job did not complete: {job.get('error')}")
+        outcomes = [attempt.get("outcome") for attempt in job["dispatch_attempts"]]
+        expect(len(outcomes) >= 2 and outcomes[0] == "worker lost", f"job was not re-placed: {outcomes}")
+    finally:
+        cluster.stop()
+
+
+@check
+def topup_keeps_rank(workdir: Path) -> None:
+    """A top-up of a sample set does not change an earlier job's rank=1."""
+    server = Cluster(workdir)
+    try:
+        server.start_coordinator(role="standalone")
+        first = server.submit(diffusion_samples=2)
+        expect(server.wait(first)["status"] == "completed", "first job did not complete")
+        before = server.call("get_prediction_result", {"job_id": first})
+
+        # Same input and seed with more samples: only the missing ones run,
+        # and they score higher than the first job's samples
+        second = server.submit(diffusion_samples=4)
+        expect(server.wait(second)["status"] == "completed", "top-up job did not complete")
+        topped_up = server.call("get_prediction_result", {"job_id": second})
+        expect(len(topped_up["samples"]) == 4, f"top-up job has {len(topped_up['samples'])} samples")
+        expect(
+            topped_up["samples"][0]["confidence_score"] > before["samples"][0]["confidence_score"],
+            "the top-up did not produce a better sample (nothing was re-ranked)",
+        )
+
+        after = server.call("get_prediction_result", {"job_id": first})
+        expect(after["samples"] == before["samples"], f"first job's ranking changed: {after['samples']}")
+        expect(after["cif_content"] == before["cif_content"], "first job's rank=1 structure changed")
+        out_of_range = server.call("get_prediction_result", {"job_id": first, "rank": 3})
+        expect(out_of_range["status"] == "error", "rank 3 accepted for a job that asked for 2 samples")
+
+        summary = server.call("get_prediction_summary", {"job_id": first})
+        expect(
+            summary["summary"]["confidence_score"] == before["samples"][0]["confidence_score"],
+            "get_prediction_summary summarized a different sample than get_prediction_result",
+        )
+        first_block = base64.b64decode(after["cif_content"]).split(b"\n", 1)[0]
+        expect(first_block == b"data_stub_1", f"rank=1 of the first job is {first_block!r}")
+    finally:
+        server.stop()
+
+
+class LocalTunnel(NgrokTunnelManager):
+    """
+    Stand-in for an ngrok tunnel: forwards a local TCP port to the server.
+
+    Used to exercise TunnelHealthMonitor without ngrok. break_tunnel()
+    kills the forwarder (like a dropped tunnel) and "delay" adds latency
+    to every connection (like a congested ngrok edge).
+    """
+
+    def __init__(self, port: int, url_file: Path, info_file: Path, delay: float = 0.0):
+        """
+        Args:
+            port: Local port of the MCP server
+            url_file: Where the public URL is saved
+            info_file: Where tunnel details and health are saved
+            delay: Seconds added before each connection is forwarded
+        """
+        super().__init__(port, auth_token=None, url_file=url_file, info_file=info_file)
+        self.delay = delay
+        self.listener: Optional[socket.socket] = None
+        self.connections: List[socket.socket] = []
+        self.lock = threading.Lock()
+
+    def _open_tunnel(self) -> Tuple[str, Optional[str]]:
+        """Listen on a free local port and forward connections to the server."""
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        listener = self.listener
+        threading.Thread(target=self._accept_loop, args=(listener,), daemon=True).start()
+        return f"tcp://127.0.0.1:{listener.getsockname()[1]}", "local"
+
+    def _accept_loop(self, listener: socket.socket) -> None:
+        """Accept connections until the listener is closed."""
+        while True:
+            try:
+                client, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._forward, args=(client,), daemon=True).start()
+
+    def _forward(self, client: socket.socket) -> None:
+        """Connect one client to the server and copy bytes both ways."""
+        time.sleep(self.delay)
+        try:
+            server = socket.create_connection(("127.0.0.1", self.port))
+        except OSError:
+            client.close()
+            return
+        with self.lock:
+            self.connections += [client, server]
+
+        def pump(source: socket.socket, target: socket.socket) -> None:
+            try:
+                while True:
+                    data = source.recv(65536)
+                    if not data:
+                        break
+                    target.sendall(data)
+            except OSError:
+                pass
+            finally:
+                for sock in (source, target):
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+
+        threading.Thread(target=pump, args=(server, client), daemon=True).start()
+        pump(client, server)
+
+    def _close_tunnel(self) -> None:
+        """Stop listening and drop every forwarded connection."""
+        if self.listener is not None:
+            # shutdown() wakes the thread blocked in accept(); close() alone may not
+            try:
+                self.listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.listener.close()
+            self.listener = None
+        with self.lock:
+            for sock in self.connections:
+                sock.close()
+            self.connections = []
+
+    def _shutdown(self) -> None:
+        """Nothing to kill: the forwarder runs in this process."""
+
+    def break_tunnel(self) -> None:
+        """Simulate a dead tunnel (the public URL stops answering)."""
+        self._close_tunnel()
+
+
+class ProbeTarget(BaseHTTPRequestHandler):
+    """Answers every GET with 200, standing in for the MCP server."""
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        """Keep the self-test output clean."""
+
+
+@contextlib.contextmanager
+def local_tunnel(workdir: Path, delay: float = 0.0):
+    """
+    Run a probe target behind a LocalTunnel; yields the started tunnel.
+
+    Args:
+        workdir: Where the tunnel saves its URL and info files
+        delay: Latency added to every tunneled connection (seconds)
+    """
+    target = ThreadingHTTPServer(("127.0.0.1", 0), ProbeTarget)
+    threading.Thread(target=target.serve_forever, daemon=True).start()
+    tunnel = LocalTunnel(
+        target.server_address[1], url_file=workdir / "url.txt",
+        info_file=workdir / "tunnel_info.json", delay=delay,
+    )
+    # The tunnel classes report progress with print(); keep it in a log
+    log = open(workdir / "tunnel.log", "a")
+    try:
+        with contextlib.redirect_stdout(log):
+            tunnel.start()
+        yield tunnel
+    finally:
+        with contextlib.redirect_stdout(log):
+            tunnel.stop()
+        log.close()
+        target.shutdown()
+
+
+def quiet_checks(monitor: TunnelHealthMonitor, count: int, workdir: Path) -> List[str]:
+    """Run monitor.check() count times, logging its output to workdir."""
+    with open(workdir / "tunnel.log", "a") as log, contextlib.redirect_stdout(log):
+        return [monitor.check() for _ in range(count)]
+
+
+@check
+def tunnel_dead(workdir: Path) -> None:
+    """A tunnel that stops answering is replaced after max_failures probes."""
+    with local_tunnel(workdir) as tunnel:
+        monitor = TunnelHealthMonitor(tunnel, timeout=2.0, max_failures=2)
+        expect(quiet_checks(monitor, 1, workdir) == ["healthy"], "fresh tunnel is not healthy")
+
+        old_url = tunnel.public_url
+        tunnel.break_tunnel()
+        states = quiet_checks(monitor, 2, workdir)
+        expect(states == ["degraded", "reconnected"], f"dead tunnel not replaced: {states}")
+        expect(tunnel.public_url != old_url, "tunnel URL did not change")
+        expect((workdir / "url.txt").read_text().strip() == tunnel.public_url, "new URL was not saved")
+        expect(quiet_checks(monitor, 1, workdir) == ["healthy"], "new tunnel is not healthy")
+
+
+@check
+def tunnel_slow(workdir: Path) -> None:
+    """Slow tunnels are reported; replaced only when enabled, at most once per cooldown."""
+    with local_tunnel(workdir, delay=TUNNEL_DELAY_SECONDS) as tunnel:
+        url = tunnel.public_url
+        monitor = TunnelHealthMonitor(tunnel, slow_ms=TUNNEL_SLOW_MS)
+        states = quiet_checks(monitor, 8, workdir)
+        expect("slow" in states, f"slow tunnel not reported: {states}")
+        expect(tunnel.public_url == url, "slow tunnel was replaced without BOLTZ_TUNNEL_ROTATE_ON_SLOW")
+
+        monitor = TunnelHealthMonitor(tunnel, slow_ms=TUNNEL_SLOW_MS, rotate_on_slow=True, slow_cooldown=3600)
+        states = quiet_checks(monitor, 16, workdir)
+        expect(states.count("reconnected") == 1, f"expected exactly one replacement: {states}")
+        expect(tunnel.public_url != url, "tunnel URL did not change")
+        expect(states[-1] == "slow", f"tunnel should stay slow during the cooldown: {states}")
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def run_checks(names: List[str], keep: bool) -> bool:
+    """
+    Run checks by name, each in a fresh temporary directory.
+
+    Args:
+        names: Checks to run, in order
+        keep: Keep the temporary directories (logs) for inspection
+
+    Returns:
+        True if every check passed
+    """
+    passed = True
+    for name in names:
+        workdir = Path(tempfile.mkdtemp(prefix=f"boltz-selftest-{name}-"))
+        started = time.time()
+        try:
+            CHECKS[name](workdir)
+            print(f"PASS  {name:<16} {time.time() - started:6.1f}s")
+            if not keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+        except Exception as e:
+            # Logs of failed checks are always kept
+            passed = False
+            print(f"FAIL  {name:<16} {time.time() - started:6.1f}s  {e}")
+            if not isinstance(e, AssertionError):
+                traceback.print_exc()
+            print(f"      logs: {workdir}")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=None,
+                        help=f"Comma-separated checks to run (default: all of {', '.join(CHECKS)})")
+    parser.add_argument("--keep", action="store_true", help="Keep temporary directories and logs")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.only.split(",")] if args.only else list(CHECKS)
+    unknown = [name for name in names if name not in CHECKS]
+    if unknown:
+        parser.error(f"Unknown check(s): {', '.join(unknown)}")
+
+    sys.exit(0 if run_checks(names, args.keep) else 1)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Sequence normalization and validation for the Boltz MCP Server.
+
+Batch screens submit very long or very many sequences, so validation works
+on bytes instead of Python characters:
+- Whitespace (spaces, tabs, CR/LF) and a trailing stop "*" are removed with
+  a single bytes.translate() call
+- Case is folded with bytes.upper() (ASCII only)
+- Validity is checked by deleting every allowed letter with translate();
+  anything left over is invalid. Only then are error positions located.
+
+Supported molecule types and alphabets follow what Boltz accepts:
+- protein: 20 canonical residues plus the ambiguous/non-standard codes
+  X, B, Z, J, U, O (Boltz maps these to UNK)
+- dna: A, C, G, T, N
+- rna: A, C, G, U, N
+
+Usage:
+    from sequence_utils import normalize_sequence, parse_fasta
+    clean = normalize_sequence("mkta yiak\\tqrq")   # -> "MKTAYIAKQRQ"
+    records = parse_fasta(">a\\nMKT\\n>b\\nACD\\n")
+
+Run as a script to benchmark on multi-megabyte inputs:
+    python3 sequence_utils.py --benchmark
+"""
+
+import re
+from typing import Optional, Dict, Any, List
+
+# ============================================================================
+# ALPHABETS
+# ============================================================================
+
+# Allowed single-letter codes per molecule type (uppercase)
+ALPHABETS = {
+    "protein": b"ACDEFGHIKLMNPQRSTVWYXBZJUO",
+    "dna": b"ACGTN",
+    "rna": b"ACGUN",
+}
+
+# Bytes removed before validation: ASCII whitespace
+WHITESPACE = b" \t\r\n\v\f"
+
+# Maximum number of invalid positions reported per sequence
+MAX_REPORTED_ERRORS = 20
+
+# Regexes locating invalid characters (error path only), built once per alphabet
+_INVALID_PATTERNS = {
+    molecule_type: re.compile("[^" + re.escape(alphabet.decode("ascii")) + "]")
+    for molecule_type, alphabet in ALPHABETS.items()
+}
+
+
+class SequenceValidationError(ValueError):
+    """
+    Raised when one or more sequences contain invalid characters.
+
+    Attributes:
+        errors: List of {"record", "position", "character"} dicts, where
+                position is 1-based within the normalized sequence
+    """
+
+    def __init__(self, message: str, errors: List[Dict[str, Any]]):
+        super().__init__(message)
+        self.errors = errors
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def _clean_bytes(data: bytes) -> bytes:
+    """
+    Remove whitespace and a trailing stop codon marker, and uppercase.
+
+    Args:
+        data: Raw sequence bytes
+
+    Returns:
+        Normalized sequence bytes
+    """
+    cleaned = data.translate(None, WHITESPACE).upper()
+    # A single trailing "*" (translation stop) is common in FASTA files
+    if cleaned.endswith(b"*"):
+        cleaned = cleaned[:-1]
+    return cleaned
+
+
+def _find_invalid(cleaned: bytes, molecule_type: str, record: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Locate invalid characters in a normalized sequence.
+
+    The fast path (translate-delete of the alphabet) handles valid input;
+    this is only called when something is left over. The bytes are decoded
+    first so non-ASCII characters are reported whole, at their character
+    position.
+
+    Args:
+        cleaned: Normalized sequence bytes
+        molecule_type: Key of ALPHABETS
+        record: Record identifier included in each error (or None)
+
+    Returns:
+        Up to MAX_REPORTED_ERRORS error dicts
+    """
+    errors = []
+    text = cleaned.decode("utf-8", errors="replace")
+    for match in _INVALID_PATTERNS[molecule_type].finditer(text):
+        errors.append({
+            "record": record,
+            "position": match.start() + 1,
+            "character": match.group(),
+        })
+        if len(errors) >= MAX_REPORTED_ERRORS:
+            break
+    return errors
+
+
+def _check_molecule_type(molecule_type: str) -> None:
+    """Raise ValueError for unsupported molecule types."""
+    if molecule_type not in ALPHABETS:
+        raise ValueError(
+            f"Unsupported molecule_type '{molecule_type}'. Use one of: {', '.join(ALPHABETS)}"
+        )
+
+
+def _validate(cleaned: bytes, molecule_type: str, record: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Validate a normalized sequence.
+
+    Returns:
+        Error dicts (empty if the sequence is valid)
+    """
+    if not cleaned:
+        return [{"record": record, "position": 0, "character": "", "message": "Empty sequence"}]
+    # Deleting every allowed letter leaves only invalid characters
+    if cleaned.translate(None, ALPHABETS[molecule_type]):
+        return _find_invalid(cleaned, molecule_type, record)
+    return []
+
+
+def _format_errors(errors: List[Dict[str, Any]], molecule_type: str) -> str:
+    """Build a short human-readable summary of validation errors."""
+    parts = []
+    for error in errors[:5]:
+        where = f"record '{error['record']}' " if error["record"] is not None else ""
+        if error.get("message"):
+            parts.append(f"{where}{error['message']}".strip())
+        else:
+            parts.append(f"{where}position {error['position']}: '{error['character']}'")
+    more = f" (+{len(errors) - 5} more)" if len(errors) > 5 else ""
+    return f"Invalid {molecule_type} sequence: " + "; ".join(parts) + more
+
+
+def normalize_sequence(sequence: str, molecule_type: str = "protein") -> str:
+    """
+    Normalize and validate a single sequence.
+
+    Args:
+        sequence: Sequence in single-letter codes (any case, may contain whitespace)
+        molecule_type: "protein", "dna" or "rna"
+
+    Returns:
+        Uppercase sequence without whitespace
+
+    Raises:
+        ValueError: If molecule_type is unsupported
+        SequenceValidationError: If the sequence is empty or has invalid characters
+    """
+    _check_molecule_type(molecule_type)
+
+    # Non-ASCII characters encode to bytes >= 0x80, which no alphabet allows
+    cleaned = _clean_bytes(sequence.encode("utf-8"))
+
+    errors = _validate(cleaned, molecule_type, record=None)
+    if errors:
+        raise SequenceValidationError(_format_errors(errors, molecule_type), errors)
+
+    return cleaned.decode("ascii")
+
+
+def parse_fasta(text: str, molecule_type: str = "protein") -> List[Dict[str, str]]:
+    """
+    Parse and validate a FASTA or multi-FASTA stream.
+
+    Text without any ">" header is treated as one unnamed sequence. Every
+    record is validated before returning, and all errors are reported
+    together, so a batch is either accepted or rejected as a whole.
+
+    Args:
+        text: FASTA content
+        molecule_type: "protein", "dna" or "rna" (applies to every record)
+
+    Returns:
+        List of {"id", "description", "sequence"} dicts in input order
+
+    Raises:
+        ValueError: If molecule_type is unsupported or there are no records
+        SequenceValidationError: If any record is empty or has invalid characters
+    """
+    _check_molecule_type(molecule_type)
+
+    data = text.encode("utf-8")
+    if not data.lstrip().startswith(b">"):
+        # Bare sequence without a header
+        data = b">sequence_1\n" + data
+
+    records = []
+    errors: List[Dict[str, Any]] = []
+
+    # Splitting on "\n>" finds record boundaries in one pass over the bytes
+    chunks = data.lstrip()[1:].split(b"\n>")
+    for number, chunk in enumerate(chunks, start=1):
+        header, _, body = chunk.partition(b"\n")
+        header = header.strip().decode("utf-8", errors="replace")
+        record_id = header.split()[0] if header else f"sequence_{number}"
+
+        cleaned = _clean_bytes(body)
+        record_errors = _validate(cleaned, molecule_type, record=record_id)
+        if record_errors:
+            errors.extend(record_errors)
+            continue
+
+        records.append({
+            "id": record_id,
+            "description": header,
+            "sequence": cleaned.decode("ascii"),
+        })
+
+    if errors:
+        raise SequenceValidationError(_format_errors(errors, molecule_type), errors)
+    if not records:
+        raise ValueError("No sequences found in FASTA input")
+
+    return records
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _legacy_validate(sequence: str) -> str:
+    """The original per-character check, kept for benchmark comparison."""
+    valid_aa = set("ACDEFGHIKLMNPQRSTVWY")
+    sequence_upper = sequence.upper().replace(" ", "").replace("\n", "")
+    if not all(aa in valid_aa for aa in sequence_upper):
+        raise ValueError("Invalid amino acid sequence")
+    return sequence_upper
+
+
+def run_benchmark(megabytes: int = 8, records: int = 20000) -> None:
+    """
+    Compare the legacy check with normalize_sequence/parse_fasta.
+
+    Args:
+        megabytes: Size of the single-sequence input
+        records: Number of records in the multi-FASTA input
+    """
+    import random
+    import time
+
+    rng = random.Random(0)
+    canonical = "ACDEFGHIKLMNPQRSTVWY"
+
+    # One long sequence, lowercase, wrapped at 60 columns like FASTA files
+    residues = "".join(rng.choices(canonical, k=megabytes * 1024 * 1024)).lower()
+    wrapped = "\n".join(residues[i:i + 60] for i in range(0, len(residues), 60))
+
+    # Many short records (typical screening library)
+    fasta = "".join(
+        f">seq{i} screening candidate\n" + "".join(rng.choices(canonical, k=rng.randint(80, 400))) + "\n"
+        for i in range(records)
+    )
+
+    def timed(label: str, func, *args) -> None:
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<34} {elapsed * 1000:9.1f} ms")
+
+    print(f"Single sequence, {len(wrapped) / 1e6:.1f} MB:")
+    timed("legacy all(aa in valid_aa ...)", _legacy_validate, wrapped)
+    timed("normalize_sequence", normalize_sequence, wrapped)
+
+    print(f"Multi-FASTA, {records} records, {len(fasta) / 1e6:.1f} MB:")
+
+    def legacy_fasta(text: str) -> None:
+        for chunk in text.split(">")[1:]:
+            _legacy_validate(chunk.partition("\n")[2])
+
+    timed("legacy per-record check", legacy_fasta, fasta)
+    timed("parse_fasta", parse_fasta, fasta)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        run_benchmark()
+    else:
+        print(__doc__)
@@ -7,9 +7,12 @@ It can be used instead of or alongside the bash script.
 
 Key features:
 - Programmatic ngrok tunnel management
-- Automatic retry on connection failures
-- Health checking
-- Tunnel URL persistence
+- Health checking: the MCP endpoint is probed through the public URL,
+  and round-trip latency percentiles are tracked
+- Automatic reconnection when the tunnel dies; a slow tunnel is reported
+  (and only replaced when explicitly enabled, since that changes the URL)
+- Tunnel URL persistence (ngrok_url.txt, ngrok_tunnel_info.json), written
+  atomically so readers never see a half-written file
 """
 
 import os
@@ -17,15 +20,26 @@ import sys
 import time
 import json
 import signal
+import argparse
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any, Tuple
 
-# pyngrok provides Python API for ngrok
-from pyngrok import ngrok, conf
+# httpx sends the health probes (also used by the server itself)
+import httpx
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
 
+# pyngrok provides Python API for ngrok
+# Only needed to open tunnels; the health monitor can be imported (and
+# tested, see selftest.py) without it
+try:
+    from pyngrok import ngrok, conf
+except ImportError:
+    ngrok = conf = None
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -33,24 +47,11 @@ from dotenv import load_dotenv
 # Get script directory
 SCRIPT_DIR = Path(__file__).parent
 
-# Load .env file
+# .env file (loaded by main())
 ENV_FILE = SCRIPT_DIR / ".env"
-if ENV_FILE.exists():
-    load_dotenv(ENV_FILE)
-    print(f"[INFO] Loaded environment from {ENV_FILE}")
-else:
-    print(f"[WARNING] No .env file found at {ENV_FILE}")
-
-# Get ngrok auth token from environment
-NGROK_AUTH_TOKEN = os.getenv("NGROK_AUTH_TOKEN")
-if not NGROK_AUTH_TOKEN:
-    print("[ERROR] NGROK_AUTH_TOKEN not set")
-    print("[ERROR] Please set it in .env file or environment")
-    print("[INFO] Get your token from: https://dashboard.ngrok.com/get-started/your-authtoken")
-    sys.exit(1)
-
-# MCP server will listen on this port
-MCP_SERVER_PORT = 8000
+
+# Default port of the MCP server (overridden by BOLTZ_PORT)
+DEFAULT_SERVER_PORT = 8000
 
 # File to store the ngrok URL
 URL_FILE = SCRIPT_DIR / "ngrok_url.txt"
@@ -58,6 +59,52 @@ URL_FILE = SCRIPT_DIR / "ngrok_url.txt"
 # File to store tunnel information
 TUNNEL_INFO_FILE = SCRIPT_DIR / "ngrok_tunnel_info.json"
 
+# Health monitoring (overridable through the environment, see main())
+# Path probed through the tunnel (any HTTP answer below 500 means the
+# request reached the MCP server)
+PROBE_PATH = "/mcp/"
+# Seconds between probes
+PROBE_INTERVAL_SECONDS = 15.0
+# Seconds before a probe counts as failed
+PROBE_TIMEOUT_SECONDS = 10.0
+# Consecutive failed probes before the tunnel is re-established
+MAX_PROBE_FAILURES = 3
+# p95 round-trip latency (ms) above which the tunnel counts as slow
+SLOW_TUNNEL_MS = 3000.0
+# Number of recent probes the latency percentiles are computed over
+LATENCY_WINDOW = 20
+# Probes needed before a tunnel can be judged slow
+MIN_LATENCY_SAMPLES = 5
+# Replace a slow tunnel (off by default: a new ngrok tunnel gets a new URL,
+# which breaks every client configured with the old one)
+ROTATE_ON_SLOW = False
+# Minimum seconds between two replacements of a slow tunnel
+SLOW_ROTATION_COOLDOWN_SECONDS = 1800.0
+# Backoff after a failed reconnection: RECONNECT_BACKOFF_SECONDS * 2**(N-1), capped
+RECONNECT_BACKOFF_SECONDS = 5.0
+RECONNECT_BACKOFF_MAX_SECONDS = 120.0
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """
+    Replace a file's content atomically.
+
+    The text goes to a temporary file in the same directory first, which
+    then replaces the target in one step, so a reader (or a crash) never
+    sees a half-written file.
+
+    Args:
+        path: File to write
+        text: New content
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
 # ============================================================================
 # TUNNEL MANAGEMENT
 # ============================================================================
@@ -68,25 +115,80 @@ class NgrokTunnelManager:
 
     Responsibilities:
     - Start/stop tunnel
-    - Persist tunnel URL
+    - Re-establish the tunnel (used by TunnelHealthMonitor)
+    - Persist tunnel URL and health
     - Handle cleanup on exit
     """
 
-    def __init__(self, port: int, auth_token: str):
+    def __init__(
+        self,
+        port: int,
+        auth_token: Optional[str],
+        url_file: Path = URL_FILE,
+        info_file: Path = TUNNEL_INFO_FILE,
+    ):
         """
         Initialize tunnel manager.
 
         Args:
             port: Local port to tunnel (where MCP server listens)
             auth_token: ngrok authentication token
+            url_file: Where the public URL is saved
+            info_file: Where tunnel details and health are saved
         """
         self.port = port
         self.auth_token = auth_token
+        self.url_file = url_file
+        self.info_file = info_file
         self.tunnel = None
+        self.tunnel_name: Optional[str] = None
+        self.public_url: Optional[str] = None
+        self.created_at: Optional[str] = None
+        # Number of times the tunnel was re-established
+        self.reconnects = 0
+
+    def _open_tunnel(self) -> Tuple[str, Optional[str]]:
+        """
+        Open the ngrok tunnel.
+
+        Returns:
+            (public URL, tunnel name)
+
+        Raises:
+            RuntimeError: If pyngrok is not installed
+        """
+        if ngrok is None:
+            raise RuntimeError("pyngrok is not installed (pip install pyngrok)")
 
         # Set ngrok auth token in pyngrok configuration
         # This is equivalent to: ngrok config add-authtoken <token>
-        conf.get_default().auth_token = auth_token
+        conf.get_default().auth_token = self.auth_token
+
+        # Create TCP tunnel to local port
+        # ngrok.connect() returns a NgrokTunnel object
+        # "tcp" = tunnel type (raw TCP, HTTP is spoken through it)
+        # bind_tls=False = don't require TLS (optional, depends on MCP client)
+        self.tunnel = ngrok.connect(
+            addr=self.port,
+            proto="tcp",
+            bind_tls=False
+        )
+        return self.tunnel.public_url, self.tunnel.name
+
+    def _close_tunnel(self) -> None:
+        """Close the tunnel, keeping the ngrok process for the next one."""
+        if self.tunnel:
+            ngrok.disconnect(self.tunnel.public_url)
+            self.tunnel = None
+
+    def _shutdown(self) -> None:
+        """
+        Kill the ngrok process.
+
+        This ensures no orphaned ngrok processes remain
+        """
+        if ngrok is not None:
+            ngrok.kill()
 
     def start(self) -> str:
         """
@@ -101,54 +203,78 @@ class NgrokTunnelManager:
         print(f"[INFO] Starting ngrok tunnel for port {self.port}...")
 
         try:
-            # Create TCP tunnel to local port
-            # ngrok.connect() returns a NgrokTunnel object
-            # "tcp" = tunnel type (we're using TCP for MCP over stdio)
-            # bind_tls=False = don't require TLS (optional, depends on MCP client)
-            self.tunnel = ngrok.connect(
-                addr=self.port,
-                proto="tcp",
-                bind_tls=False
-            )
-
-            # Get public URL
-            public_url = self.tunnel.public_url
+            self.public_url, self.tunnel_name = self._open_tunnel()
+            self.created_at = time.strftime("%Y-%m-%d %H:%M:%S")
 
             print(f"[SUCCESS] Tunnel established!")
-            print(f"[SUCCESS] Public URL: {public_url}")
+            print(f"[SUCCESS] Public URL: {self.public_url}")
 
             # Save URL to file
-            self._save_tunnel_info(public_url)
+            self.save_tunnel_info()
 
-            return public_url
+            return self.public_url
 
         except Exception as e:
             print(f"[ERROR] Failed to start tunnel: {e}")
             raise
 
-    def _save_tunnel_info(self, public_url: str):
+    def reconnect(self) -> str:
+        """
+        Close the current tunnel and open a new one.
+
+        If the new tunnel cannot be opened (e.g. the ngrok agent itself
+        died), the agent is restarted and the tunnel opened once more.
+        ngrok TCP tunnels get a new public URL each time, so clients have
+        to pick up the new URL from ngrok_url.txt.
+
+        Returns:
+            New public URL
+
+        Raises:
+            Exception: If the tunnel cannot be re-established
+        """
+        print("[WARNING] Re-establishing tunnel...")
+        try:
+            self._close_tunnel()
+        except Exception as e:
+            print(f"[WARNING] Error closing old tunnel: {e}")
+        self.tunnel = None
+
+        try:
+            public_url = self.start()
+        except Exception:
+            self._shutdown()
+            public_url = self.start()
+
+        self.reconnects += 1
+        return public_url
+
+    def save_tunnel_info(self, health: Optional[Dict[str, Any]] = None):
         """
         Save tunnel information to files for easy access.
 
+        Both files are replaced atomically. The URL file is only rewritten
+        when the URL changed, so its modification time tells when the
+        current tunnel was opened.
+
         Args:
-            public_url: The ngrok public URL
+            health: Latest health report (see TunnelHealthMonitor.report)
         """
         # Save URL to simple text file
-        URL_FILE.write_text(public_url)
-        print(f"[INFO] Saved URL to {URL_FILE}")
+        if self.get_tunnel_url() != self.public_url:
+            write_atomic(self.url_file, self.public_url)
+            print(f"[INFO] Saved URL to {self.url_file}")
 
         # Save detailed tunnel info to JSON file
         tunnel_info = {
-            "public_url": public_url,
+            "public_url": self.public_url,
             "local_port": self.port,
-            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "tunnel_name": self.tunnel.name if self.tunnel else None,
+            "created_at": self.created_at,
+            "tunnel_name": self.tunnel_name,
+            "reconnects": self.reconnects,
+            "health": health,
         }
-
-        with open(TUNNEL_INFO_FILE, 'w') as f:
-            json.dump(tunnel_info, f, indent=2)
-
-        print(f"[INFO] Saved tunnel info to {TUNNEL_INFO_FILE}")
+        write_atomic(self.info_file, json.dumps(tunnel_info, indent=2))
 
     def stop(self):
         """
@@ -156,27 +282,24 @@ class NgrokTunnelManager:
         """
         print("[INFO] Stopping ngrok tunnel...")
 
-        if self.tunnel:
-            try:
-                # Disconnect the tunnel
-                ngrok.disconnect(self.tunnel.public_url)
-                print("[SUCCESS] Tunnel disconnected")
-            except Exception as e:
-                print(f"[WARNING] Error disconnecting tunnel: {e}")
-
-        # Kill ngrok process
-        # This ensures no orphaned ngrok processes remain
         try:
-            ngrok.kill()
+            # Disconnect the tunnel
+            self._close_tunnel()
+            print("[SUCCESS] Tunnel disconnected")
+        except Exception as e:
+            print(f"[WARNING] Error disconnecting tunnel: {e}")
+
+        try:
+            self._shutdown()
             print("[SUCCESS] Ngrok process killed")
         except Exception as e:
             print(f"[WARNING] Error killing ngrok: {e}")
 
         # Clean up files
-        if URL_FILE.exists():
-            URL_FILE.unlink()
-        if TUNNEL_INFO_FILE.exists():
-            TUNNEL_INFO_FILE.unlink()
+        if self.url_file.exists():
+            self.url_file.unlink()
+        if self.info_file.exists():
+            self.info_file.unlink()
 
         print("[INFO] Cleanup complete")
 
@@ -187,60 +310,361 @@ class NgrokTunnelManager:
         Returns:
             Tunnel URL string, or None if not available
         """
-        if URL_FILE.exists():
-            return URL_FILE.read_text().strip()
+        if self.url_file.exists():
+            return self.url_file.read_text().strip()
         return None
 
+
 # ============================================================================
-# SIGNAL HANDLING
+# HEALTH MONITORING
 # ============================================================================
 
-# Global tunnel manager instance for signal handler
-tunnel_manager: Optional[NgrokTunnelManager] = None
-
-def signal_handler(sig, frame):
+def probe_url(public_url: str, path: str = PROBE_PATH) -> str:
     """
-    Handle interrupt signals (Ctrl+C) gracefully.
+    HTTP URL that reaches the MCP server through the tunnel.
 
-    This ensures tunnel is properly closed when user stops the script.
+    TCP tunnels ("tcp://host:port") carry plain HTTP, so they are probed
+    with http://; HTTP(S) tunnel URLs are used as they are.
 
     Args:
-        sig: Signal number
-        frame: Current stack frame
+        public_url: Tunnel URL
+        path: Path on the server
+
+    Returns:
+        URL to probe
     """
-    print("\n[INFO] Interrupt received, shutting down...")
+    if public_url.startswith("tcp://"):
+        public_url = "http://" + public_url[len("tcp://"):]
+    return public_url.rstrip("/") + path
 
-    if tunnel_manager:
-        tunnel_manager.stop()
 
-    sys.exit(0)
+class TunnelHealthMonitor:
+    """
+    Probes the MCP endpoint through the public tunnel URL and re-establishes
+    the tunnel when it is dead.
+
+    Each probe is a GET of /mcp/ through the tunnel. Any HTTP answer below
+    500 (the server answers a bare GET with a redirect or "missing session"
+    error) proves the whole path works: ngrok edge, agent and server. The
+    tunnel is re-established when MAX_PROBE_FAILURES probes in a row fail
+    (timeout, refused, 5xx).
+
+    A tunnel whose p95 round-trip latency exceeds SLOW_TUNNEL_MS is reported
+    as "slow". It is only replaced when rotate_on_slow is set (a new tunnel
+    may land on a less congested edge, but gets a new URL), and then at most
+    once per slow_cooldown seconds.
+
+    Every probe updates ngrok_tunnel_info.json with the health report.
+    """
+
+    def __init__(
+        self,
+        manager: NgrokTunnelManager,
+        interval: float = PROBE_INTERVAL_SECONDS,
+        timeout: float = PROBE_TIMEOUT_SECONDS,
+        max_failures: int = MAX_PROBE_FAILURES,
+        slow_ms: float = SLOW_TUNNEL_MS,
+        window: int = LATENCY_WINDOW,
+        rotate_on_slow: bool = ROTATE_ON_SLOW,
+        slow_cooldown: float = SLOW_ROTATION_COOLDOWN_SECONDS,
+    ):
+        """
+        Args:
+            manager: Tunnel to monitor (already started)
+            interval: Seconds between probes
+            timeout: Seconds before a probe counts as failed
+            max_failures: Consecutive failures before reconnecting
+            slow_ms: p95 latency (ms) above which the tunnel counts as slow
+            window: Number of recent probes used for latency percentiles
+            rotate_on_slow: Replace the tunnel when it is slow
+            slow_cooldown: Minimum seconds between two slow-tunnel replacements
+        """
+        self.manager = manager
+        self.interval = interval
+        self.timeout = timeout
+        self.max_failures = max_failures
+        self.slow_ms = slow_ms
+        self.rotate_on_slow = rotate_on_slow
+        self.slow_cooldown = slow_cooldown
+        # time.monotonic() of the last slow-tunnel replacement
+        self.last_slow_rotation: Optional[float] = None
+        # Round-trip times (ms) of recent successful probes on this tunnel
+        self.latencies: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.probes = 0
+        self.failures = 0
+        self.state = "unknown"
+        self.last_probe: Optional[Dict[str, Any]] = None
+        self.last_reconnect: Optional[Dict[str, Any]] = None
+        # Failed reconnections in a row (drives the backoff)
+        self.reconnect_failures = 0
+
+    def probe(self) -> Dict[str, Any]:
+        """
+        Send one request through the tunnel.
+
+        Returns:
+            Dictionary with ok, latency_ms, status_code and error
+        """
+        url = probe_url(self.manager.public_url)
+        started = time.perf_counter()
+        try:
+            # Redirects are not followed: one round trip is what we measure
+            response = httpx.get(url, timeout=self.timeout, follow_redirects=False)
+            latency_ms = (time.perf_counter() - started) * 1000
+            ok = response.status_code < 500
+            return {
+                "ok": ok,
+                "latency_ms": round(latency_ms, 1),
+                "status_code": response.status_code,
+                "error": None if ok else f"HTTP {response.status_code}",
+            }
+        except httpx.HTTPError as e:
+            return {
+                "ok": False,
+                "latency_ms": None,
+                "status_code": None,
+                "error": f"{type(e).__name__}: {e}" if str(e) else type(e).__name__,
+            }
+
+    def latency_percentiles(self) -> Dict[str, Any]:
+        """
+        Round-trip latency percentiles over the recent probes.
+
+        Returns:
+            Dictionary with samples, p50_ms, p95_ms, p99_ms and max_ms
+            (None while there are no samples)
+        """
+        values = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            return values[min(len(values) - 1, int(p * len(values)))] if values else None
+
+        return {
+            "samples": len(values),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": values[-1] if values else None,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Health report saved in ngrok_tunnel_info.json."""
+        return {
+            "state": self.state,
+            "probe_url": probe_url(self.manager.public_url),
+            "probes": self.probes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency": self.latency_percentiles(),
+            "last_probe": self.last_probe,
+            "last_reconnect": self.last_reconnect,
+            "checked_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def check(self) -> str:
+        """
+        Probe once and reconnect if the tunnel is dead (or slow, if enabled).
+
+        Returns:
+            "healthy", "degraded" (failed, not yet given up), "slow",
+            "dead" or "reconnected"
+        """
+        result = self.probe()
+        self.probes += 1
+        self.last_probe = {**result, "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+        reason = None
+        previous_state = self.state
+        if result["ok"]:
+            self.consecutive_failures = 0
+            self.latencies.append(result["latency_ms"])
+            self.state = "healthy"
+            p95 = self.latency_percentiles()["p95_ms"]
+            if len(self.latencies) >= MIN_LATENCY_SAMPLES and p95 > self.slow_ms:
+                self.state = "slow"
+                reason = self.slow_rotation_reason(p95, report=previous_state != "slow")
+        else:
+            self.consecutive_failures += 1
+            self.failures += 1
+            self.state = "degraded"
+            print(f"[WARNING] Tunnel probe failed ({self.consecutive_failures}/{self.max_failures}): {result['error']}")
+            if self.consecutive_failures >= self.max_failures:
+                self.state = "dead"
+                reason = f"{self.consecutive_failures} failed probes in a row ({result['error']})"
+
+        if reason is not None:
+            print(f"[WARNING] Tunnel is {self.state}: {reason}")
+            if self.reconnect(reason):
+                return "reconnected"
+
+        self.save()
+        return self.state
+
+    def slow_rotation_reason(self, p95: float, report: bool) -> Optional[str]:
+        """
+        Decide whether a slow tunnel is replaced now.
+
+        Args:
+            p95: Current p95 latency (ms)
+            report: Log the slowness (once, when the tunnel turns slow)
+
+        Returns:
+            Reason for reconnecting, or None to keep the tunnel
+        """
+        reason = f"p95 latency {p95:.0f} ms > {self.slow_ms:.0f} ms"
+        if not self.rotate_on_slow:
+            if report:
+                print(f"[WARNING] Tunnel is slow: {reason} (keeping it; set BOLTZ_TUNNEL_ROTATE_ON_SLOW to replace it)")
+            return None
+
+        if self.last_slow_rotation is not None:
+            wait = self.slow_cooldown - (time.monotonic() - self.last_slow_rotation)
+            if wait > 0:
+                if report:
+                    print(f"[WARNING] Tunnel is slow: {reason} (next replacement allowed in {wait:.0f}s)")
+                return None
+
+        self.last_slow_rotation = time.monotonic()
+        return reason
+
+    def reconnect(self, reason: str) -> bool:
+        """
+        Re-establish the tunnel and start measuring it from scratch.
+
+        Args:
+            reason: Why the tunnel is being replaced (saved in the report)
+
+        Returns:
+            True if a new tunnel is up
+        """
+        old_url = self.manager.public_url
+        try:
+            new_url = self.manager.reconnect()
+        except Exception as e:
+            self.reconnect_failures += 1
+            self.last_reconnect = {"reason": reason, "error": str(e), "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+            print(f"[ERROR] Could not re-establish tunnel: {e}")
+            return False
+
+        self.reconnect_failures = 0
+        self.latencies.clear()
+        self.consecutive_failures = 0
+        self.state = "reconnected"
+        self.last_reconnect = {
+            "reason": reason,
+            "old_url": old_url,
+            "new_url": new_url,
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.save()
+        if new_url != old_url:
+            print("=" * 60)
+            print(f"[WARNING] Tunnel URL changed: {new_url}")
+            print("[WARNING] Update the URL in your Claude Desktop configuration")
+            print("=" * 60)
+        return True
+
+    def save(self) -> None:
+        """Write the health report to ngrok_tunnel_info.json."""
+        try:
+            self.manager.save_tunnel_info(health=self.report())
+        except OSError as e:
+            print(f"[WARNING] Could not save tunnel info: {e}")
+
+    def next_delay(self) -> float:
+        """Seconds until the next probe (backs off while reconnection fails)."""
+        if self.reconnect_failures == 0:
+            return self.interval
+        backoff = RECONNECT_BACKOFF_SECONDS * (2 ** (self.reconnect_failures - 1))
+        return max(self.interval, min(backoff, RECONNECT_BACKOFF_MAX_SECONDS))
+
+    def run(self, stop_event: threading.Event) -> None:
+        """
+        Probe until stop_event is set.
+
+        Args:
+            stop_event: Set to stop monitoring (e.g. by the signal handler)
+        """
+        self.check()
+        while not stop_event.wait(self.next_delay()):
+            self.check()
 
-# Register signal handlers
-# SIGINT = Ctrl+C
-# SIGTERM = kill command
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
 
 # ============================================================================
 # MAIN FUNCTION
 # ============================================================================
 
+def env_float(name: str, default: float) -> float:
+    """Read a number from the environment."""
+    return float(os.getenv(name, str(default)))
+
+
 def main():
     """
     Main entry point for tunnel manager.
 
-    This can be run standalone or imported by the MCP server script.
+    Configuration is read here (not at import time), so the classes above
+    can be imported and tested without an ngrok token.
+
+    Environment:
+    - NGROK_AUTH_TOKEN: ngrok authentication token
+    - BOLTZ_PORT: Port of the MCP server (default: 8000)
+    - BOLTZ_TUNNEL_PROBE_INTERVAL: Seconds between health probes (default: 15)
+    - BOLTZ_TUNNEL_PROBE_TIMEOUT: Seconds before a probe fails (default: 10)
+    - BOLTZ_TUNNEL_MAX_FAILURES: Failed probes in a row before reconnecting (default: 3)
+    - BOLTZ_TUNNEL_SLOW_MS: p95 latency reported as slow (default: 3000)
+    - BOLTZ_TUNNEL_ROTATE_ON_SLOW: Also replace a slow tunnel (default: false)
+    - BOLTZ_TUNNEL_SLOW_COOLDOWN: Minimum seconds between slow-tunnel
+      replacements (default: 1800)
     """
-    global tunnel_manager
+    parser = argparse.ArgumentParser(description="Ngrok tunnel with health monitoring for the Boltz MCP Server")
+    parser.add_argument("--port", type=int, help="Port of the MCP server (default: BOLTZ_PORT or 8000)")
+    args = parser.parse_args()
+
+    # Load .env file
+    if ENV_FILE.exists():
+        load_dotenv(ENV_FILE)
+        print(f"[INFO] Loaded environment from {ENV_FILE}")
+    else:
+        print(f"[WARNING] No .env file found at {ENV_FILE}")
+
+    port = args.port or int(os.getenv("BOLTZ_PORT", str(DEFAULT_SERVER_PORT)))
 
     print("=" * 60)
     print("Ngrok Tunnel Manager for Boltz MCP Server")
     print("=" * 60)
 
+    # Get ngrok auth token from environment
+    auth_token = os.getenv("NGROK_AUTH_TOKEN")
+    if not auth_token:
+        print("[ERROR] NGROK_AUTH_TOKEN not set")
+        print("[ERROR] Please set it in .env file or environment")
+        print("[INFO] Get your token from: https://dashboard.ngrok.com/get-started/your-authtoken")
+        sys.exit(1)
+
     # Create tunnel manager
-    tunnel_manager = NgrokTunnelManager(
-        port=MCP_SERVER_PORT,
-        auth_token=NGROK_AUTH_TOKEN
+    tunnel_manager = NgrokTunnelManager(port=port, auth_token=auth_token)
+
+    # Stop monitoring on Ctrl+C (SIGINT) or kill (SIGTERM); the tunnel is
+    # closed in the finally block below
+    stop_event = threading.Event()
+
+    def signal_handler(sig, frame):
+        print("\n[INFO] Interrupt received, shutting down...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    monitor = TunnelHealthMonitor(
+        tunnel_manager,
+        interval=env_float("BOLTZ_TUNNEL_PROBE_INTERVAL", PROBE_INTERVAL_SECONDS),
+        timeout=env_float("BOLTZ_TUNNEL_PROBE_TIMEOUT", PROBE_TIMEOUT_SECONDS),
+        max_failures=int(env_float("BOLTZ_TUNNEL_MAX_FAILURES", MAX_PROBE_FAILURES)),
+        slow_ms=env_float("BOLTZ_TUNNEL_SLOW_MS", SLOW_TUNNEL_MS),
+        rotate_on_slow=os.getenv("BOLTZ_TUNNEL_ROTATE_ON_SLOW", str(ROTATE_ON_SLOW)).lower() in ("1", "true", "yes"),
+        slow_cooldown=env_float("BOLTZ_TUNNEL_SLOW_COOLDOWN", SLOW_ROTATION_COOLDOWN_SECONDS),
     )
 
     try:
@@ -251,25 +675,19 @@ def main():
         print("[SUCCESS] Tunnel is ready!")
         print("=" * 60)
         print(f"\nPublic URL: {public_url}")
-        print(f"\nLocal Port: {MCP_SERVER_PORT}")
+        print(f"\nLocal Port: {port}")
         print("\nUse this URL in your Claude Desktop configuration:")
         print(f"  {public_url}")
+        print(f"\nHealth checks every {monitor.interval:.0f}s; the tunnel is re-established if it dies")
         print("\nPress Ctrl+C to stop the tunnel")
         print("=" * 60)
 
-        # Keep tunnel alive
-        # The script will run until interrupted
-        while True:
-            time.sleep(1)
-
-    except KeyboardInterrupt:
-        # This is handled by signal_handler, but included for completeness
-        print("\n[INFO] Keyboard interrupt received")
+        # Keep tunnel alive (and healthy) until interrupted
+        monitor.run(stop_event)
 
     finally:
         # Cleanup on exit
-        if tunnel_manager:
-            tunnel_manager.stop()
+        tunnel_manager.stop()
 
 # ============================================================================
 # SCRIPT ENTRY POINT
@@ -280,12 +698,12 @@ if __name__ == "__main__":
     Run tunnel manager as standalone script.
 
     Usage:
-        python3 start_ngrok_tunnel.py
+        python3 start_ngrok_tunnel.py [--port 8000]
 
     This will:
     1. Load .env configuration
     2. Start ngrok tunnel
     3. Display public URL
-    4. Keep tunnel running until Ctrl+C
+    4. Probe the tunnel and re-establish it when needed, until Ctrl+C
     """
     main()
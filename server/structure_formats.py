@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+Compact output formats for the Boltz MCP Server.
+
+Boltz writes predictions as text mmCIF, which is verbose: every coordinate
+is spelled out in ASCII and every row repeats its chain and residue names.
+For large assemblies and multi-sample downloads a compact encoding cuts
+transfer and client parse time considerably. Supported formats:
+
+- cif:    the text mmCIF written by Boltz (unchanged)
+- cif.gz: gzip-compressed mmCIF
+- bcif:   BinaryCIF (the column-oriented MessagePack encoding of mmCIF read
+          by Mol*, Biotite, Gemmi and others); all categories are kept
+- pdb.gz: gzip-compressed PDB (legacy tools; single-character chain IDs)
+- npz:    NumPy archive with coordinates (float32), pLDDT/B-factors and
+          per-atom labels only (fastest to load from Python)
+
+Conversions are done once and cached next to the CIF
+(<name>.bcif, <name>.pdb.gz, ...), so every later download is a file read.
+
+Usage:
+    from structure_formats import convert_structure
+    bcif_path = convert_structure(cif_path, "bcif")
+
+Run as a script to compare sizes, encode and parse times:
+    python3 structure_formats.py --benchmark [model.cif ...]
+"""
+
+import io
+import os
+import gzip
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+# MessagePack is the container format of BinaryCIF
+import msgpack
+
+from structure_io import read_cif_categories, read_mmcif_atoms, read_pdb_atoms
+
+# ============================================================================
+# FORMATS
+# ============================================================================
+
+# Key: format name, Value: suffix of the cached file (replaces ".cif")
+OUTPUT_FORMATS = {
+    "cif": ".cif",
+    "cif.gz": ".cif.gz",
+    "bcif": ".bcif",
+    "pdb.gz": ".pdb.gz",
+    "npz": ".coords.npz",
+}
+
+# gzip level: 6 is within a few percent of 9 at a fraction of the time
+GZIP_LEVEL = 6
+
+# BinaryCIF version written into the file header
+BCIF_VERSION = "0.3.0"
+
+# Range of BinaryCIF's int32 columns
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+# BinaryCIF ByteArray data types
+_INT8, _INT16, _INT32, _UINT8, _UINT16, _UINT32, _FLOAT32, _FLOAT64 = 1, 2, 3, 4, 5, 6, 32, 33
+_DTYPES = {
+    _INT8: "<i1", _INT16: "<i2", _INT32: "<i4",
+    _UINT8: "<u1", _UINT16: "<u2", _UINT32: "<u4",
+    _FLOAT32: "<f4", _FLOAT64: "<f8",
+}
+
+# Most decimal places kept exactly by the FixedPoint encoding
+MAX_FIXED_POINT_DIGITS = 6
+
+
+# ============================================================================
+# BINARYCIF ENCODING
+# ============================================================================
+
+def _byte_array(values: np.ndarray) -> Tuple[bytes, Dict[str, Any]]:
+    """Encode an array as raw little-endian bytes with its BinaryCIF type."""
+    for kind, dtype in _DTYPES.items():
+        if np.dtype(dtype) == values.dtype.newbyteorder("<"):
+            return values.astype(dtype).tobytes(), {"kind": "ByteArray", "type": kind}
+    raise ValueError(f"Unsupported dtype {values.dtype}")
+
+
+def _integer_packing(values: np.ndarray) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+    """
+    Pack 32-bit integers into 8- or 16-bit ones.
+
+    Values outside the small type's range are written as a run of limit
+    values followed by the remainder (the BinaryCIF IntegerPacking rule).
+    The byte count giving the smaller output is chosen.
+
+    Returns:
+        (packed array, encoding), or None if packing would not save space
+    """
+    unsigned = bool(values.size == 0 or values.min() >= 0)
+    values = values.astype(np.int64)
+
+    def plan(byte_count: int) -> Tuple[int, int, int, np.ndarray]:
+        bits = 8 * byte_count
+        upper = (1 << bits) - 1 if unsigned else (1 << (bits - 1)) - 1
+        lower = 0 if unsigned else -(1 << (bits - 1))
+        # Number of limit values written before each remainder
+        if unsigned:
+            repeats = values // upper
+        else:
+            repeats = np.where(values >= 0, values // upper, values // lower)
+        return upper, lower, byte_count * (int(repeats.sum()) + len(values)), repeats
+
+    # Sizes are computed before anything is allocated: large values would
+    # otherwise expand into very long runs of limit values
+    plans = [plan(1), plan(2)]
+    byte_count = 1 if plans[0][2] <= plans[1][2] else 2
+    upper, lower, size, repeats = plans[byte_count - 1]
+    if size >= 4 * len(values):
+        return None
+
+    limit = np.where(values >= 0, upper, lower)
+    packed = np.repeat(limit, repeats + 1)
+    packed[np.cumsum(repeats + 1) - 1] = values - repeats * limit
+    dtype = f"<{'u' if unsigned else 'i'}{byte_count}"
+    return packed.astype(dtype), {
+        "kind": "IntegerPacking",
+        "byteCount": byte_count,
+        "isUnsigned": unsigned,
+        "srcSize": len(values),
+    }
+
+
+def _delta(values: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Store differences between neighbours (good for increasing IDs).
+
+    Raises:
+        OverflowError: If a difference does not fit in int32
+    """
+    origin = int(values[0]) if len(values) else 0
+    deltas = np.diff(values.astype(np.int64), prepend=origin)
+    _check_int32(deltas)
+    return deltas.astype(np.int32), {"kind": "Delta", "origin": origin, "srcType": _INT32}
+
+
+def _run_length(values: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Store (value, count) pairs (good for chain and residue columns)."""
+    if len(values) == 0:
+        return values.astype(np.int32), {"kind": "RunLength", "srcType": _INT32, "srcSize": 0}
+    starts = np.flatnonzero(np.diff(values, prepend=values[0] - 1))
+    counts = np.diff(np.append(starts, len(values)))
+    pairs = np.column_stack([values[starts], counts]).ravel().astype(np.int32)
+    return pairs, {"kind": "RunLength", "srcType": _INT32, "srcSize": len(values)}
+
+
+def _check_int32(values: np.ndarray) -> None:
+    """Raise OverflowError if any value is outside the int32 range."""
+    if len(values) and (values.min() < INT32_MIN or values.max() > INT32_MAX):
+        raise OverflowError(f"Integer column exceeds the int32 range: {values.min()}..{values.max()}")
+
+
+def _encode_integers(values: np.ndarray) -> Tuple[bytes, List[Dict[str, Any]]]:
+    """
+    Encode an integer column with the smallest of the usual pipelines.
+
+    BinaryCIF integer columns are int32; pipelines whose intermediate
+    values would not fit (e.g. huge deltas) are skipped.
+
+    Returns:
+        (encoded bytes, encodings in the order they were applied)
+
+    Raises:
+        OverflowError: If a value does not fit in int32 (callers fall back
+            to a string column)
+    """
+    values = np.asarray(values, dtype=np.int64)
+    _check_int32(values)
+    values = values.astype(np.int32)
+    best = None
+    for pipeline in ((), (_delta,), (_run_length,), (_delta, _run_length)):
+        data, encodings = values, []
+        try:
+            for step in pipeline:
+                data, encoding = step(data)
+                encodings.append(encoding)
+        except OverflowError:
+            continue
+        packing = _integer_packing(data)
+        if packing is not None:
+            encodings.append(packing[1])
+            data = packing[0]
+        raw, byte_array = _byte_array(data.astype(data.dtype if packing else np.int32))
+        if best is None or len(raw) < len(best[0]):
+            best = (raw, encodings + [byte_array])
+    return best
+
+
+def _numeric_kind(values: np.ndarray) -> Optional[str]:
+    """
+    Classify a column of present (unmasked) values as "int", "decimal" or None.
+
+    Deleting digits, signs and dots from the joined column leaves nothing
+    only for numeric columns, which is much faster than a regex per value.
+    """
+    if len(values) == 0:
+        return None
+    joined = "".join(values.tolist()).encode("utf-8")
+    if joined.translate(None, b"0123456789+-"):
+        if joined.translate(None, b"0123456789+-."):
+            return None
+        return "decimal"
+    return "int"
+
+
+def _encode_column(name: str, values: List[str]) -> Dict[str, Any]:
+    """
+    Encode one text column as a BinaryCIF column.
+
+    Integer columns use Delta/RunLength/IntegerPacking, decimal columns are
+    stored as FixedPoint integers with as many digits as the text had, and
+    everything else becomes a StringArray. "." and "?" go into the mask.
+    """
+    text = np.array(values)
+    mask_values = (text == ".").astype(np.int32) + 2 * (text == "?")
+    present = text[mask_values == 0]
+    kind = _numeric_kind(present)
+
+    encoding = None
+    if kind == "int":
+        try:
+            numbers = np.zeros(len(text), dtype=np.int64)
+            numbers[mask_values == 0] = present.astype(np.int64)
+            data, encoding = _encode_integers(numbers)
+        except (ValueError, OverflowError):
+            # e.g. "1-2", or numbers that do not fit int32
+            encoding = None
+    elif kind == "decimal":
+        dots = np.char.find(present, ".")
+        digits = int(np.max(np.where(dots >= 0, np.char.str_len(present) - dots - 1, 0)))
+        if digits <= MAX_FIXED_POINT_DIGITS:
+            try:
+                numbers = np.zeros(len(text))
+                numbers[mask_values == 0] = present.astype(np.float64)
+                factor = 10 ** digits
+                data, encoding = _encode_integers(np.rint(numbers * factor).astype(np.int64))
+                src_type = _FLOAT32 if digits <= 3 else _FLOAT64
+                encoding = [{"kind": "FixedPoint", "factor": factor, "srcType": src_type}] + encoding
+            except (ValueError, OverflowError):
+                # Not numeric after all, or too large for int32 fixed point
+                encoding = None
+
+    if encoding is None:
+        # StringArray: distinct strings concatenated, rows index into them
+        strings, indices = np.unique(np.where(mask_values == 0, text, ""), return_inverse=True)
+        strings = strings.tolist()
+        offsets = np.concatenate([[0], np.cumsum([len(string) for string in strings])])
+        data, data_encoding = _encode_integers(indices)
+        offset_bytes, offset_encoding = _encode_integers(offsets)
+        encoding = [{
+            "kind": "StringArray",
+            "dataEncoding": data_encoding,
+            "stringData": "".join(strings),
+            "offsetEncoding": offset_encoding,
+            "offsets": offset_bytes,
+        }]
+
+    mask = None
+    if mask_values.any():
+        mask_data, mask_encoding = _encode_integers(mask_values)
+        mask = {"data": mask_data, "encoding": mask_encoding}
+
+    return {"name": name, "data": {"data": data, "encoding": encoding}, "mask": mask}
+
+
+def encode_binary_cif(cif_path: Path) -> bytes:
+    """
+    Convert a text mmCIF file to BinaryCIF.
+
+    Args:
+        cif_path: mmCIF file
+
+    Returns:
+        BinaryCIF file content
+    """
+    block, categories = read_cif_categories(cif_path)
+    encoded_categories = []
+    for category, fields in categories.items():
+        row_count = len(next(iter(fields.values())))
+        encoded_categories.append({
+            "name": category,
+            "rowCount": row_count,
+            "columns": [_encode_column(field, values) for field, values in fields.items()],
+        })
+    return msgpack.packb({
+        "version": BCIF_VERSION,
+        "encoder": "boltz-mcp-server",
+        "dataBlocks": [{"header": block, "categories": encoded_categories}],
+    }, use_bin_type=True)
+
+
+# ============================================================================
+# BINARYCIF DECODING (used by the benchmark and to verify conversions)
+# ============================================================================
+
+def _decode_data(data: Any, encodings: List[Dict[str, Any]]) -> Any:
+    """Undo a list of BinaryCIF encodings (applied in reverse order)."""
+    for encoding in reversed(encodings):
+        kind = encoding["kind"]
+        if kind == "ByteArray":
+            data = np.frombuffer(data, dtype=_DTYPES[encoding["type"]])
+        elif kind == "IntegerPacking":
+            data = data.astype(np.int64)
+            if encoding["isUnsigned"]:
+                limits = data == (1 << (8 * encoding["byteCount"])) - 1
+            else:
+                bound = 1 << (8 * encoding["byteCount"] - 1)
+                limits = (data == bound - 1) | (data == -bound)
+            # Each output value is the sum of a run of limit values plus one remainder
+            group = np.concatenate([[0], np.cumsum(~limits)[:-1]])
+            data = np.bincount(group, weights=data, minlength=encoding["srcSize"]).astype(np.int64)
+        elif kind == "Delta":
+            data = np.cumsum(data.astype(np.int64)) + encoding["origin"]
+        elif kind == "RunLength":
+            data = np.repeat(data[0::2], data[1::2])
+        elif kind == "FixedPoint":
+            data = data / encoding["factor"]
+        elif kind == "StringArray":
+            offsets = _decode_data(encoding["offsets"], encoding["offsetEncoding"])
+            indices = _decode_data(data, encoding["dataEncoding"])
+            text = encoding["stringData"]
+            strings = np.array([text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)])
+            data = strings[indices] if len(strings) else np.array([], dtype=str)
+        else:
+            raise ValueError(f"Unsupported BinaryCIF encoding: {kind}")
+    return data
+
+
+def decode_binary_cif(content: bytes) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Decode a BinaryCIF file into {category: {field: array}} (first block).
+
+    Masked values come back as the column's placeholder (0 or "").
+
+    Args:
+        content: BinaryCIF file content
+
+    Returns:
+        Decoded columns
+    """
+    block = msgpack.unpackb(content, raw=False)["dataBlocks"][0]
+    return {
+        category["name"]: {
+            column["name"]: _decode_data(column["data"]["data"], column["data"]["encoding"])
+            for column in category["columns"]
+        }
+        for category in block["categories"]
+    }
+
+
+# ============================================================================
+# PDB AND NPZ
+# ============================================================================
+
+def _first_present(fields: Dict[str, List[str]], *names: str) -> List[str]:
+    """First of several mmCIF columns that exists (all "." if none do)."""
+    for name in names:
+        if name in fields:
+            return fields[name]
+    return ["."] * len(next(iter(fields.values())))
+
+
+def encode_pdb(cif_path: Path) -> bytes:
+    """
+    Convert the first model of an mmCIF file to PDB text.
+
+    Atom serial numbers wrap at 99999 as most tools expect.
+
+    Args:
+        cif_path: mmCIF file
+
+    Returns:
+        PDB file content
+
+    Raises:
+        ValueError: If a chain ID is longer than the one character PDB allows
+    """
+    _, categories = read_cif_categories(cif_path)
+    atoms = categories.get("_atom_site")
+    if not atoms:
+        raise ValueError(f"No _atom_site loop in {cif_path}")
+
+    group = _first_present(atoms, "group_PDB")
+    name = _first_present(atoms, "auth_atom_id", "label_atom_id")
+    alt = _first_present(atoms, "label_alt_id")
+    res_name = _first_present(atoms, "auth_comp_id", "label_comp_id")
+    chain = _first_present(atoms, "auth_asym_id", "label_asym_id")
+    res_seq = _first_present(atoms, "auth_seq_id", "label_seq_id")
+    ins_code = _first_present(atoms, "pdbx_PDB_ins_code")
+    x, y, z = atoms["Cartn_x"], atoms["Cartn_y"], atoms["Cartn_z"]
+    occupancy = _first_present(atoms, "occupancy")
+    b_factor = _first_present(atoms, "B_iso_or_equiv")
+    element = _first_present(atoms, "type_symbol")
+    model = _first_present(atoms, "pdbx_PDB_model_num")
+
+    too_long = sorted({c for c in chain if len(c) > 1})
+    if too_long:
+        raise ValueError(f"Chain IDs {too_long[:5]} do not fit the PDB format; use cif or bcif")
+
+    def blank(value: str) -> str:
+        return "" if value in (".", "?") else value
+
+    lines = []
+    previous_chain = None
+    for i in range(len(x)):
+        if model[i] != model[0]:
+            break
+        if previous_chain is not None and chain[i] != previous_chain:
+            lines.append("TER")
+        previous_chain = chain[i]
+
+        # Names shorter than 4 characters start in column 14 unless the
+        # element has two letters (PDB convention, e.g. " CA " vs "CA  ")
+        atom_name = name[i]
+        if len(atom_name) < 4 and len(blank(element[i])) < 2:
+            atom_name = " " + atom_name
+        occ = float(occupancy[i]) if blank(occupancy[i]) else 1.0
+        b = float(b_factor[i]) if blank(b_factor[i]) else 0.0
+        lines.append(
+            f"{'HETATM' if group[i] == 'HETATM' else 'ATOM  '}{(i + 1) % 100000:5d} "
+            f"{atom_name:<4}{blank(alt[i])[:1]:1}{res_name[i][:3]:>3} {blank(chain[i]):1}"
+            f"{int(blank(res_seq[i]) or 0) % 10000:4d}{blank(ins_code[i])[:1]:1}   "
+            f"{float(x[i]):8.3f}{float(y[i]):8.3f}{float(z[i]):8.3f}{occ:6.2f}{b:6.2f}"
+            f"          {blank(element[i]).upper():>2}"
+        )
+    lines.append("TER")
+    lines.append("END")
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def encode_npz(cif_path: Path) -> bytes:
+    """
+    Store the atoms of an mmCIF file as a compressed NumPy archive.
+
+    Arrays: coords (N, 3) float32, b_factor (N,) float32 (pLDDT for Boltz
+    outputs), and the labels chain, res_seq, res_name, atom, element.
+
+    Args:
+        cif_path: mmCIF file
+
+    Returns:
+        .npz file content (load with numpy.load)
+    """
+    atoms = read_mmcif_atoms(cif_path)
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        coords=atoms["coords"].astype(np.float32),
+        b_factor=atoms["b_factor"].astype(np.float32),
+        chain=atoms["chain"],
+        res_seq=atoms["res_seq"].astype(np.int32),
+        res_name=atoms["res_name"],
+        atom=atoms["atom"],
+        element=atoms["element"],
+    )
+    return buffer.getvalue()
+
+
+# ============================================================================
+# CACHED CONVERSION
+# ============================================================================
+
+def _gzip(data: bytes) -> bytes:
+    """gzip without a timestamp, so identical input gives identical output."""
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+# Key: format name, Value: function producing the file content from a CIF path
+_ENCODERS = {
+    "cif.gz": lambda path: _gzip(path.read_bytes()),
+    "bcif": encode_binary_cif,
+    "pdb.gz": lambda path: _gzip(encode_pdb(path)),
+    "npz": encode_npz,
+}
+
+
+def converted_path(cif_path: Path, output_format: str) -> Path:
+    """Where the converted copy of a CIF file is cached."""
+    return cif_path.with_name(cif_path.stem + OUTPUT_FORMATS[output_format])
+
+
+def convert_structure(cif_path: Path, output_format: str) -> Path:
+    """
+    Get a CIF file in another format, converting it at most once.
+
+    The converted file is written atomically next to the CIF and reused
+    as long as it is not older than the CIF.
+
+    Args:
+        cif_path: Predicted structure (mmCIF)
+        output_format: One of OUTPUT_FORMATS
+
+    Returns:
+        Path to the file in the requested format
+
+    Raises:
+        ValueError: If the format is unknown or the structure cannot be
+                    represented in it
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unsupported format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}"
+        )
+    if output_format == "cif":
+        return cif_path
+
+    target = converted_path(cif_path, output_format)
+    if target.exists() and target.stat().st_mtime >= cif_path.stat().st_mtime:
+        return target
+
+    content = _ENCODERS[output_format](cif_path)
+
+    # Unique temp name: concurrent requests may convert the same file
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp_name, target)
+    return target
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+_BENCHMARK_RESIDUES = [
+    ("ALA", [("N", "N"), ("CA", "C"), ("C", "C"), ("O", "O"), ("CB", "C")]),
+    ("LEU", [("N", "N"), ("CA", "C"), ("C", "C"), ("O", "O"), ("CB", "C"),
+             ("CG", "C"), ("CD1", "C"), ("CD2", "C")]),
+    ("SER", [("N", "N"), ("CA", "C"), ("C", "C"), ("O", "O"), ("CB", "C"), ("OG", "O")]),
+    ("LYS", [("N", "N"), ("CA", "C"), ("C", "C"), ("O", "O"), ("CB", "C"),
+             ("CG", "C"), ("CD", "C"), ("CE", "C"), ("NZ", "N")]),
+]
+
+
+def write_benchmark_cif(path: Path, chains: int, residues_per_chain: int, seed: int = 0) -> None:
+    """
+    Write a synthetic Boltz-style mmCIF (same _atom_site columns and number
+    formatting) for benchmarking.
+
+    Args:
+        path: Output file
+        chains: Number of chains
+        residues_per_chain: Residues in each chain
+        seed: Random seed
+    """
+    import random
+
+    rng = random.Random(seed)
+    columns = [
+        "group_PDB", "id", "type_symbol", "label_atom_id", "label_alt_id", "label_comp_id",
+        "label_seq_id", "auth_seq_id", "pdbx_PDB_ins_code", "label_asym_id", "Cartn_x",
+        "Cartn_y", "Cartn_z", "occupancy", "label_entity_id", "auth_asym_id", "auth_comp_id",
+        "B_iso_or_equiv", "pdbx_PDB_model_num",
+    ]
+    lines = [f"data_{path.stem}", "#", "_entry.id " + path.stem, "#", "loop_"]
+    lines += [f"_atom_site.{c}" for c in columns]
+
+    serial = 0
+    for c in range(chains):
+        chain_id = chr(ord("A") + c % 26) + (str(c // 26) if c >= 26 else "")
+        x, y, z = rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-50, 50)
+        for r in range(1, residues_per_chain + 1):
+            res_name, atoms = rng.choice(_BENCHMARK_RESIDUES)
+            plddt = rng.uniform(40, 98)
+            for atom_name, element in atoms:
+                serial += 1
+                x, y, z = x + rng.uniform(-1, 1.5), y + rng.uniform(-1, 1.5), z + rng.uniform(-1, 1.5)
+                lines.append(
+                    f"ATOM {serial} {element} {atom_name} . {res_name} {r} {r} ? {chain_id} "
+                    f"{x:.5f} {y:.5f} {z:.5f} 1 {c + 1} {chain_id} {res_name} {plddt:.2f} 1"
+                )
+    lines.append("#")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def run_benchmark(cif_paths: Optional[List[Path]] = None) -> None:
+    """
+    Compare formats by size, encode time and client parse time.
+
+    Args:
+        cif_paths: CIF files to convert (default: synthetic outputs from a
+                   single protein up to a large assembly)
+    """
+    import time
+
+    workdir = Path(tempfile.mkdtemp(prefix="boltz_formats_"))
+    if not cif_paths:
+        cif_paths = []
+        for label, chains, residues in (("monomer", 1, 400), ("complex", 4, 800), ("assembly", 20, 1000)):
+            path = workdir / f"{label}_model_0.cif"
+            write_benchmark_cif(path, chains, residues)
+            cif_paths.append(path)
+
+    def parse_gzipped(path: Path, reader) -> None:
+        # Clients decompress, then parse the text as usual
+        plain = workdir / f"parse_{path.name[:-3]}"
+        plain.write_bytes(gzip.decompress(path.read_bytes()))
+        reader(plain)
+
+    def parse_npz(path: Path) -> None:
+        with np.load(path) as data:
+            for key in data.files:
+                data[key]
+
+    parsers = {
+        "cif": read_mmcif_atoms,
+        "cif.gz": lambda path: parse_gzipped(path, read_mmcif_atoms),
+        "bcif": lambda path: decode_binary_cif(path.read_bytes()),
+        "pdb.gz": lambda path: parse_gzipped(path, read_pdb_atoms),
+        "npz": parse_npz,
+    }
+
+    for source in cif_paths:
+        # Work on a copy so cached conversions of real outputs are untouched
+        cif_path = workdir / f"bench_{source.name}"
+        cif_path.write_bytes(source.read_bytes())
+        atoms = len(read_mmcif_atoms(cif_path)["coords"])
+        base_size = cif_path.stat().st_size
+
+        print(f"{source.name}: {atoms} atoms")
+        print(f"  {'format':<8} {'size':>12} {'ratio':>7} {'encode':>10} {'parse':>10}")
+        for output_format in OUTPUT_FORMATS:
+            start = time.perf_counter()
+            try:
+                target = convert_structure(cif_path, output_format)
+            except ValueError as e:
+                print(f"  {output_format:<8} skipped: {e}")
+                continue
+            encode_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            parsers[output_format](target)
+            parse_ms = (time.perf_counter() - start) * 1000
+
+            size = target.stat().st_size
+            print(f"  {output_format:<8} {size:>12,} {base_size / size:>6.1f}x "
+                  f"{encode_ms:>8.1f}ms {parse_ms:>8.1f}ms")
+        print()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        run_benchmark([Path(arg) for arg in sys.argv[1:] if arg != "--benchmark"])
+    else:
+        print(__doc__)
@@ -0,0 +1,304 @@
+"""
+Minimal structure file readers for the Boltz MCP Server.
+
+Boltz writes predictions as mmCIF; users upload PDB files. The server only
+needs atom-level data (coordinates, chain, residue, atom name, element,
+B-factor), so instead of depending on a full structure library these
+readers parse just the _atom_site loop / ATOM records into NumPy arrays.
+read_cif_categories() reads every category as string columns, for format
+conversion (see structure_formats.py).
+
+Both atom readers return a dictionary of equal-length arrays:
+- coords:   (N, 3) float64 Cartesian coordinates
+- chain:    (N,) str chain identifiers
+- res_seq:  (N,) int residue numbers
+- res_name: (N,) str residue names
+- atom:     (N,) str atom names
+- element:  (N,) str element symbols
+- b_factor: (N,) float64 B-factors (Boltz stores pLDDT here)
+"""
+
+import re
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Iterator
+
+import numpy as np
+
+# mmCIF _atom_site columns used (label_* preferred, auth_* as fallback)
+_CIF_COLUMNS = {
+    "chain": ("auth_asym_id", "label_asym_id"),
+    "res_seq": ("label_seq_id", "auth_seq_id"),
+    "res_name": ("label_comp_id", "auth_comp_id"),
+    "atom": ("label_atom_id", "auth_atom_id"),
+    "element": ("type_symbol",),
+    "b_factor": ("B_iso_or_equiv",),
+    "x": ("Cartn_x",),
+    "y": ("Cartn_y",),
+    "z": ("Cartn_z",),
+    "model": ("pdbx_PDB_model_num",),
+}
+
+# Tokenizer for mmCIF data rows that contain quoted values
+_QUOTED_TOKEN = re.compile(r"'(?:[^']|'(?=\S))*'(?=\s|$)|\"[^\"]*\"|\S+")
+
+
+def _split_cif_row(line: str) -> List[str]:
+    """Split one mmCIF data row into tokens, honouring quotes."""
+    if "'" not in line and '"' not in line:
+        return line.split()
+    tokens = []
+    for token in _QUOTED_TOKEN.findall(line):
+        if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+            token = token[1:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _to_int(values: List[str]) -> np.ndarray:
+    """Convert mmCIF integer tokens ("." and "?" become 0)."""
+    return np.array([int(v) if v not in (".", "?") else 0 for v in values], dtype=np.int64)
+
+
+def read_mmcif_atoms(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Read the _atom_site loop of an mmCIF file (first model only).
+
+    Args:
+        path: mmCIF file
+
+    Returns:
+        Atom arrays (see module docstring)
+
+    Raises:
+        ValueError: If the file has no _atom_site loop
+    """
+    columns: List[str] = []
+    rows: List[List[str]] = []
+    in_header = False
+    in_rows = False
+
+    with open(path) as f:
+        for raw_line in f:
+            line = raw_line.strip()
+            if in_rows:
+                if not line or line == "#" or line.startswith(("loop_", "_", "data_")):
+                    break
+                rows.append(_split_cif_row(line))
+            elif line.startswith("_atom_site."):
+                in_header = True
+                columns.append(line.split(".", 1)[1].split()[0])
+            elif in_header:
+                # First non-header line after the column names starts the data
+                in_rows = True
+                if line and line != "#":
+                    rows.append(_split_cif_row(line))
+
+    if not columns:
+        raise ValueError(f"No _atom_site loop in {path}")
+
+    position = {name: i for i, name in enumerate(columns)}
+
+    def column(field: str) -> List[str]:
+        for name in _CIF_COLUMNS[field]:
+            if name in position:
+                index = position[name]
+                return [row[index] for row in rows]
+        return ["."] * len(rows)
+
+    # Keep only the first model
+    models = column("model")
+    if rows and models[0] not in (".", "?"):
+        first = models[0]
+        keep = [i for i, m in enumerate(models) if m == first]
+        if len(keep) != len(rows):
+            rows = [rows[i] for i in keep]
+
+    coords = np.array(
+        [column("x"), column("y"), column("z")], dtype=np.float64
+    ).T.reshape(-1, 3)
+    b_factor = np.array(
+        [float(v) if v not in (".", "?") else 0.0 for v in column("b_factor")], dtype=np.float64
+    )
+
+    return {
+        "coords": coords,
+        "chain": np.array(column("chain")),
+        "res_seq": _to_int(column("res_seq")),
+        "res_name": np.array(column("res_name")),
+        "atom": np.array(column("atom")),
+        "element": np.array(column("element")),
+        "b_factor": b_factor,
+    }
+
+
+def _cif_lines(path: Path) -> Iterator[Tuple[List[str], Optional[List[bool]]]]:
+    """
+    Yield the tokens of an mmCIF file, one line at a time.
+
+    Each item is (tokens, quoted). quoted is None for plain data lines
+    (no quotes, comments or underscores, so no tags or keywords); otherwise
+    it flags which tokens were quoted, since quoted tokens are never tags
+    or keywords even if they look like one. Multi-line ";" text fields are
+    returned as one quoted token.
+    """
+    with open(path) as f:
+        text_field = None
+        for raw_line in f:
+            if text_field is not None:
+                if raw_line.startswith(";"):
+                    yield ["\n".join(text_field)], [True]
+                    text_field = None
+                    # Anything after the closing ";" is ordinary data
+                    raw_line = raw_line[1:]
+                else:
+                    text_field.append(raw_line.rstrip("\n"))
+                    continue
+            elif raw_line.startswith(";"):
+                text_field = [raw_line[1:].rstrip("\n")]
+                continue
+
+            line = raw_line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "_" not in line and "'" not in line and '"' not in line and "#" not in line:
+                # Fast path: most lines are plain rows of loop data
+                yield line.split(), None
+                continue
+
+            tokens, quoted = [], []
+            for token in _QUOTED_TOKEN.findall(line):
+                if token.startswith("#"):
+                    break
+                is_quoted = len(token) >= 2 and token[0] == token[-1] and token[0] in "'\""
+                tokens.append(token[1:-1] if is_quoted else token)
+                quoted.append(is_quoted)
+            yield tokens, quoted
+
+
+def read_cif_categories(path: Path) -> Tuple[str, Dict[str, Dict[str, List[str]]]]:
+    """
+    Read every category of an mmCIF file (first data block) as string columns.
+
+    Both "_category.field value" pairs and loop_ tables are returned as
+    {category: {field: [values]}}; single values become one-row columns.
+    Missing values stay as "." or "?".
+
+    Args:
+        path: mmCIF file
+
+    Returns:
+        (data block name, categories in file order)
+    """
+    block = ""
+    categories: Dict[str, Dict[str, List[str]]] = {}
+    loop_tags: List[str] = []
+    loop_values: List[str] = []
+    in_loop_header = False
+    pending_tag = None
+    next_block = False
+
+    def add(tag: str, values: List[str]) -> None:
+        category, _, field = tag.partition(".")
+        categories.setdefault(category, {})[field] = values
+
+    def flush_loop() -> None:
+        width = len(loop_tags)
+        for i, tag in enumerate(loop_tags):
+            add(tag, loop_values[i::width])
+        loop_tags.clear()
+        loop_values.clear()
+
+    for line_tokens, line_quoted in _cif_lines(path):
+        if line_quoted is None and loop_tags and not in_loop_header and pending_tag is None:
+            loop_values.extend(line_tokens)
+            continue
+
+        for token, quoted in zip(line_tokens, line_quoted or [False] * len(line_tokens)):
+            if not quoted:
+                if token.lower() == "loop_":
+                    flush_loop()
+                    in_loop_header = True
+                    continue
+                if token.startswith("data_"):
+                    if block:
+                        # Only the first data block is read
+                        next_block = True
+                        break
+                    block = token[5:]
+                    continue
+                if token.startswith("_"):
+                    if in_loop_header:
+                        loop_tags.append(token)
+                    else:
+                        flush_loop()
+                        pending_tag = token
+                    continue
+
+            if pending_tag is not None:
+                add(pending_tag, [token])
+                pending_tag = None
+            elif loop_tags:
+                in_loop_header = False
+                loop_values.append(token)
+        if next_block:
+            break
+
+    flush_loop()
+    return block, categories
+
+
+def read_pdb_atoms(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Read ATOM/HETATM records of a PDB file (first model only).
+
+    Args:
+        path: PDB file
+
+    Returns:
+        Atom arrays (see module docstring)
+
+    Raises:
+        ValueError: If the file has no atom records
+    """
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith("ENDMDL"):
+                break
+            if line.startswith(("ATOM  ", "HETATM")):
+                records.append(line)
+
+    if not records:
+        raise ValueError(f"No ATOM records in {path}")
+
+    # Fixed-width columns per the PDB format specification
+    coords = np.array(
+        [[float(r[30:38]), float(r[38:46]), float(r[46:54])] for r in records], dtype=np.float64
+    )
+    return {
+        "coords": coords,
+        "chain": np.array([r[21].strip() for r in records]),
+        "res_seq": np.array([int(r[22:26]) for r in records], dtype=np.int64),
+        "res_name": np.array([r[17:20].strip() for r in records]),
+        "atom": np.array([r[12:16].strip() for r in records]),
+        "element": np.array([
+            r[76:78].strip() if len(r) >= 78 and r[76:78].strip() else r[12:16].strip()[:1]
+            for r in records
+        ]),
+        "b_factor": np.array([float(r[60:66]) if r[60:66].strip() else 0.0 for r in records]),
+    }
+
+
+def read_structure_atoms(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Read atoms from an mmCIF or PDB file, chosen by file extension.
+
+    Args:
+        path: .cif/.mmcif or .pdb/.ent file
+
+    Returns:
+        Atom arrays (see module docstring)
+    """
+    if path.suffix.lower() in (".cif", ".mmcif"):
+        return read_mmcif_atoms(path)
+    return read_pdb_atoms(path)
@@ -0,0 +1,343 @@
+"""
+Compact structure summaries for the Boltz MCP Server.
+
+Most clients only want to know how confident a prediction is, and that
+used to require downloading the whole base64 CIF. This module condenses a
+predicted structure into a few hundred bytes:
+
+- Boltz confidence metrics (confidence score, pTM, ipTM, complex pLDDT)
+  from confidence_<name>.json
+- Mean and per-chain pLDDT (from plddt_<name>.npz, or the CIF B-factors
+  where Boltz also stores pLDDT)
+- Steric clash count (heavy-atom pairs closer than CLASH_DISTANCE)
+- Optionally CA RMSD and TM-score against a reference structure (e.g. the
+  PDB the user uploaded)
+
+All geometry is vectorized with NumPy; clash detection uses a cell list so
+large assemblies stay fast.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from structure_io import read_structure_atoms
+
+# Heavy atoms closer than this (in Angstrom) count as a clash
+CLASH_DISTANCE = 2.2
+
+# Decimal places kept in summaries
+PRECISION = 3
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    """Round a metric for output (None stays None)."""
+    return None if value is None else round(float(value), PRECISION)
+
+
+# ============================================================================
+# CONFIDENCE
+# ============================================================================
+
+def load_confidence(cif_path: Path) -> Dict[str, Any]:
+    """
+    Load the Boltz confidence JSON that belongs to a predicted CIF.
+
+    Boltz writes <name>.cif next to confidence_<name>.json.
+
+    Args:
+        cif_path: Predicted structure
+
+    Returns:
+        Confidence dictionary (empty if the file does not exist)
+    """
+    confidence_path = cif_path.with_name(f"confidence_{cif_path.stem}.json")
+    if not confidence_path.exists():
+        return {}
+    with open(confidence_path) as f:
+        return json.load(f)
+
+
+def load_token_plddt(cif_path: Path) -> Optional[np.ndarray]:
+    """
+    Load per-token pLDDT (0-1 scale) from plddt_<name>.npz, if present.
+
+    Args:
+        cif_path: Predicted structure
+
+    Returns:
+        1-D array of pLDDT values, or None
+    """
+    plddt_path = cif_path.with_name(f"plddt_{cif_path.stem}.npz")
+    if not plddt_path.exists():
+        return None
+    with np.load(plddt_path) as data:
+        return np.asarray(data["plddt"], dtype=np.float64)
+
+
+# ============================================================================
+# GEOMETRY
+# ============================================================================
+
+def count_clashes(atoms: Dict[str, np.ndarray], cutoff: float = CLASH_DISTANCE) -> int:
+    """
+    Count heavy-atom pairs closer than cutoff.
+
+    Pairs within one residue, between sequence-adjacent residues of the
+    same chain (peptide/phosphodiester bonds) and disulfide SG-SG pairs are
+    ignored. Atoms are binned into cutoff-sized cells and only pairs in
+    neighbouring cells are compared, so cost grows linearly with size.
+
+    Args:
+        atoms: Atom arrays from structure_io
+        cutoff: Clash distance in Angstrom
+
+    Returns:
+        Number of clashing atom pairs
+    """
+    heavy = atoms["element"] != "H"
+    coords = atoms["coords"][heavy]
+    if len(coords) < 2:
+        return 0
+    chain = atoms["chain"][heavy]
+    res_seq = atoms["res_seq"][heavy]
+    atom_name = atoms["atom"][heavy]
+
+    # Integer cell coordinates, packed into one int64 key per atom
+    cells = np.floor((coords - coords.min(axis=0)) / cutoff).astype(np.int64)
+    span = cells.max(axis=0) + 3
+    def pack(c: np.ndarray) -> np.ndarray:
+        return ((c[:, 0] + 1) * span[1] + (c[:, 1] + 1)) * span[2] + (c[:, 2] + 1)
+
+    keys = pack(cells)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    clashes = 0
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                neighbour_keys = pack(cells + np.array([dx, dy, dz]))
+                lo = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+                hi = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+                counts = hi - lo
+                if not counts.any():
+                    continue
+
+                # Expand (atom i, range [lo, hi)) into explicit pairs
+                i = np.repeat(np.arange(len(coords)), counts)
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                j = order[np.repeat(lo, counts) + offsets]
+
+                # Count each unordered pair once
+                keep = i < j
+                i, j = i[keep], j[keep]
+                if len(i) == 0:
+                    continue
+
+                close = np.einsum("ij,ij->i", coords[i] - coords[j], coords[i] - coords[j]) < cutoff * cutoff
+                i, j = i[close], j[close]
+
+                same_chain = chain[i] == chain[j]
+                bonded_neighbours = same_chain & (np.abs(res_seq[i] - res_seq[j]) <= 1)
+                disulfide = (atom_name[i] == "SG") & (atom_name[j] == "SG")
+                clashes += int(np.count_nonzero(~bonded_neighbours & ~disulfide))
+
+    return clashes
+
+
+def _ca_trace(atoms: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extract CA coordinates (one per residue) and their chain IDs, in file order.
+
+    Nucleic acids use C1' instead of CA.
+    """
+    mask = (atoms["atom"] == "CA") | (atoms["atom"] == "C1'")
+    return atoms["coords"][mask], atoms["chain"][mask]
+
+
+def _pair_residues(
+    model: Dict[str, np.ndarray], reference: Dict[str, np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pair model and reference CA atoms.
+
+    Chains are matched in order of appearance and residues by position
+    within each chain (Boltz renumbers residues from 1, so numbers cannot
+    be compared directly). Extra residues on either side are dropped.
+    """
+    model_ca, model_chain = _ca_trace(model)
+    ref_ca, ref_chain = _ca_trace(reference)
+
+    def split(chains: np.ndarray) -> List[np.ndarray]:
+        _, first = np.unique(chains, return_index=True)
+        return [np.flatnonzero(chains == chains[f]) for f in sorted(first)]
+
+    model_idx, ref_idx = [], []
+    for m, r in zip(split(model_chain), split(ref_chain)):
+        n = min(len(m), len(r))
+        model_idx.append(m[:n])
+        ref_idx.append(r[:n])
+
+    if not model_idx:
+        return np.empty((0, 3)), np.empty((0, 3))
+    return model_ca[np.concatenate(model_idx)], ref_ca[np.concatenate(ref_idx)]
+
+
+def kabsch_transform(mobile: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Least-squares rigid transform taking mobile onto target (Kabsch).
+
+    Args:
+        mobile: (N, 3) coordinates to move
+        target: (N, 3) fixed coordinates
+
+    Returns:
+        (rotation, translation) such that mobile @ rotation + translation ~ target
+    """
+    mobile_center = mobile.mean(axis=0)
+    target_center = target.mean(axis=0)
+    covariance = (mobile - mobile_center).T @ (target - target_center)
+    u, _, vt = np.linalg.svd(covariance)
+    # Avoid reflections
+    if np.linalg.det(u @ vt) < 0:
+        u[:, -1] *= -1
+    rotation = u @ vt
+    return rotation, target_center - mobile_center @ rotation
+
+
+def compare_to_reference(model: Dict[str, np.ndarray], reference: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    CA RMSD and TM-score of a model against a reference structure.
+
+    RMSD uses the optimal superposition of all paired residues. The
+    TM-score is then improved by re-superposing on the residues that lie
+    within shrinking distance cutoffs (the TM-score program's heuristic,
+    without its exhaustive fragment search), so it is a close lower bound.
+
+    Args:
+        model: Atom arrays of the prediction
+        reference: Atom arrays of the reference
+
+    Returns:
+        Dictionary with rmsd, tm_score and aligned_residues
+    """
+    model_ca, ref_ca = _pair_residues(model, reference)
+    length = len(ref_ca)
+    if length < 3:
+        return {"rmsd": None, "tm_score": None, "aligned_residues": int(length)}
+
+    d0 = 1.24 * np.cbrt(length - 15) - 1.8 if length > 21 else 0.5
+
+    def score(core: np.ndarray) -> Tuple[float, np.ndarray]:
+        rotation, translation = kabsch_transform(model_ca[core], ref_ca[core])
+        distances = np.linalg.norm(model_ca @ rotation + translation - ref_ca, axis=1)
+        return float(np.mean(1.0 / (1.0 + (distances / d0) ** 2))), distances
+
+    tm_score, distances = score(np.ones(length, dtype=bool))
+    rmsd = float(np.sqrt(np.mean(distances ** 2)))
+
+    for factor in (4.0, 2.0, 1.0):
+        core = distances < max(d0 * factor, 1.0)
+        if core.sum() < 3:
+            break
+        candidate, candidate_distances = score(core)
+        if candidate > tm_score:
+            tm_score, distances = candidate, candidate_distances
+
+    return {
+        "rmsd": _round(rmsd),
+        "tm_score": _round(tm_score),
+        "aligned_residues": int(length),
+    }
+
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+
+def _per_chain_plddt(atoms: Dict[str, np.ndarray], token_plddt: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Mean pLDDT and residue count per chain (0-100 scale).
+
+    Per-token pLDDT from the npz is used when its length matches the
+    number of residues; otherwise the per-atom B-factors are averaged.
+    """
+    # One entry per residue: first atom of each (chain, res_seq, res_name) run
+    chain, res_seq, res_name = atoms["chain"], atoms["res_seq"], atoms["res_name"]
+    new_residue = np.ones(len(chain), dtype=bool)
+    new_residue[1:] = (chain[1:] != chain[:-1]) | (res_seq[1:] != res_seq[:-1]) | (res_name[1:] != res_name[:-1])
+    residue_chain = chain[new_residue]
+
+    if token_plddt is not None and len(token_plddt) == len(residue_chain):
+        residue_plddt = token_plddt * 100.0
+    else:
+        # Mean B-factor per residue
+        residue_id = np.cumsum(new_residue) - 1
+        totals = np.bincount(residue_id, weights=atoms["b_factor"])
+        counts = np.bincount(residue_id)
+        residue_plddt = totals / counts
+
+    chains = []
+    _, first = np.unique(residue_chain, return_index=True)
+    for index in sorted(first):
+        chain_id = residue_chain[index]
+        values = residue_plddt[residue_chain == chain_id]
+        chains.append({
+            "chain": str(chain_id),
+            "residues": int(len(values)),
+            "mean_plddt": _round(values.mean()),
+        })
+    return chains
+
+
+def summarize_prediction(cif_path: Path, reference_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Build a compact summary of a predicted structure.
+
+    Args:
+        cif_path: Predicted structure written by Boltz
+        reference_path: Optional reference structure (PDB or mmCIF) for
+                        RMSD/TM-score
+
+    Returns:
+        JSON-serializable summary (a few hundred bytes)
+    """
+    atoms = read_structure_atoms(cif_path)
+    confidence = load_confidence(cif_path)
+    token_plddt = load_token_plddt(cif_path)
+
+    chains = _per_chain_plddt(atoms, token_plddt)
+
+    # Boltz reports per-chain pTM keyed by chain index ("0", "1", ...)
+    chains_ptm = confidence.get("chains_ptm") or {}
+    for index, chain in enumerate(chains):
+        chain["ptm"] = _round(chains_ptm.get(str(index)))
+
+    if confidence.get("complex_plddt") is not None:
+        mean_plddt = confidence["complex_plddt"] * 100.0
+    elif token_plddt is not None:
+        mean_plddt = token_plddt.mean() * 100.0
+    else:
+        mean_plddt = atoms["b_factor"].mean()
+
+    summary: Dict[str, Any] = {
+        "structure": cif_path.name,
+        "atoms": int(len(atoms["coords"])),
+        "confidence_score": _round(confidence.get("confidence_score")),
+        "ptm": _round(confidence.get("ptm")),
+        "iptm": _round(confidence.get("iptm")),
+        "mean_plddt": _round(mean_plddt),
+        "chains": chains,
+        "clashes": count_clashes(atoms),
+    }
+
+    if reference_path is not None:
+        summary["reference"] = {
+            "structure": reference_path.name,
+            **compare_to_reference(atoms, read_structure_atoms(reference_path)),
+        }
+
+    return summary
@@ -0,0 +1,631 @@
+"""
+Per-job span tracing for the Boltz MCP Server.
+
+A job record only says when a job was created, started and finished. When
+a job is slow, that does not tell whether the time went to decoding the
+upload, waiting for a GPU, the MSA server, running the model or encoding
+the result. This module records spans (named time intervals) per job:
+
+- Tool handlers: the submitting call and its steps (e.g. upload decoding),
+  and result retrieval (format conversion, base64 encoding)
+- The pipeline: GPU queue, sample-set lookup, each Boltz attempt, retry
+  backoff, merging samples, summarizing
+- Boltz itself: stages parsed from its output (see BoltzStageTimeline)
+
+Spans are appended as JSON lines to traces/<job_id>.jsonl, so every HTTP
+process (and, via the job status, every worker host) can add to the same
+job's trace. Traces export as Chrome trace JSON (chrome://tracing,
+https://ui.perfetto.dev) or OpenTelemetry OTLP/JSON, per job or in aggregate.
+Old traces are deleted by age and count (JobTracer.prune).
+
+Span records are plain dictionaries:
+
+    {"name": "boltz_attempt", "span_id": "9f2c...", "parent_id": "41ab...",
+     "start": 1714557600.12, "end": 1714557720.40,
+     "track": "pipeline", "attributes": {"attempt": 1}}
+
+start/end are POSIX timestamps in seconds. Every job has a synthetic root
+span ("job", from creation to completion) whose ID is derived from the job
+ID, so spans written by different processes share one parent without any
+coordination.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Set, Tuple, Iterator
+
+from job_index import parse_timestamp
+
+# Tracks (rows in the Chrome trace viewer), top to bottom
+TRACKS = ("job", "handler", "pipeline", "boltz")
+
+# Name of the synthetic span covering a whole job
+ROOT_SPAN_NAME = "job"
+
+# service.name of exported OpenTelemetry spans
+SERVICE_NAME = "boltz-mcp"
+
+# Export formats accepted by export_traces()
+TRACE_FORMATS = ("chrome", "otlp")
+
+# Boltz output lines that start a stage, checked in order (matched on the
+# stripped line, case-insensitive). Markers missing from a Boltz version
+# simply leave the previous stage running.
+BOLTZ_STAGE_MARKERS = (
+    ("download", re.compile(r"^downloading", re.I)),
+    ("msa", re.compile(r"generating msa|msa server", re.I)),
+    ("preprocess", re.compile(r"checking input data|processing .*input", re.I)),
+    ("model_load", re.compile(r"running structure prediction", re.I)),
+    ("affinity_load", re.compile(r"running affinity prediction", re.I)),
+    # Lightning's progress bar: featurization, trunk and diffusion per batch
+    ("predict", re.compile(r"^predicting", re.I)),
+)
+
+# The progress bar after "Running affinity prediction" belongs to affinity
+PREDICT_STAGE_AFTER = {"affinity_load": "affinity_predict"}
+
+# Stage before the first marker (interpreter start and imports)
+FIRST_STAGE = "startup"
+
+
+def new_span_id() -> str:
+    """Random 64-bit span ID as 16 hex characters."""
+    return os.urandom(8).hex()
+
+
+def root_span_id(job_id: str) -> str:
+    """Span ID of a job's root span (the same in every process)."""
+    return hashlib.sha256(f"{job_id}:root".encode("utf-8")).hexdigest()[:16]
+
+
+def trace_id(job_id: str) -> str:
+    """128-bit OpenTelemetry trace ID of a job as 32 hex characters."""
+    return hashlib.sha256(job_id.encode("utf-8")).hexdigest()[:32]
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+class JobTracer:
+    """
+    Records spans per job as JSON lines on disk.
+
+    Appends are a single write() on a file opened in append mode, so
+    several processes can add spans to the same job safely.
+    """
+
+    def __init__(self, directory: Path, enabled: bool = True):
+        """
+        Args:
+            directory: Directory holding <job_id>.jsonl files
+            enabled: If False, nothing is recorded
+        """
+        self.directory = directory
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        # Span IDs already in each job's trace, for import_spans (loaded
+        # from the file on a job's first import, dropped with the file)
+        self.known_span_ids: Dict[str, Set[str]] = {}
+        if enabled:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, job_id: str) -> Path:
+        """Trace file of a job."""
+        return self.directory / f"{job_id}.jsonl"
+
+    def write(self, job_id: str, spans: List[Dict[str, Any]]) -> None:
+        """
+        Append finished spans to a job's trace.
+
+        Args:
+            job_id: Job ID
+            spans: Span records
+        """
+        if not self.enabled or not spans:
+            return
+        data = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        with self.lock:
+            with open(self.path(job_id), "a") as f:
+                f.write(data)
+
+    def record(
+        self,
+        job_id: str,
+        name: str,
+        start: float,
+        end: Optional[float] = None,
+        parent: Optional[str] = None,
+        track: str = "pipeline",
+        **attributes: Any,
+    ) -> str:
+        """
+        Record one finished span.
+
+        Args:
+            job_id: Job ID
+            name: Span name (e.g. "queue")
+            start: Start time (POSIX seconds)
+            end: End time (default: now)
+            parent: Parent span ID (default: the job's root span)
+            track: Track to draw the span on (see TRACKS)
+            **attributes: Extra details stored with the span
+
+        Returns:
+            ID of the new span
+        """
+        span = make_span(job_id, name, start, end if end is not None else time.time(), parent, track, attributes)
+        self.write(job_id, [span])
+        return span["span_id"]
+
+    @contextmanager
+    def span(
+        self,
+        job_id: str,
+        name: str,
+        parent: Optional[str] = None,
+        track: str = "pipeline",
+        **attributes: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block of code as a span.
+
+        The span is yielded so the block can add attributes or use its
+        span_id as a parent. If the block raises, the error is recorded as
+        the "error" attribute and re-raised.
+
+        Example:
+            with job_tracer.span(job_id, "merge_samples") as span:
+                span["attributes"]["computed"] = merge_run(...)
+        """
+        span = make_span(job_id, name, time.time(), None, parent, track, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span["attributes"]["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            span["end"] = time.time()
+            self.write(job_id, [span])
+
+    def start_handler(self, name: str, **attributes: Any) -> "HandlerTrace":
+        """
+        Start tracing a tool call whose job ID may not be known yet.
+
+        Args:
+            name: Tool name
+            **attributes: Extra details stored with the handler span
+
+        Returns:
+            HandlerTrace; call finish(job_id, ...) when the call is done
+        """
+        return HandlerTrace(self, name, attributes)
+
+    def spans(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        Spans recorded for a job, in recording order.
+
+        A line cut short by a crash mid-write is skipped.
+        """
+        path = self.path(job_id)
+        if not path.exists():
+            return []
+        spans = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+        return spans
+
+    def import_spans(self, job_id: str, spans: List[Dict[str, Any]], **attributes: Any) -> None:
+        """
+        Add spans recorded elsewhere (e.g. by a worker host) to a job's trace.
+
+        Args:
+            job_id: Job ID
+            spans: Span records (spans already in the trace are skipped)
+            **attributes: Extra details added to every imported span
+        """
+        known = self.known_span_ids.get(job_id)
+        if known is None:
+            known = self.known_span_ids[job_id] = {span.get("span_id") for span in self.spans(job_id)}
+        new_spans = [
+            {**span, "attributes": {**span.get("attributes", {}), **attributes}}
+            for span in spans
+            if span.get("span_id") not in known
+        ]
+        known.update(span.get("span_id") for span in new_spans)
+        self.write(job_id, new_spans)
+
+    def traced_job_ids(self, limit: int) -> List[str]:
+        """
+        Most recently updated traces, newest first.
+
+        Args:
+            limit: Maximum number of job IDs
+
+        Returns:
+            Job IDs
+        """
+        if not self.directory.exists():
+            return []
+        paths = sorted(self.directory.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [p.stem for p in paths[:limit]]
+
+    def prune(self, max_age_seconds: float, max_files: int, now: Optional[float] = None) -> int:
+        """
+        Delete old traces, so the trace directory does not grow forever.
+
+        A trace is deleted when it was last updated more than max_age_seconds
+        ago, or when more than max_files newer traces exist.
+
+        Args:
+            max_age_seconds: Maximum age since the last update (0 = no limit)
+            max_files: Maximum number of traces kept (0 = no limit)
+            now: Current time (default: time.time())
+
+        Returns:
+            Number of traces deleted
+        """
+        if not self.directory.exists():
+            return 0
+        now = now if now is not None else time.time()
+
+        traces = []
+        for path in self.directory.glob("*.jsonl"):
+            try:
+                traces.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue  # Deleted by another process meanwhile
+        traces.sort(reverse=True)
+
+        deleted = 0
+        for position, (mtime, path) in enumerate(traces):
+            too_old = max_age_seconds > 0 and now - mtime > max_age_seconds
+            too_many = max_files > 0 and position >= max_files
+            if too_old or too_many:
+                path.unlink(missing_ok=True)
+                self.known_span_ids.pop(path.stem, None)
+                deleted += 1
+        return deleted
+
+
+class HandlerTrace:
+    """
+    Spans of one tool call, written once the call knows its job ID(s).
+
+    A submission only gets its job ID halfway through (after the upload is
+    decoded), and a FASTA batch creates many jobs, so spans are collected
+    here and written to every job the call touched.
+    """
+
+    def __init__(self, tracer: JobTracer, name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.span_id = new_span_id()
+        self.name = name
+        self.start = time.time()
+        self.attributes = dict(attributes)
+        self.children: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a step of the call (same as JobTracer.span, but deferred)."""
+        span = {
+            "name": name,
+            "span_id": new_span_id(),
+            "parent_id": self.span_id,
+            "start": time.time(),
+            "end": None,
+            "track": "handler",
+            "attributes": dict(attributes),
+        }
+        try:
+            yield span
+        except BaseException as e:
+            span["attributes"]["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            span["end"] = time.time()
+            self.children.append(span)
+
+    def finish(self, *job_ids: str, **attributes: Any) -> None:
+        """
+        End the call and write its spans to each job.
+
+        Args:
+            *job_ids: Jobs the call created or read (none: nothing is written)
+            **attributes: Extra details added to the handler span
+        """
+        end = time.time()
+        self.attributes.update(attributes)
+        if len(job_ids) > 1:
+            self.attributes["jobs"] = len(job_ids)
+        for job_id in job_ids:
+            handler = make_span(job_id, self.name, self.start, end, None, "handler", self.attributes)
+            handler["span_id"] = self.span_id
+            self.tracer.write(job_id, [handler, *self.children])
+
+
+def make_span(
+    job_id: str,
+    name: str,
+    start: float,
+    end: Optional[float],
+    parent: Optional[str],
+    track: str,
+    attributes: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Build a span record (see module docstring)."""
+    return {
+        "name": name,
+        "span_id": new_span_id(),
+        "parent_id": parent or root_span_id(job_id),
+        "start": start,
+        "end": end,
+        "track": track,
+        "attributes": dict(attributes),
+    }
+
+
+# ============================================================================
+# BOLTZ STAGES
+# ============================================================================
+
+class BoltzStageTimeline:
+    """
+    Splits one Boltz run into stages from the lines it prints.
+
+    Each line matching a BOLTZ_STAGE_MARKERS pattern ends the current stage
+    and starts the marker's stage; repeated markers of the running stage
+    (e.g. one "Calling MSA server" per chain) do not split it. Boltz's
+    default output cannot separate featurization, trunk and diffusion,
+    which all happen per batch inside the "predict" progress bar.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        Args:
+            started: When the Boltz process was started (default: now)
+        """
+        self.stages: List[Dict[str, Any]] = []
+        self.current = {"name": FIRST_STAGE, "start": started or time.time()}
+
+    def feed(self, line: str, now: Optional[float] = None) -> Optional[str]:
+        """
+        Look at one output line.
+
+        Args:
+            line: Line of stdout or stderr (progress bar redraws included)
+            now: When the line was read (default: now)
+
+        Returns:
+            Name of the stage the line started, or None
+        """
+        stripped = line.strip()
+        for stage, pattern in BOLTZ_STAGE_MARKERS:
+            if pattern.search(stripped):
+                break
+        else:
+            return None
+
+        if stage == "predict":
+            stage = PREDICT_STAGE_AFTER.get(self.current["name"], stage)
+        if stage == self.current["name"]:
+            return None
+
+        now = now or time.time()
+        self.stages.append({**self.current, "end": now})
+        self.current = {"name": stage, "start": now}
+        return stage
+
+    def finish(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        End the last stage (when the process exits).
+
+        Returns:
+            Stages in order, each {"name", "start", "end"}
+        """
+        return [*self.stages, {**self.current, "end": now or time.time()}]
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def job_root_span(job_id: str, job: Optional[Dict[str, Any]], spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the synthetic span covering a whole job.
+
+    Args:
+        job_id: Job ID
+        job: Job record (None if the job is no longer known)
+        spans: The job's recorded spans
+
+    Returns:
+        Root span from creation to completion (or to the last span /
+        now while the job is still running)
+    """
+    job = job or {}
+    starts = [span["start"] for span in spans]
+    ends = [span["end"] for span in spans if span.get("end") is not None]
+
+    def timestamp(field: str) -> Optional[float]:
+        try:
+            return parse_timestamp(job[field])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    start = timestamp("created_at") or min(starts, default=time.time())
+    end = timestamp("completed_at")
+    if end is None:
+        end = time.time() if job.get("status") not in (None, "completed", "failed") else max(ends, default=start)
+
+    attributes = {
+        key: job[key]
+        for key in ("status", "client", "filename", "batch_id", "sequence_length")
+        if job.get(key) is not None
+    }
+    return {
+        "name": ROOT_SPAN_NAME,
+        "span_id": root_span_id(job_id),
+        "parent_id": None,
+        "start": min([start, *starts]),
+        "end": max([end, *ends]),
+        "track": "job",
+        "attributes": {"job_id": job_id, **attributes},
+    }
+
+
+def to_chrome_trace(traces: List[Tuple[str, List[Dict[str, Any]]]]) -> Dict[str, Any]:
+    """
+    Convert traces to the Chrome trace event format.
+
+    Each job is a process (named after the job ID) and each track a thread,
+    so chrome://tracing and Perfetto show one block of rows per job.
+
+    Args:
+        traces: (job_id, spans including the root span) per job
+
+    Returns:
+        {"traceEvents": [...], "displayTimeUnit": "ms"}
+    """
+    events: List[Dict[str, Any]] = []
+    for pid, (job_id, spans) in enumerate(traces, start=1):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"job {job_id}"}})
+        events.append({"name": "process_sort_index", "ph": "M", "pid": pid, "tid": 0, "args": {"sort_index": pid}})
+        tracks = list(TRACKS) + sorted({span["track"] for span in spans} - set(TRACKS))
+        for tid, track in enumerate(tracks, start=1):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": track}})
+            events.append({"name": "thread_sort_index", "ph": "M", "pid": pid, "tid": tid, "args": {"sort_index": tid}})
+
+        for span in spans:
+            end = span["end"] if span.get("end") is not None else time.time()
+            events.append({
+                "name": span["name"],
+                "cat": span["track"],
+                "ph": "X",  # Complete event (start + duration)
+                "ts": round(span["start"] * 1e6),  # microseconds
+                "dur": max(0, round((end - span["start"]) * 1e6)),
+                "pid": pid,
+                "tid": tracks.index(span["track"]) + 1,
+                "args": {**span.get("attributes", {}), "span_id": span["span_id"]},
+            })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def otlp_value(value: Any) -> Dict[str, Any]:
+    """Wrap a Python value as an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, default=str)}
+
+
+def to_otlp_json(traces: List[Tuple[str, List[Dict[str, Any]]]]) -> Dict[str, Any]:
+    """
+    Convert traces to OpenTelemetry OTLP/JSON (an ExportTraceServiceRequest).
+
+    The result can be POSTed to a collector's /v1/traces endpoint or loaded
+    into tools that read OTLP JSON files. Each job is one trace.
+
+    Args:
+        traces: (job_id, spans including the root span) per job
+
+    Returns:
+        {"resourceSpans": [...]}
+    """
+    otlp_spans = []
+    for job_id, spans in traces:
+        for span in spans:
+            end = span["end"] if span.get("end") is not None else time.time()
+            attributes = {"boltz.track": span["track"], **span.get("attributes", {})}
+            otlp_span = {
+                "traceId": trace_id(job_id),
+                "spanId": span["span_id"],
+                "name": span["name"],
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(int(span["start"] * 1e9)),
+                "endTimeUnixNano": str(int(end * 1e9)),
+                "attributes": [{"key": key, "value": otlp_value(value)} for key, value in attributes.items()],
+            }
+            if span.get("parent_id"):
+                otlp_span["parentSpanId"] = span["parent_id"]
+            if "error" in attributes:
+                otlp_span["status"] = {"code": 2, "message": str(attributes["error"])}  # STATUS_CODE_ERROR
+            otlp_spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "boltz_mcp_server"}, "spans": otlp_spans}],
+        }],
+    }
+
+
+def summarize_stages(traces: List[Tuple[str, List[Dict[str, Any]]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Duration statistics per span name across jobs.
+
+    Args:
+        traces: (job_id, spans) per job
+
+    Returns:
+        {name: {"count", "total_seconds", "mean_seconds", "p50_seconds",
+        "p95_seconds", "max_seconds"}}, slowest total first
+    """
+    durations: Dict[str, List[float]] = {}
+    for _, spans in traces:
+        for span in spans:
+            if span.get("end") is not None:
+                durations.setdefault(span["name"], []).append(span["end"] - span["start"])
+
+    summary = {}
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+
+        def percentile(p: float) -> float:
+            return round(values[min(len(values) - 1, int(p * len(values)))], 3)
+
+        summary[name] = {
+            "count": len(values),
+            "total_seconds": round(sum(values), 3),
+            "mean_seconds": round(sum(values) / len(values), 3),
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "max_seconds": round(values[-1], 3),
+        }
+    return summary
+
+
+def export_traces(traces: List[Tuple[str, List[Dict[str, Any]]]], format: str) -> Dict[str, Any]:
+    """
+    Export traces in one of TRACE_FORMATS.
+
+    Args:
+        traces: (job_id, spans including the root span) per job
+        format: "chrome" or "otlp"
+
+    Returns:
+        Trace document
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if format == "chrome":
+        return to_chrome_trace(traces)
+    if format == "otlp":
+        return to_otlp_json(traces)
+    raise ValueError(f"Unsupported trace format '{format}'. Use one of: {', '.join(TRACE_FORMATS)}")